@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+大附件检查基准测试
+
+生成指定大小的随机内容文件，比较几种计算 SHA256 / 检查附件的方式的吞吐量（GB/秒）和峰值内存：
+
+    read_all   整个文件 f.read() 后一次性哈希（对照组）
+    buffered   file_inspect.hash_file：固定 1 MB 缓冲区 readinto 分块哈希
+    mmap       file_inspect.hash_file(use_mmap=True)：mmap 后按块切片哈希
+    inspect    file_inspect.inspect_file：类型检测 + 页数 + 哈希
+
+再把同样总大小拆成多个文件，比较逐个检查与 inspect_files 线程池并行检查。
+每种方式在独立的子进程中运行：峰值 RSS 取自 getrusage（不含启动时的基线），
+Python 分配峰值取自 tracemalloc。文件刚写入，测得的是页缓存命中时的吞吐量。
+
+用法：
+    python benchmarks/bench_file_inspect.py [--size-mb 1024] [--files 8] [--workers 1 2 4 8] [--dir 临时目录]
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import argparse
+import tempfile
+import subprocess
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # Windows 没有 resource 模块，不统计峰值 RSS
+    resource = None
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from file_inspect import hash_file, inspect_file, inspect_files
+
+MODES = ("read_all", "buffered", "mmap", "inspect")
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024  # macOS 单位为字节，Linux 为 KB
+
+def write_random_file(path, size_mb):
+    block = os.urandom(1024 * 1024)
+    with open(path, 'wb') as f:
+        for i in range(size_mb):
+            # 每块改动开头几个字节，避免整份文件由同一块重复组成
+            f.write(i.to_bytes(8, 'little') + block[8:])
+
+def run_mode(mode, paths, workers):
+    """子进程中执行：返回耗时、峰值 RSS 增量和 tracemalloc 峰值"""
+    baseline_rss = peak_rss_mb()
+    tracemalloc.start()
+    started = time.perf_counter()
+    if mode == "read_all":
+        for path in paths:
+            with open(path, 'rb') as f:
+                hashlib.sha256(f.read()).hexdigest()
+    elif mode == "buffered":
+        for path in paths:
+            hash_file(path)
+    elif mode == "mmap":
+        for path in paths:
+            hash_file(path, use_mmap=True)
+    elif mode == "inspect":
+        for path in paths:
+            inspect_file(path)
+    elif mode == "pool":
+        inspect_files(paths, workers)
+    elapsed = time.perf_counter() - started
+    _, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rss = peak_rss_mb()
+    return {
+        "elapsed": elapsed,
+        "rss_mb": rss - baseline_rss if rss is not None else None,
+        "traced_mb": traced_peak / 1024 / 1024,
+    }
+
+def measure(mode, paths, workers=1):
+    command = [sys.executable, os.path.abspath(__file__), "--worker", mode, "--workers", str(workers), "--", *paths]
+    output = subprocess.run(command, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def print_row(label, result, total_gb):
+    rss = f"{result['rss_mb']:>13.1f}" if result['rss_mb'] is not None else f"{'-':>13}"
+    print(f"{label:<22}{total_gb / result['elapsed']:>10.2f}{result['elapsed']:>10.2f}{rss}{result['traced_mb']:>15.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="大附件检查基准测试")
+    parser.add_argument("--size-mb", type=int, default=1024, help="测试数据总大小（MB）")
+    parser.add_argument("--files", type=int, default=8, help="并行测试中拆分的文件数")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8], help="线程池大小")
+    parser.add_argument("--dir", default=None, help="存放测试文件的目录，默认使用系统临时目录")
+    parser.add_argument("--worker", choices=MODES + ("pool",), help=argparse.SUPPRESS)
+    parser.add_argument("paths", nargs="*", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_mode(args.worker, args.paths, args.workers[0])))
+        return
+
+    work_dir = tempfile.mkdtemp(prefix="bench_inspect_", dir=args.dir)
+    try:
+        total_gb = args.size_mb / 1024
+        big = os.path.join(work_dir, "big.bin")
+        print(f"生成测试数据: {args.size_mb} MB -> {work_dir}")
+        write_random_file(big, args.size_mb)
+        parts = []
+        for i in range(args.files):
+            part = os.path.join(work_dir, f"part{i}.bin")
+            write_random_file(part, max(1, args.size_mb // args.files))
+            parts.append(part)
+        parts_gb = max(1, args.size_mb // args.files) * args.files / 1024
+
+        header = f"{'方式':<22}{'GB/秒':>10}{'耗时(秒)':>10}{'峰值RSS(MB)':>13}{'Python峰值(MB)':>15}"
+        print(f"\n单个 {args.size_mb} MB 文件")
+        print(header)
+        for mode in MODES:
+            print_row(mode, measure(mode, [big]), total_gb)
+
+        print(f"\n{args.files} 个文件，共 {parts_gb * 1024:.0f} MB")
+        print(header)
+        print_row("inspect 逐个", measure("inspect", parts), parts_gb)
+        for workers in args.workers:
+            print_row(f"inspect_files x{workers}", measure("pool", parts, workers), parts_gb)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+元数据 JSON 读写基准测试
+
+对 SAVE_DIR 下真实的 email_metadata.json 语料（或在没有语料时生成的合成数据），
+分别测量各 JSON 后端的 load / dump 吞吐量（文件数/秒、MB/秒）。
+
+用法：
+    python benchmarks/bench_metadata_json.py [SAVE_DIR] [--repeat 5] [--synthetic 2000]
+"""
+
+import os
+import sys
+import glob
+import time
+import random
+import argparse
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import metadata_store
+from metadata_store import JSON_BACKENDS, METADATA_FILENAME, set_json_backend
+
+def load_corpus(save_dir):
+    """读取下载目录中的所有元数据文件原始字节"""
+    corpus = []
+    for path in glob.glob(os.path.join(save_dir, '*', METADATA_FILENAME)):
+        with open(path, 'rb') as f:
+            corpus.append(f.read())
+    return corpus
+
+def synthetic_corpus(count, seed=0):
+    """生成与增强下载器输出结构一致的合成元数据"""
+    rng = random.Random(seed)
+    base = datetime(2025, 9, 1, 8, 0, 0)
+    set_json_backend("json")
+    corpus = []
+    for i in range(count):
+        student_id = f"2025{rng.randint(0, 999999999):09d}"
+        sent = base + timedelta(minutes=rng.randint(0, 60 * 24 * 120))
+        attachments = [
+            {"文件名": f"{student_id}张三第{j + 1}次作业.pdf", "大小": rng.randint(1024, 5 * 1024 * 1024),
+             "类型": "application/pdf", "创建时间": sent}
+            for j in range(rng.randint(0, 3))
+        ]
+        metadata = {
+            "邮件ID": str(i + 1),
+            "原始主题": f"{student_id}-张三-第{rng.randint(1, 10)}次作业",
+            "文件夹名称": f"{student_id}_张三_第{rng.randint(1, 10)}次作业",
+            "发件人": f"张三 <{rng.randint(10000, 99999999)}@qq.com>",
+            "收件人": "teacher@qq.com",
+            "发送时间": sent,
+            "接收时间": sent + timedelta(seconds=rng.randint(1, 60)),
+            "解析信息": {
+                "student_id": student_id, "name": "张三", "assignment": "第一次作业",
+                "confidence": rng.randint(30, 100), "source": "学号来自标题, 姓名来自标题",
+                "all_matches": [f"标题: 学号匹配: {student_id}", "标题: 姓名匹配: 张三"],
+            },
+            "附件数量": len(attachments),
+            "附件列表": attachments,
+        }
+        corpus.append(metadata_store.dumps(metadata))
+    return corpus
+
+def bench_backend(name, corpus, repeat):
+    set_json_backend(name)
+    total_bytes = sum(len(data) for data in corpus)
+
+    best_load = float('inf')
+    objects = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        objects = [metadata_store.loads(data) for data in corpus]
+        best_load = min(best_load, time.perf_counter() - start)
+
+    best_dump = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for obj in objects:
+            metadata_store.dumps(obj)
+        best_dump = min(best_dump, time.perf_counter() - start)
+
+    mb = total_bytes / 1024 / 1024
+    return {
+        "后端": name,
+        "load 文件/秒": len(corpus) / best_load if best_load else 0,
+        "load MB/秒": mb / best_load if best_load else 0,
+        "dump 文件/秒": len(corpus) / best_dump if best_dump else 0,
+        "dump MB/秒": mb / best_dump if best_dump else 0,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="元数据 JSON 读写基准测试")
+    parser.add_argument("save_dir", nargs="?", default=os.getenv('SAVE_DIR', 'downloaded_attachments'))
+    parser.add_argument("--repeat", type=int, default=5, help="每个后端重复次数，取最好成绩")
+    parser.add_argument("--synthetic", type=int, default=2000, help="没有真实语料时生成的合成文件数")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.save_dir) if os.path.isdir(args.save_dir) else []
+    source = f"真实语料 {args.save_dir}"
+    if not corpus:
+        corpus = synthetic_corpus(args.synthetic)
+        source = "合成语料"
+
+    total_kb = sum(len(data) for data in corpus) / 1024
+    print(f"语料: {source}，{len(corpus)} 个文件，共 {total_kb:.1f} KB")
+    print(f"{'后端':<8}{'load 文件/秒':>14}{'load MB/秒':>12}{'dump 文件/秒':>14}{'dump MB/秒':>12}")
+    for name in JSON_BACKENDS:
+        result = bench_backend(name, corpus, args.repeat)
+        print(f"{result['后端']:<8}{result['load 文件/秒']:>14.0f}{result['load MB/秒']:>12.1f}"
+              f"{result['dump 文件/秒']:>14.0f}{result['dump MB/秒']:>12.1f}")
+
+if __name__ == "__main__":
+    main()
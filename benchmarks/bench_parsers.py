@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+学生信息解析器基准测试
+
+用固定随机种子生成贴近实际的合成语料（中文标题、附件文件名、邮件正文：
+8/12/13 位学号、各种分隔符、回复/转发前缀、日期等），测量以下解析函数的
+吞吐量（次/秒）和单次调用的峰值内存分配：
+
+    traditional_parse_folder_name
+    extract_info_from_filename_improved
+    extract_student_info_from_text
+    combine_extraction_results
+
+指定基线文件时与基线比较，任一解析器吞吐量下降超过阈值则以返回码 1 退出，可用于 CI。
+吞吐量会先用一段固定的纯 Python 计算做校准，基线比较使用校准后的数值，
+以减小不同机器之间的差异。
+
+用法：
+    python benchmarks/bench_parsers.py                     # 只输出结果
+    python benchmarks/bench_parsers.py --save-baseline     # 把本次结果写入基线文件
+    python benchmarks/bench_parsers.py --check             # 与基线比较，回退超过 --threshold 时失败
+
+基线与机器相关，仓库中不附带 parser_baseline.json：先在要做比较的机器上运行一次
+--save-baseline。基线文件不存在时 --check 只输出提示并跳过比较（返回码 0），不视为失败。
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from smart_student_info_parser import traditional_parse_folder_name, extract_info_from_filename_improved
+from email_content_parser import (extract_student_info_from_text, extract_info_from_subject, extract_info_from_body,
+                                  extract_info_from_sender, combine_extraction_results)
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'parser_baseline.json')
+
+SURNAMES = "王李张刘陈杨赵黄周吴徐孙胡朱高林何郭马罗梁宋郑谢韩唐冯于董萧程曹袁邓许傅沈曾彭吕苏卢蒋蔡贾丁魏薛叶阎余潘杜戴夏钟汪田任姜范方石姚谭廖邹熊金陆郝孔白崔康毛邱秦江史顾侯邵孟龙万段雷钱汤尹黎易常武乔贺赖龚文"
+GIVEN = "伟芳娜秀英敏静丽强磊军洋勇艳杰娟涛明超兰霞平刚桂子轩浩宇欣怡梓涵一诺雨萱思远佳琪嘉豪俊杰晨曦"
+COMPOUND_SURNAMES = ["欧阳", "司马", "诸葛", "上官"]
+ASSIGNMENTS = ["第一次作业", "第二次作业", "第3次作业", "第十次作业", "实验一", "实验报告2", "大作业",
+               "期中报告", "课程设计", "作业3", "homework4", "Lab 5", "第二章习题", "读书笔记"]
+SEPARATORS = ["-", "_", " ", "+", "—", "", "，", "."]
+REPLY_PREFIXES = ["", "", "", "Re:", "RE: ", "回复：", "回复:", "转发：", "Fw: ", "答复: "]
+EXTENSIONS = [".pdf", ".docx", ".doc", ".zip", ".rar", ".pptx", ".jpg", ".py", ".txt"]
+DATE_FORMATS = ["{y}-{m:02d}-{d:02d}", "{y}{m:02d}{d:02d}", "{m}月{d}日", "{y}年{m}月{d}日", "{m}.{d}"]
+
+def _student_id(rng):
+    """8 / 12 / 13 位学号，按常见比例混合"""
+    length = rng.choice([8, 12, 12, 12, 13])
+    prefix = rng.choice(["2025", "2024", "2023", "24", "25"])
+    return (prefix + "".join(rng.choice("0123456789") for _ in range(length)))[:length]
+
+def _name(rng):
+    surname = rng.choice(COMPOUND_SURNAMES) if rng.random() < 0.03 else rng.choice(SURNAMES)
+    return surname + "".join(rng.choice(GIVEN) for _ in range(rng.choice([1, 2, 2])))
+
+def _date(rng):
+    return rng.choice(DATE_FORMATS).format(y=2025, m=rng.randint(9, 12), d=rng.randint(1, 28))
+
+def generate_corpus(count, seed=0):
+    """
+    生成合成语料，每条包含 subject / folder / filename / body / sender
+    """
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(count):
+        student_id, name, assignment = _student_id(rng), _name(rng), rng.choice(ASSIGNMENTS)
+        sep = rng.choice(SEPARATORS)
+        parts = [student_id, name, assignment]
+        if rng.random() < 0.3:
+            rng.shuffle(parts)
+        if rng.random() < 0.25:
+            parts.append(_date(rng))
+        subject = rng.choice(REPLY_PREFIXES) + sep.join(parts)
+        if rng.random() < 0.1:
+            subject = f"{assignment}提交"  # 只有作业名、需要从正文和附件补全的标题
+
+        filename_parts = [student_id, name, assignment] if rng.random() < 0.7 else [name, student_id]
+        filename = rng.choice(["", "-", "_"]).join(filename_parts)
+        if rng.random() < 0.15:
+            filename += f"({rng.randint(1, 3)})"
+        filename += rng.choice(EXTENSIONS)
+
+        body_lines = [rng.choice(["老师您好！", "老师好，", "您好", ""])]
+        if rng.random() < 0.7:
+            body_lines.append(rng.choice([f"我是{name}，学号{student_id}。", f"学号：{student_id}\n姓名：{name}",
+                                          f"{name} {student_id}", f"姓名:{name} 学号:{student_id}"]))
+        body_lines.append(rng.choice([f"附件是{assignment}，请查收。", f"这是我的{assignment}。", "作业已上传，谢谢老师。"]))
+        if rng.random() < 0.3:
+            body_lines.append(f"\n在 {_date(rng)} 10:{rng.randint(10, 59)}，老师 写道：\n> 请大家按时提交{assignment}")
+        body = "\n".join(body_lines)
+
+        sender = rng.choice([f"{name} <{rng.randint(10000, 9999999999)}@qq.com>",
+                             f"\"{student_id}\" <{rng.randint(10000, 9999999999)}@qq.com>",
+                             f"{rng.randint(10000, 9999999999)}@qq.com"])
+        corpus.append({"subject": subject, "folder": subject, "filename": filename, "body": body, "sender": sender})
+    return corpus
+
+def build_cases(corpus):
+    """每个被测解析器的 (函数, 参数列表)"""
+    combine_args = [
+        (extract_info_from_subject(item["subject"]), extract_info_from_body(item["body"]),
+         extract_info_from_filename_improved(item["filename"]), extract_info_from_sender(item["sender"]))
+        for item in corpus
+    ]
+    return {
+        "traditional_parse_folder_name": (traditional_parse_folder_name, [(item["folder"],) for item in corpus]),
+        "extract_info_from_filename_improved": (extract_info_from_filename_improved, [(item["filename"],) for item in corpus]),
+        "extract_student_info_from_text": (extract_student_info_from_text, [(item["body"],) for item in corpus]),
+        "combine_extraction_results": (combine_extraction_results, combine_args),
+    }
+
+def calibrate(rounds=5):
+    """固定的纯 Python 计算耗时（秒，取最好成绩），用于把吞吐量换算到与机器无关的尺度"""
+    best = float('inf')
+    for _ in range(rounds):
+        start = time.perf_counter()
+        total = 0
+        for i in range(200000):
+            total += len(str(i)) * (i & 7)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def bench_case(func, args_list, repeat, alloc_sample):
+    """返回 (次/秒, 平均单次峰值分配字节)"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for args in args_list:
+            func(*args)
+        best = min(best, time.perf_counter() - start)
+    ops = len(args_list) / best if best else 0.0
+
+    # 逐次调用统计峰值分配：调用期间分配的内存高水位减去调用前的占用
+    sample = args_list[:alloc_sample]
+    peak_total = 0
+    tracemalloc.start()
+    try:
+        for args in sample:
+            tracemalloc.reset_peak()
+            base, _ = tracemalloc.get_traced_memory()
+            result = func(*args)
+            _, peak = tracemalloc.get_traced_memory()
+            peak_total += peak - base
+            del result
+    finally:
+        tracemalloc.stop()
+    return ops, peak_total / max(len(sample), 1)
+
+def run(count, repeat, seed, alloc_sample):
+    corpus = generate_corpus(count, seed)
+    calibration = calibrate()
+    results = {}
+    for name, (func, args_list) in build_cases(corpus).items():
+        ops, peak = bench_case(func, args_list, repeat, alloc_sample)
+        results[name] = {"ops_per_second": ops, "normalized": ops * calibration, "peak_bytes_per_call": peak}
+    return corpus, calibration, results
+
+def main():
+    parser = argparse.ArgumentParser(description="学生信息解析器基准测试")
+    parser.add_argument("--count", type=int, default=5000, help="合成语料条数")
+    parser.add_argument("--repeat", type=int, default=5, help="重复次数，取最好成绩")
+    parser.add_argument("--seed", type=int, default=0, help="语料随机种子")
+    parser.add_argument("--alloc-sample", type=int, default=500, help="用于统计内存分配的调用次数")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="基线文件路径")
+    parser.add_argument("--save-baseline", action="store_true", help="把本次结果写入基线文件")
+    parser.add_argument("--check", action="store_true", help="与基线比较，吞吐量回退超过阈值时返回 1；没有基线文件时跳过")
+    parser.add_argument("--threshold", type=float, default=0.2, help="允许的吞吐量回退比例，默认 0.2（20%%）")
+    args = parser.parse_args()
+
+    corpus, calibration, results = run(args.count, args.repeat, args.seed, args.alloc_sample)
+    print(f"语料: 合成 {len(corpus)} 条（种子 {args.seed}），校准耗时 {calibration * 1000:.1f} 毫秒")
+    print(f"{'解析器':<40}{'次/秒':>12}{'校准后':>10}{'单次峰值分配(字节)':>20}")
+    for name, result in results.items():
+        print(f"{name:<40}{result['ops_per_second']:>12.0f}{result['normalized']:>10.1f}{result['peak_bytes_per_call']:>20.0f}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({"count": args.count, "seed": args.seed, "results": results}, f, ensure_ascii=False, indent=2)
+        print(f"✅ 基线已保存: {args.baseline}")
+
+    if args.check:
+        if not os.path.exists(args.baseline):
+            print(f"⚠️ 找不到基线文件: {args.baseline}，跳过基线比较（先运行 --save-baseline 生成基线）")
+            return 0
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)["results"]
+        failed = []
+        print(f"\n--- 与基线比较（允许回退 {args.threshold:.0%}）---")
+        for name, result in results.items():
+            if name not in baseline:
+                continue
+            ratio = result["normalized"] / baseline[name]["normalized"] if baseline[name]["normalized"] else 1.0
+            status = "✅" if ratio >= 1 - args.threshold else "❌"
+            print(f"{status} {name:<40}{ratio:>8.2f}x")
+            if ratio < 1 - args.threshold:
+                failed.append(name)
+        if failed:
+            print(f"❌ 吞吐量回退超过阈值: {', '.join(failed)}")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+端到端流程基准测试
+
+在本进程中启动本地 IMAP 替身服务器，导入 N 封带附件的合成作业邮件，
+然后依次运行增强版下载器和所有分析脚本，输出：
+
+    * 总耗时和每个步骤的耗时
+    * 每个步骤的峰值内存（RSS，仅 Linux / macOS）
+    * 下载目录和报告文件占用的磁盘字节数
+    * 下载器内部各阶段的耗时（来自 --perf-json）
+
+所有文件写入临时目录，不会接触真实邮箱。评估流程中的性能改动时，
+在改动前后各运行一次，用 --json 把结果追加到同一个文件中对比。
+
+用法：
+    python benchmarks/bench_pipeline.py --messages 500 --attachment-kb 200 [--json pipeline.jsonl] [--keep]
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import random
+import argparse
+import tempfile
+import subprocess
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+from email.utils import format_datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(BENCH_DIR, '..', 'src')
+sys.path.insert(0, SRC_DIR)
+
+from local_imap_server import LocalIMAPServer, DEFAULT_FOLDER_PREFIX
+from bench_parsers import generate_corpus
+
+try:
+    import resource  # 仅 Unix 可用，用于读取子进程的峰值内存
+except ImportError:
+    resource = None
+
+USER = "bench@qq.com"
+PASSWORD = "bench"
+FOLDER = "25TA"
+
+# 依次运行的步骤：(名称, 脚本, 参数)
+STEPS = [
+    ("下载", "EnhancedDownloadQQAttachments.py", []),
+    ("按作业分析", "MultiSubmissionAnalyzer.py", []),
+    ("按学生分析", "MultiAssignmentAnalyzer.py", []),
+    ("附件统计", "StatisticsAttachmentDetails.py", []),
+]
+
+def build_messages(count, attachment_kb, seed):
+    """用解析器基准的合成语料生成 RFC822 邮件"""
+    rng = random.Random(seed)
+    base = datetime(2025, 9, 1, 8, 0, 0).astimezone()
+    messages = []
+    for item in generate_corpus(count, seed):
+        msg = EmailMessage()
+        msg['Subject'] = item["subject"]
+        msg['From'] = item["sender"]
+        msg['To'] = USER
+        msg['Date'] = format_datetime(base + timedelta(minutes=rng.randint(0, 60 * 24 * 90)))
+        msg.set_content(item["body"])
+        for _ in range(rng.choice([1, 1, 1, 2, 3])):
+            size = max(1, int(attachment_kb * 1024 * rng.uniform(0.5, 1.5)))
+            msg.add_attachment(b'%PDF-1.4\n' + rng.randbytes(size), maintype='application', subtype='octet-stream',
+                               filename=item["filename"])
+        messages.append(msg.as_bytes())
+    return messages
+
+def directory_bytes(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+def run_step(script, args, env, cwd, log):
+    """
+    运行一个脚本，返回 (耗时秒, 峰值 RSS 字节或 None, 返回码)
+    """
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, os.path.join(SRC_DIR, script)] + args,
+                            env=env, cwd=cwd, stdout=log, stderr=subprocess.STDOUT)
+    peak_rss = None
+    if resource is not None and hasattr(os, 'wait4'):
+        _, status, usage = os.wait4(proc.pid, 0)
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        # Linux 的 ru_maxrss 单位是 KB，macOS 是字节
+        peak_rss = usage.ru_maxrss if sys.platform == 'darwin' else usage.ru_maxrss * 1024
+    else:
+        proc.wait()
+    return time.perf_counter() - start, peak_rss, proc.returncode
+
+def main():
+    parser = argparse.ArgumentParser(description="端到端流程基准测试（本地 IMAP 替身服务器）")
+    parser.add_argument("--messages", type=int, default=200, help="合成邮件数量")
+    parser.add_argument("--attachment-kb", type=float, default=100, help="平均附件大小（KB）")
+    parser.add_argument("--seed", type=int, default=0, help="语料随机种子")
+    parser.add_argument("--json", metavar="文件", help="把结果作为一行 JSON 追加到文件")
+    parser.add_argument("--label", default="", help="写入 JSON 的标签，如改动说明")
+    parser.add_argument("--keep", action="store_true", help="保留临时工作目录以便检查输出")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_pipeline_")
+    save_dir = os.path.join(workdir, "downloaded_attachments")
+    perf_file = os.path.join(workdir, "download_perf.jsonl")
+    log_path = os.path.join(workdir, "pipeline.log")
+
+    print(f"生成 {args.messages} 封合成邮件（平均附件 {args.attachment_kb:.0f} KB）...")
+    messages = build_messages(args.messages, args.attachment_kb, args.seed)
+    server = LocalIMAPServer(user=USER, password=PASSWORD).start()
+    folder = DEFAULT_FOLDER_PREFIX + FOLDER
+    for data in messages:
+        server.store.append(folder, data)
+    corpus_bytes = sum(len(data) for data in messages)
+    print(f"本地 IMAP 服务器 127.0.0.1:{server.port}，邮件总大小 {corpus_bytes / 1024 / 1024:.1f} MB")
+
+    env = dict(os.environ, QQ_EMAIL=USER, QQ_PASSWORD=PASSWORD, TARGET_FOLDER=FOLDER, SAVE_DIR=save_dir,
+               IMAP_HOST="127.0.0.1", IMAP_PORT=str(server.port), IMAP_SSL="0", PYTHONIOENCODING="utf-8")
+    env.pop("TARGET_FOLDERS", None)
+
+    results = []
+    total_start = time.perf_counter()
+    try:
+        with open(log_path, 'w', encoding='utf-8') as log:
+            for name, script, step_args in STEPS:
+                if script == "EnhancedDownloadQQAttachments.py":
+                    step_args = step_args + ["--perf-json", perf_file]
+                print(f"▶ {name}: {script}")
+                seconds, peak_rss, returncode = run_step(script, step_args, env, workdir, log)
+                results.append({"step": name, "script": script, "seconds": seconds,
+                                "peak_rss_bytes": peak_rss, "returncode": returncode})
+                if returncode != 0:
+                    print(f"  ! {script} 返回码 {returncode}，详见 {log_path}")
+    finally:
+        server.stop()
+    total_seconds = time.perf_counter() - total_start
+
+    download_stages = {}
+    if os.path.exists(perf_file):
+        with open(perf_file, 'r', encoding='utf-8') as f:
+            lines = f.read().splitlines()
+        if lines:
+            download_stages = json.loads(lines[-1]).get("stages", {})
+
+    save_dir_bytes = directory_bytes(save_dir)
+    report_bytes = sum(os.path.getsize(os.path.join(workdir, name)) for name in os.listdir(workdir)
+                       if name.endswith('.xlsx') or name.endswith('.state.pkl'))
+
+    print(f"\n--- 端到端基准结果（{args.messages} 封邮件）---")
+    print(f"{'步骤':<10}{'耗时(秒)':>10}{'峰值内存(MB)':>14}{'返回码':>8}")
+    for result in results:
+        rss = f"{result['peak_rss_bytes'] / 1024 / 1024:.1f}" if result["peak_rss_bytes"] else "-"
+        print(f"{result['step']:<10}{result['seconds']:>10.2f}{rss:>14}{result['returncode']:>8}")
+    print(f"总耗时: {total_seconds:.2f} 秒，{args.messages / total_seconds:.1f} 封/秒")
+    print(f"磁盘占用: 下载目录 {save_dir_bytes / 1024 / 1024:.1f} MB，报告 {report_bytes / 1024:.1f} KB")
+
+    if download_stages:
+        print("\n下载器各阶段耗时:")
+        for stage, data in sorted(download_stages.items(), key=lambda item: -item[1]["total_seconds"]):
+            print(f"  {stage:<12}{data['total_seconds']:>9.3f} 秒  p50 {data['p50_seconds'] * 1000:>8.2f} 毫秒  "
+                  f"p95 {data['p95_seconds'] * 1000:>8.2f} 毫秒")
+
+    if args.json:
+        record = {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "label": args.label,
+            "messages": args.messages,
+            "attachment_kb": args.attachment_kb,
+            "corpus_bytes": corpus_bytes,
+            "total_seconds": total_seconds,
+            "steps": results,
+            "download_stages": download_stages,
+            "save_dir_bytes": save_dir_bytes,
+            "report_bytes": report_bytes,
+        }
+        with open(args.json, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        print(f"📈 结果已追加到: {args.json}")
+
+    if args.keep:
+        print(f"工作目录已保留: {workdir}")
+    else:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return 0 if all(result["returncode"] == 0 for result in results) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
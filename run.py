@@ -6,9 +6,19 @@ QQ邮箱自动下载工具 - 快速启动脚本
 
 import os
 import sys
+import argparse
 import subprocess
 
-def main():
+PROFILE_MODES = ("cprofile", "sample", "pyinstrument")
+
+def run_script(script, profile=None):
+    """启动 src 下的脚本，指定 profile 时把 --profile 传给脚本"""
+    command = [sys.executable, script]
+    if profile:
+        command += ["--profile", profile]
+    subprocess.run(command)
+
+def main(profile=None):
     """主菜单"""
     print("=" * 60)
     print("🚀 QQ邮箱自动下载工具 - 增强版 v2.0")
@@ -21,27 +31,28 @@ def main():
     print("4. 🖥️  GUI界面（增强版）")
     print("5. 🧪 运行测试")
     print("6. 📋 查看项目结构")
+    print("7. 🗂️  合并元数据到提交索引")
     print("0. 🚪 退出")
     print()
     
     while True:
         try:
-            choice = input("请输入选项 (0-6): ").strip()
+            choice = input("请输入选项 (0-7): ").strip()
             
             if choice == "0":
                 print("👋 再见！")
                 break
             elif choice == "1":
                 print("📥 启动增强版下载器...")
-                subprocess.run([sys.executable, "src/EnhancedDownloadQQAttachments.py"])
+                run_script("src/EnhancedDownloadQQAttachments.py", profile)
                 break
             elif choice == "2":
                 print("📊 启动按作业分组分析...")
-                subprocess.run([sys.executable, "src/MultiSubmissionAnalyzer.py"])
+                run_script("src/MultiSubmissionAnalyzer.py", profile)
                 break
             elif choice == "3":
                 print("👥 启动按学生分组分析...")
-                subprocess.run([sys.executable, "src/MultiAssignmentAnalyzer.py"])
+                run_script("src/MultiAssignmentAnalyzer.py", profile)
                 break
             elif choice == "4":
                 print("🖥️  启动GUI界面...")
@@ -66,8 +77,12 @@ def main():
 📖 详细说明请查看：项目结构说明.md
                 """)
                 continue
+            elif choice == "7":
+                print("🗂️  合并元数据到提交索引...")
+                run_script("src/ConsolidateMetadata.py", profile)
+                break
             else:
-                print("❌ 无效选项，请重新输入 (0-6)")
+                print("❌ 无效选项，请重新输入 (0-7)")
                 continue
                 
         except KeyboardInterrupt:
@@ -78,4 +93,8 @@ def main():
             break
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="QQ邮箱自动下载工具 - 快速启动脚本")
+    parser.add_argument("--profile", nargs="?", const="cprofile", choices=PROFILE_MODES,
+                        help="对启动的下载 / 分析脚本做性能剖析，结果写入 profiles/")
+    args = parser.parse_args()
+    main(args.profile)
\ No newline at end of file
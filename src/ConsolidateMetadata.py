@@ -0,0 +1,63 @@
+import os
+import sys
+import io
+import time
+import argparse
+from dotenv import load_dotenv
+from submission_index import consolidate_metadata, index_path
+from file_inspect import DEFAULT_WORKERS, backfill_attachment_info
+from profiling import add_profile_argument, start_profiling
+
+# ===========================================
+# 解决 emoji 报错和中文乱码（仅在需要时重定向）
+if hasattr(sys.stdout, 'buffer'):
+    try:
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+    except:
+        pass  # 如果重定向失败，使用默认输出
+# ===========================================
+
+# ================= 配置区域 =================
+# 加载环境变量
+load_dotenv()
+SAVE_DIR = os.getenv('SAVE_DIR', 'downloaded_attachments') # 附件保存的根目录
+# ===========================================
+
+def consolidate(save_dir, full=False, inspect=False, workers=DEFAULT_WORKERS):
+    """
+    把下载目录中分散的 email_metadata.json 合并到 submission_index.db
+
+    Args:
+        inspect: 先为缺少实际类型、页数和哈希的附件补齐这些信息（分块读取磁盘上的附件）
+    """
+    if not os.path.exists(save_dir):
+        print(f"❌ 找不到目录: {save_dir}，请先运行下载程序。")
+        return
+
+    if inspect:
+        print(f"正在检查附件（{workers} 个线程）...")
+        started = time.perf_counter()
+        result = backfill_attachment_info(save_dir, workers)
+        elapsed = time.perf_counter() - started
+        mb = result["bytes"] / 1024 / 1024
+        print(f"   检查了 {result['files']} 个附件（{mb:.1f} MB，{mb / elapsed if elapsed else 0:.1f} MB/秒），"
+              f"更新了 {len(result['updated_folders'])} 个文件夹的元数据")
+
+    print(f"正在合并元数据: {save_dir} ({'全量重建' if full else '增量刷新'}) ...")
+    stats = consolidate_metadata(save_dir, full=full)
+
+    print(f"✅ 合并完成！索引文件: {index_path(save_dir)}")
+    for key, value in stats.items():
+        print(f"   {key}: {value}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="合并已有下载目录中的元数据到提交索引")
+    parser.add_argument("save_dir", nargs="?", default=SAVE_DIR, help="下载目录，默认读取 .env 中的 SAVE_DIR")
+    parser.add_argument("--full", action="store_true", help="忽略修改时间，重新读取所有文件夹")
+    parser.add_argument("--inspect", action="store_true",
+                        help="为旧的下载补齐附件的实际类型、页数和 SHA256（不把大文件整个读入内存）")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="检查附件的线程数")
+    add_profile_argument(parser)
+    args = parser.parse_args()
+    start_profiling(args.profile, "ConsolidateMetadata")
+    consolidate(args.save_dir, full=args.full, inspect=args.inspect, workers=args.workers)
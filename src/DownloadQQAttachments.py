@@ -5,7 +5,12 @@ import os
 import re
 import sys
 import io
+import argparse
 from dotenv import load_dotenv  # 导入dotenv库
+from imap_search import build_search_criteria, describe_criteria, parse_date, search_messages
+from perf_stats import PERF, report as report_perf
+from progress_channel import PROGRESS
+from profiling import add_profile_argument, start_profiling
 
 # ================= 配置加载区域 =================
 # 1. 加载 .env 文件
@@ -52,7 +57,8 @@ def find_real_folder_path(mail, keyword):
     核心功能：遍历所有文件夹，寻找包含关键字的真实路径
     """
     print(f"正在服务器上查找包含 '{keyword}' 的文件夹...")
-    status, folders = mail.list()
+    with PERF.stage("LIST"):
+        status, folders = mail.list()
     
     match_folder = None
     
@@ -74,7 +80,7 @@ def find_real_folder_path(mail, keyword):
     
     return match_folder
 
-def download_attachments():
+def download_attachments(criteria=None):
     print(f"正在连接 QQ 邮箱服务器 (用户: {EMAIL_USER})...")
     try:
         mail = imaplib.IMAP4_SSL("imap.qq.com")
@@ -95,7 +101,8 @@ def download_attachments():
         
         try:
             # 尝试选中该文件夹
-            resp, _ = mail.select(f'"{real_folder_path}"')
+            with PERF.stage("SELECT"):
+                resp, _ = mail.select(f'"{real_folder_path}"')
             if resp != 'OK':
                 print(f"❌ 选中文件夹失败，服务器返回: {resp}")
                 return
@@ -108,26 +115,37 @@ def download_attachments():
         return
 
     # --- 第二步：搜索邮件 ---
-    print(f"正在搜索 '{real_folder_path}' 中的所有邮件...")
-    status, messages = mail.search(None, "ALL")
+    criteria = criteria or []
+    if criteria:
+        print(f"正在搜索 '{real_folder_path}' 中符合条件的邮件: {describe_criteria(criteria)}")
+    else:
+        print(f"正在搜索 '{real_folder_path}' 中的所有邮件...")
+    with PERF.stage("SEARCH"):
+        email_ids = search_messages(mail, criteria)
     
-    if status != "OK" or not messages[0]:
-        print("该文件夹下没有邮件。")
+    if not email_ids:
+        print("该文件夹下没有符合条件的邮件。" if criteria else "该文件夹下没有邮件。")
         return
 
-    email_ids = messages[0].split()
     print(f"共找到 {len(email_ids)} 封邮件。开始下载...")
+    PROGRESS.add_total(len(email_ids))
 
     if not os.path.exists(SAVE_DIR):
         os.makedirs(SAVE_DIR)
 
     # --- 第三步：遍历下载 ---
-    for mail_id in email_ids:
+    for position, mail_id in enumerate(email_ids):
+        if PROGRESS.cancelled.is_set():
+            print(f"⏹ 下载已取消，{len(email_ids) - position} 封邮件未处理")
+            break
         try:
-            _, msg_data = mail.fetch(mail_id, "(RFC822)")
+            with PERF.stage("FETCH") as record:
+                _, msg_data = mail.fetch(mail_id, "(RFC822)")
+                record.bytes = sum(len(part[1]) for part in msg_data if isinstance(part, tuple))
             for response_part in msg_data:
                 if isinstance(response_part, tuple):
-                    msg = email.message_from_bytes(response_part[1])
+                    with PERF.stage("解析MIME", len(response_part[1])):
+                        msg = email.message_from_bytes(response_part[1])
                     subject = decode_str(msg["Subject"])
                     subject = clean_filename(subject)
                     
@@ -155,14 +173,21 @@ def download_attachments():
                             filepath = os.path.join(mail_folder, filename)
                             
                             if not os.path.exists(filepath):
-                                with open(filepath, "wb") as f:
-                                    f.write(part.get_payload(decode=True))
+                                with PERF.stage("解码附件") as record:
+                                    payload = part.get_payload(decode=True) or b""
+                                    record.bytes = len(payload)
+                                with PERF.stage("写入附件", len(payload)):
+                                    with open(filepath, "wb") as f:
+                                        f.write(payload)
                                 print(f"  |-- 下载附件: {filename}")
                             else:
                                 print(f"  |-- 跳过重复: {filename}")
+                    PERF.count_message(len(response_part[1]))
+                    PROGRESS.advance(len(response_part[1]))
                     
         except Exception as e:
             print(f"  ! 处理邮件出错: {e}")
+            PROGRESS.advance(failed=True)
             continue
 
     mail.close()
@@ -170,4 +195,18 @@ def download_attachments():
     print("\n所有任务完成！")
 
 if __name__ == "__main__":
-    download_attachments()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="QQ 邮箱作业附件下载器")
+    parser.add_argument("--since", type=parse_date, help="只下载该日期（含）之后收到的邮件，格式 YYYY-MM-DD")
+    parser.add_argument("--before", type=parse_date, help="只下载该日期（不含）之前收到的邮件，格式 YYYY-MM-DD")
+    parser.add_argument("--from", dest="sender", default="", help="只下载发件人包含该文字的邮件")
+    parser.add_argument("--subject", default="", help="只下载主题包含该文字的邮件（支持中文）")
+    parser.add_argument("--perf-json", metavar="文件", help="把各阶段耗时统计追加写入 JSON Lines 文件，便于对比趋势")
+    parser.add_argument("--progress", action="store_true", help="输出 JSON 进度行，并从标准输入接收取消命令（供 GUI 使用）")
+    add_profile_argument(parser)
+    args = parser.parse_args()
+    start_profiling(args.profile, "DownloadQQAttachments")
+    if args.progress:
+        PROGRESS.enable()
+    download_attachments(build_search_criteria(args.since, args.before, args.sender, args.subject))
+    PROGRESS.finish()
+    report_perf(args.perf_json, label="DownloadQQAttachments")
\ No newline at end of file
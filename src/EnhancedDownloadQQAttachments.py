@@ -5,10 +5,22 @@ import os
 import re
 import sys
 import io
-import json
+import time
+import select
+import argparse
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from dotenv import load_dotenv
 from email_content_parser import extract_email_body, combine_extraction_results, extract_info_from_subject, extract_info_from_body, extract_info_from_sender
+from metadata_store import save_metadata
+from attachment_inspect import inspect_attachment
+from submission_index import open_index
+from imap_search import build_search_criteria, describe_criteria, parse_date, search_messages
+from imap_connection import IMAPConnection, ConnectionPool, CONNECTION_ERRORS
+from perf_stats import PERF, report as report_perf
+from progress_channel import PROGRESS
+from profiling import add_profile_argument, start_profiling
 
 # ================= 配置加载区域 =================
 # 1. 加载 .env 文件
@@ -18,12 +30,20 @@ load_dotenv()
 EMAIL_USER = os.getenv('QQ_EMAIL')
 EMAIL_PASS = os.getenv('QQ_PASSWORD')
 TARGET_FOLDER_KEYWORD = os.getenv('TARGET_FOLDER')
+TARGET_FOLDERS = os.getenv('TARGET_FOLDERS', '') # 批量模式：多个「关键字=保存目录」，用分号分隔，如 25TA=作业/25TA;25XC=作业/25XC
 SAVE_DIR = os.getenv('SAVE_DIR', 'downloaded_attachments') # 如果没填，默认使用后面的值
+IMAP_HOST = os.getenv('IMAP_HOST', 'imap.qq.com')
+IMAP_PORT = int(os.getenv('IMAP_PORT', '993'))
+IMAP_SSL = os.getenv('IMAP_SSL', '1') != '0' # 连接本地替身服务器测试时设为 0
+IDLE_TIMEOUT = int(os.getenv('IDLE_TIMEOUT', '600')) # 监听模式下单次 IDLE 的最长秒数（RFC 建议不超过 29 分钟）
+POLL_INTERVAL = int(os.getenv('POLL_INTERVAL', '60')) # 服务器不支持 IDLE 时的 NOOP 轮询间隔（秒）
+KEEPALIVE_INTERVAL = int(os.getenv('IMAP_KEEPALIVE', '120')) # 会话空闲超过该秒数先发 NOOP 保活
+MAX_RETRIES = int(os.getenv('IMAP_MAX_RETRIES', '5')) # 断线重连 / 失败邮件重试的最大次数
 
 # 3. 检查配置是否读取成功
-if not EMAIL_USER or not EMAIL_PASS or not TARGET_FOLDER_KEYWORD:
+if not EMAIL_USER or not EMAIL_PASS or not (TARGET_FOLDER_KEYWORD or TARGET_FOLDERS):
     print("❌ 错误：未读取到配置信息。")
-    print("请确保你已创建 '.env' 文件，并包含 QQ_EMAIL, QQ_PASSWORD, TARGET_FOLDER 字段。")
+    print("请确保你已创建 '.env' 文件，并包含 QQ_EMAIL, QQ_PASSWORD, TARGET_FOLDER（或 TARGET_FOLDERS）字段。")
     sys.exit(1)
 # ===========================================
 
@@ -67,205 +87,681 @@ def parse_email_date(date_str):
         except:
             return datetime.now()
 
-def find_real_folder_path(mail, keyword):
-    """
-    核心功能：遍历所有文件夹，寻找包含关键字的真实路径
-    """
-    print(f"正在服务器上查找包含 '{keyword}' 的文件夹...")
-    status, folders = mail.list()
+def list_folder_paths(mail):
+    """执行一次 LIST，返回服务器上所有文件夹的真实路径"""
+    with PERF.stage("LIST"):
+        status, folders = mail.list()
+    paths = []
     
-    match_folder = None
-    
-    for f in folders:
+    for f in folders or []:
         try:
             f_str = f.decode('utf-8')
         except:
             f_str = str(f)
-            
-        if keyword in f_str:
-            # 提取双引号中的内容作为真实路径
-            match = re.search(r'"([^"]+)"$', f_str)
-            if match:
-                full_path = match.group(1)
-                # 再次确认 keyword 确实在路径里
-                if keyword in full_path:
-                    match_folder = full_path
-                    break 
+        
+        # 提取双引号中的内容作为真实路径
+        match = re.search(r'"([^"]+)"$', f_str)
+        if match:
+            paths.append(match.group(1))
     
-    return match_folder
+    return paths
 
-def save_metadata(folder_path, metadata):
-    """保存邮件元数据到JSON文件"""
-    metadata_file = os.path.join(folder_path, 'email_metadata.json')
-    try:
-        with open(metadata_file, 'w', encoding='utf-8') as f:
-            json.dump(metadata, f, ensure_ascii=False, indent=2, default=str)
-    except Exception as e:
-        print(f"  ! 保存元数据失败: {e}")
+def match_folder_path(paths, keyword):
+    """在文件夹路径列表中找到第一个包含关键字的路径"""
+    for full_path in paths:
+        if keyword in full_path:
+            return full_path
+    return None
 
-def download_attachments():
-    print(f"正在连接 QQ 邮箱服务器 (用户: {EMAIL_USER})...")
-    try:
-        mail = imaplib.IMAP4_SSL("imap.qq.com")
-        mail.login(EMAIL_USER, EMAIL_PASS)
-        print("登录成功！")
-    except Exception as e:
-        print(f"登录失败: {e}")
-        print("请检查 .env 文件中的账号和授权码是否正确。")
-        return
+def find_real_folder_path(mail, keyword):
+    """
+    核心功能：遍历所有文件夹，寻找包含关键字的真实路径
+    """
+    print(f"正在服务器上查找包含 '{keyword}' 的文件夹...")
+    return match_folder_path(list_folder_paths(mail), keyword)
+
+def find_real_folder_paths(mail, keywords):
+    """
+    批量模式：只执行一次 LIST，为每个关键字找到真实路径（找不到时为 None）
+    """
+    print(f"正在服务器上查找 {len(keywords)} 个文件夹: {', '.join(keywords)} ...")
+    paths = list_folder_paths(mail)
+    return {keyword: match_folder_path(paths, keyword) for keyword in keywords}
 
-    # --- 第一步：自动寻找真实文件夹路径 ---
-    real_folder_path = find_real_folder_path(mail, TARGET_FOLDER_KEYWORD)
+def connect_mailbox():
+    """连接并登录 IMAP 服务器"""
+    if IMAP_SSL:
+        mail = imaplib.IMAP4_SSL(IMAP_HOST, IMAP_PORT)
+    else:
+        mail = imaplib.IMAP4(IMAP_HOST, IMAP_PORT)
+    mail.login(EMAIL_USER, EMAIL_PASS)
+    return mail
+
+def open_connection():
+    """建立带保活和断线重连的会话"""
+    return IMAPConnection(connect_mailbox, keepalive=KEEPALIVE_INTERVAL, max_retries=MAX_RETRIES).open()
+
+def select_target_folder(conn, keyword):
+    """查找并选中目标文件夹，成功时返回真实路径，失败返回 None"""
+    real_folder_path = conn.run(lambda mail: find_real_folder_path(mail, keyword))
     
     if real_folder_path:
         print(f"✅ 找到文件夹！")
-        print(f"   输入关键字: {TARGET_FOLDER_KEYWORD}")
+        print(f"   输入关键字: {keyword}")
         print(f"   真实路径: {real_folder_path}")
         
         try:
-            # 尝试选中该文件夹
-            resp, _ = mail.select(f'"{real_folder_path}"')
-            if resp != 'OK':
-                print(f"❌ 选中文件夹失败，服务器返回: {resp}")
-                return
+            # 尝试选中该文件夹（断线重连后会自动重新选中）
+            with PERF.stage("SELECT"):
+                selected = conn.select(real_folder_path)
+            if not selected:
+                print(f"❌ 选中文件夹失败: {real_folder_path}")
+                return None
         except Exception as e:
             print(f"❌ 选中文件夹出错: {e}")
-            return
+            return None
     else:
-        print(f"❌ 未找到包含 '{TARGET_FOLDER_KEYWORD}' 的文件夹。")
+        print(f"❌ 未找到包含 '{keyword}' 的文件夹。")
         print("请检查 .env 中的 TARGET_FOLDER 设置。")
-        return
+        return None
+    
+    return real_folder_path
+
+def process_message(raw_email, mail_id, save_dir, index):
+    """
+    处理一封邮件：解析学生信息、保存附件和元数据，并写入索引
+    
+    Args:
+        raw_email: 邮件原始字节（RFC822）
+        mail_id: 邮件序号或 UID（字符串）
+
+    Returns:
+        邮件的元数据（附件数量、附件列表等）
+    """
+    with PERF.stage("解析MIME", len(raw_email)):
+        msg = email.message_from_bytes(raw_email)
+    subject = decode_str(msg["Subject"])
+    subject = clean_filename(subject)
+    
+    if not subject: subject = f"无标题邮件_{mail_id}"
 
-    # --- 第二步：搜索邮件 ---
-    print(f"正在搜索 '{real_folder_path}' 中的所有邮件...")
-    status, messages = mail.search(None, "ALL")
+    # 解析邮件日期
+    email_date = parse_email_date(msg["Date"])
+    
+    # 提取邮件正文
+    with PERF.stage("提取正文"):
+        email_body = extract_email_body(msg)
+    
+    # 智能解析学生信息
+    sender_info = decode_str(msg["From"])
+    with PERF.stage("提取学生信息"):
+        subject_result = extract_info_from_subject(subject)
+        body_result = extract_info_from_body(email_body)
+        filename_result = {}  # 暂时没有文件名信息
+        sender_result = extract_info_from_sender(sender_info)
+    
+    # 合并解析结果
+    with PERF.stage("合并解析结果"):
+        student_info = combine_extraction_results(subject_result, body_result, filename_result, sender_result)
     
-    if status != "OK" or not messages[0]:
-        print("该文件夹下没有邮件。")
+    # 如果解析成功，使用解析后的信息作为文件夹名
+    if student_info["confidence"] > 30:  # 置信度阈值
+        # 构建文件夹名，确保有意义
+        parts = []
+        if student_info['student_id']:
+            parts.append(student_info['student_id'])
+        if student_info['name']:
+            parts.append(student_info['name'])
+        if student_info['assignment']:
+            parts.append(student_info['assignment'])
+        
+        if parts:
+            folder_name = "_".join(parts)
+        else:
+            folder_name = subject  # 如果解析结果为空，使用原标题
+        
+        folder_name = clean_filename(folder_name)
+        if not folder_name.strip():
+            folder_name = subject  # 如果清理后为空，使用原标题
+    else:
+        folder_name = subject
+    
+    # 创建邮件同名文件夹
+    mail_folder = os.path.join(save_dir, folder_name)
+    
+    # 准备增强元数据
+    metadata = {
+        "邮件ID": mail_id,
+        "原始主题": subject,
+        "文件夹名称": folder_name,
+        "发件人": sender_info,
+        "收件人": decode_str(msg["To"]),
+        "发送时间": email_date,
+        "接收时间": parse_email_date(msg["Received"]) if msg["Received"] else "",
+        "邮件正文": email_body if email_body else "",  # 完整正文，单独压缩保存
+        "解析信息": student_info,
+        "附件数量": 0,
+        "附件列表": []
+    }
+    
+    # 先创建文件夹（即使没有附件也要创建）
+    print(f"处理邮件: {subject}")
+    if not os.path.exists(mail_folder):
+        os.makedirs(mail_folder)
+    
+    processed_log = False 
+
+    for part in msg.walk():
+        if part.get_content_maintype() == 'multipart': continue
+        if part.get('Content-Disposition') is None: continue
+
+        filename = part.get_filename()
+        if filename:
+            if not processed_log:
+                processed_log = True
+
+            filename = decode_str(filename)
+            filename = clean_filename(filename)
+            filepath = os.path.join(mail_folder, filename)
+            
+            with PERF.stage("解码附件") as record:
+                payload = part.get_payload(decode=True) or b""
+                record.bytes = len(payload)
+            
+            # 保存附件信息到元数据
+            attachment_info = {
+                "文件名": filename,
+                "大小": len(payload),
+                "类型": part.get_content_type(),
+                "创建时间": email_date
+            }
+            # 字节已在内存中，顺便记录实际类型、页数和哈希，分析时无需再读文件
+            with PERF.stage("检测附件类型", len(payload)):
+                attachment_info.update(inspect_attachment(payload))
+            metadata["附件列表"].append(attachment_info)
+            metadata["附件数量"] += 1
+            
+            if not os.path.exists(filepath):
+                with PERF.stage("写入附件", len(payload)):
+                    with open(filepath, "wb") as f:
+                        f.write(payload)
+                print(f"  |-- 下载附件: {filename}")
+            else:
+                print(f"  |-- 跳过重复: {filename}")
+    
+    # 保存元数据文件（总是保存，即使没有附件）
+    with PERF.stage("写入元数据"):
+        save_metadata(mail_folder, metadata)
+    
+    # 同步写入索引数据库
+    try:
+        with PERF.stage("写入索引"):
+            index.record_message(metadata, os.path.getmtime(mail_folder))
+    except Exception as e:
+        print(f"  ! 写入索引失败: {e}")
+    
+    PERF.count_message(len(raw_email))
+    PROGRESS.advance(len(raw_email))
+    return metadata
+
+def fetch_and_process(conn, uid, save_dir, index):
+    """
+    按 UID 下载并处理一封邮件，连接中断时由会话自动重连重试
+
+    Returns:
+        邮件的元数据，服务器没有返回邮件内容时为 None
+    """
+    with PERF.stage("FETCH") as record:
+        _, msg_data = conn.run(lambda mail: mail.uid('FETCH', uid, '(RFC822)'))
+        record.bytes = sum(len(part[1]) for part in msg_data if isinstance(part, tuple))
+    for response_part in msg_data:
+        if isinstance(response_part, tuple):
+            try:
+                return process_message(response_part[1], uid, save_dir, index)
+            except CONNECTION_ERRORS as e:
+                # 磁盘已满等本地写入错误也是 OSError，不能当作连接中断去重连
+                raise RuntimeError(f"保存邮件失败: {e}") from e
+    return None
+
+def download_folder(conn, real_folder_path, save_dir, criteria=None, label=""):
+    """
+    下载当前已选中文件夹中的邮件附件
+
+    使用 UID 搜索和下载，断线重连后 UID 不变；处理失败的邮件在本轮结束后自动重试。
+
+    Args:
+        conn: 已选中文件夹的 IMAPConnection
+        real_folder_path: 已选中的文件夹真实路径（用于日志）
+        save_dir: 附件保存根目录
+        criteria: build_search_criteria 生成的服务器端搜索条件，为空时搜索全部邮件
+        label: 批量模式下的进度前缀，如 "[1/2] 25TA"
+
+    Returns:
+        统计信息：邮件数、成功数、失败数、重试数、附件数、附件字节数、耗时（秒）
+    """
+    started = time.monotonic()
+    stats = {"邮件数": 0, "成功": 0, "失败": 0, "重试": 0, "附件数": 0, "附件字节数": 0, "耗时": 0.0}
+    prefix = f"{label} " if label else ""
+
+    # --- 搜索邮件 ---
+    criteria = criteria or []
+    if criteria:
+        print(f"{prefix}正在搜索 '{real_folder_path}' 中符合条件的邮件: {describe_criteria(criteria)}")
+    else:
+        print(f"{prefix}正在搜索 '{real_folder_path}' 中的所有邮件...")
+    with PERF.stage("SEARCH"):
+        uids = [uid.decode() for uid in conn.run(lambda mail: search_messages(mail, criteria, uid=True))]
+    
+    if not uids:
+        print("该文件夹下没有符合条件的邮件。" if criteria else "该文件夹下没有邮件。")
+        return stats
+
+    stats["邮件数"] = len(uids)
+    print(f"{prefix}共找到 {len(uids)} 封邮件。开始下载...")
+    PROGRESS.add_total(len(uids))
+
+    if not os.path.exists(save_dir):
+        os.makedirs(save_dir)
+
+    # 打开（或创建）提交索引数据库
+    index = open_index(save_dir, create=True)
+
+    # --- 遍历下载，失败的 UID 在下一轮重试 ---
+    pending = uids
+    disconnected = False
+    for attempt in range(MAX_RETRIES + 1):
+        if attempt:
+            print(f"{prefix}🔁 第 {attempt} 次重试 {len(pending)} 封失败的邮件...")
+            stats["重试"] += len(pending)
+        failed = []
+        for position, uid in enumerate(pending, 1):
+            if PROGRESS.cancelled.is_set():
+                stats["已取消"] = len(pending) - position + 1
+                break
+            if label:
+                print(f"{prefix}({position}/{len(pending)})")
+            try:
+                metadata = fetch_and_process(conn, uid, save_dir, index)
+                if metadata is None:
+                    raise ValueError("服务器没有返回邮件内容")
+                stats["成功"] += 1
+                stats["附件数"] += metadata["附件数量"]
+                stats["附件字节数"] += sum(item["大小"] for item in metadata["附件列表"])
+            except CONNECTION_ERRORS as e:
+                # conn.run 已用完重连次数，连接不可用：剩余邮件直接记为失败，不再逐封重试
+                print(f"{prefix}❌ 连接中断且重连失败: {e}")
+                failed.extend(pending[position - 1:])
+                disconnected = True
+                break
+            except Exception as e:
+                print(f"  ! 处理邮件出错 (UID {uid}): {e}")
+                failed.append(uid)
+        pending = failed
+        if not pending or disconnected or PROGRESS.cancelled.is_set():
+            break
+
+    stats["失败"] = len(pending)
+    if stats.get("已取消"):
+        print(f"{prefix}⏹ 下载已取消，{stats['已取消']} 封邮件未处理")
+    if pending:
+        reason = "连接中断，未完成" if disconnected else "重试后仍失败"
+        print(f"{prefix}❌ {reason}的邮件 UID: {', '.join(pending)}")
+        PROGRESS.advance(count=len(pending), failed=True)
+
+    index.close()
+    print(f"🗂️ 提交索引已更新: {index.path}")
+    stats["耗时"] = time.monotonic() - started
+    return stats
+
+def download_attachments(criteria=None):
+    """
+    下载目标文件夹中的邮件附件
+
+    Args:
+        criteria: build_search_criteria 生成的服务器端搜索条件，为空时搜索全部邮件
+    """
+    print(f"正在连接 QQ 邮箱服务器 (用户: {EMAIL_USER})...")
+    try:
+        conn = open_connection()
+        print("登录成功！")
+    except Exception as e:
+        print(f"登录失败: {e}")
+        print("请检查 .env 文件中的账号和授权码是否正确。")
         return
 
-    email_ids = messages[0].split()
-    print(f"共找到 {len(email_ids)} 封邮件。开始下载...")
+    try:
+        # --- 第一步：自动寻找真实文件夹路径 ---
+        real_folder_path = select_target_folder(conn, TARGET_FOLDER_KEYWORD)
+        if not real_folder_path:
+            return
+
+        # --- 第二步：搜索并下载 ---
+        download_folder(conn, real_folder_path, SAVE_DIR, criteria)
+    finally:
+        conn.close()
+    print("\n所有任务完成！")
+    print("💾 已为每个邮件文件夹创建了元数据文件 (email_metadata.json，正文单独压缩保存)")
+
+# ================= 批量模式 =================
+
+def parse_batch_targets(specs):
+    """
+    解析批量下载目标
+
+    每项为「关键字=保存目录」或只有关键字（保存到 SAVE_DIR/关键字）。
 
-    if not os.path.exists(SAVE_DIR):
-        os.makedirs(SAVE_DIR)
+    Returns:
+        [(关键字, 保存目录)]
+    """
+    targets = []
+    for spec in specs:
+        spec = spec.strip()
+        if not spec:
+            continue
+        keyword, _, save_dir = spec.partition('=')
+        keyword = keyword.strip()
+        targets.append((keyword, save_dir.strip() or os.path.join(SAVE_DIR, keyword)))
+    return targets
+
+def batch_download(targets, criteria=None, connections=1):
+    """
+    批量模式：一次 LIST 找到所有文件夹，通过会话池下载多个文件夹
+
+    Args:
+        targets: [(文件夹关键字, 保存目录)]
+        criteria: 对所有文件夹生效的服务器端搜索条件
+        connections: 会话池大小，大于 1 时多个文件夹并发下载
+
+    每个文件夹使用独立的保存目录和提交索引，最后输出各文件夹的统计。
+    """
+    print(f"正在连接 QQ 邮箱服务器 (用户: {EMAIL_USER})...")
+    pool = ConnectionPool(connect_mailbox, size=min(connections, len(targets)),
+                          keepalive=KEEPALIVE_INTERVAL, max_retries=MAX_RETRIES)
+    try:
+        with pool.session() as conn:
+            print("登录成功！")
+            keywords = [keyword for keyword, _ in targets]
+            real_paths = conn.run(lambda mail: find_real_folder_paths(mail, keywords))
+    except Exception as e:
+        print(f"登录失败: {e}")
+        print("请检查 .env 文件中的账号和授权码是否正确。")
+        pool.close()
+        return
+
+    def run_target(position, keyword, save_dir):
+        label = f"[{position}/{len(targets)}] {keyword}"
+        real_folder_path = real_paths.get(keyword)
+        if PROGRESS.cancelled.is_set():
+            return "已取消"
+        print(f"\n📂 {label} → {save_dir}")
+        if not real_folder_path:
+            print(f"❌ 未找到包含 '{keyword}' 的文件夹，跳过。")
+            return "未找到文件夹"
 
-    # --- 第三步：遍历下载 ---
-    for mail_id in email_ids:
         try:
-            _, msg_data = mail.fetch(mail_id, "(RFC822)")
-            for response_part in msg_data:
-                if isinstance(response_part, tuple):
-                    msg = email.message_from_bytes(response_part[1])
-                    subject = decode_str(msg["Subject"])
-                    subject = clean_filename(subject)
-                    
-                    if not subject: subject = f"无标题邮件_{mail_id.decode()}"
-
-                    # 解析邮件日期
-                    email_date = parse_email_date(msg["Date"])
-                    
-                    # 提取邮件正文
-                    email_body = extract_email_body(msg)
-                    
-                    # 智能解析学生信息
-                    sender_info = decode_str(msg["From"])
-                    subject_result = extract_info_from_subject(subject)
-                    body_result = extract_info_from_body(email_body)
-                    filename_result = {}  # 暂时没有文件名信息
-                    sender_result = extract_info_from_sender(sender_info)
-                    
-                    # 合并解析结果
-                    student_info = combine_extraction_results(subject_result, body_result, filename_result, sender_result)
-                    
-                    # 如果解析成功，使用解析后的信息作为文件夹名
-                    if student_info["confidence"] > 30:  # 置信度阈值
-                        # 构建文件夹名，确保有意义
-                        parts = []
-                        if student_info['student_id']:
-                            parts.append(student_info['student_id'])
-                        if student_info['name']:
-                            parts.append(student_info['name'])
-                        if student_info['assignment']:
-                            parts.append(student_info['assignment'])
-                        
-                        if parts:
-                            folder_name = "_".join(parts)
-                        else:
-                            folder_name = subject  # 如果解析结果为空，使用原标题
-                        
-                        folder_name = clean_filename(folder_name)
-                        if not folder_name.strip():
-                            folder_name = subject  # 如果清理后为空，使用原标题
-                    else:
-                        folder_name = subject
-                    
-                    # 创建邮件同名文件夹
-                    mail_folder = os.path.join(SAVE_DIR, folder_name)
-                    
-                    # 准备增强元数据
-                    metadata = {
-                        "邮件ID": mail_id.decode(),
-                        "原始主题": subject,
-                        "文件夹名称": folder_name,
-                        "发件人": sender_info,
-                        "收件人": decode_str(msg["To"]),
-                        "发送时间": email_date.isoformat(),
-                        "接收时间": parse_email_date(msg["Received"]).isoformat() if msg["Received"] else "",
-                        "邮件正文": email_body if email_body else "",  # 保存完整正文
-                        "解析信息": student_info,
-                        "附件数量": 0,
-                        "附件列表": []
-                    }
-                    
-                    # 先创建文件夹（即使没有附件也要创建）
-                    print(f"处理邮件: {subject}")
-                    if not os.path.exists(mail_folder):
-                        os.makedirs(mail_folder)
-                    
-                    processed_log = False 
-
-                    for part in msg.walk():
-                        if part.get_content_maintype() == 'multipart': continue
-                        if part.get('Content-Disposition') is None: continue
-
-                        filename = part.get_filename()
-                        if filename:
-                            if not processed_log:
-                                processed_log = True
-
-                            filename = decode_str(filename)
-                            filename = clean_filename(filename)
-                            filepath = os.path.join(mail_folder, filename)
-                            
-                            # 保存附件信息到元数据
-                            attachment_info = {
-                                "文件名": filename,
-                                "大小": len(part.get_payload(decode=True)),
-                                "类型": part.get_content_type(),
-                                "创建时间": email_date.isoformat()
-                            }
-                            metadata["附件列表"].append(attachment_info)
-                            metadata["附件数量"] += 1
-                            
-                            if not os.path.exists(filepath):
-                                with open(filepath, "wb") as f:
-                                    f.write(part.get_payload(decode=True))
-                                print(f"  |-- 下载附件: {filename}")
-                            else:
-                                print(f"  |-- 跳过重复: {filename}")
-                    
-                    # 保存元数据文件（总是保存，即使没有附件）
-                    save_metadata(mail_folder, metadata)
-                    
+            with pool.session() as conn:
+                with PERF.stage("SELECT"):
+                    selected = conn.select(real_folder_path)
+                if not selected:
+                    print(f"❌ 选中文件夹失败: {real_folder_path}")
+                    return "选中文件夹失败"
+                stats = download_folder(conn, real_folder_path, save_dir, criteria, label)
+        except CONNECTION_ERRORS as e:
+            print(f"❌ {label} 连接中断且重连失败: {e}")
+            return "连接中断"
         except Exception as e:
-            print(f"  ! 处理邮件出错: {e}")
-            continue
+            print(f"❌ {label} 处理文件夹出错: {e}")
+            return "处理出错"
+
+        print(f"✅ {label} 完成：{stats['成功']}/{stats['邮件数']} 封邮件，{stats['附件数']} 个附件，耗时 {stats['耗时']:.1f} 秒")
+        return stats
+
+    with ThreadPoolExecutor(max_workers=pool.size) as executor:
+        futures = [executor.submit(run_target, position, keyword, save_dir)
+                   for position, (keyword, save_dir) in enumerate(targets, 1)]
+        summary = [(keyword, save_dir, future.result()) for (keyword, save_dir), future in zip(targets, futures)]
+    pool.close()
 
-    mail.close()
-    mail.logout()
+    print("\n--- 批量下载统计 ---")
+    for keyword, save_dir, stats in summary:
+        if isinstance(stats, str):
+            print(f"  {keyword:<12} ❌ {stats}  → {save_dir}")
+        else:
+            print(f"  {keyword:<12} 邮件 {stats['邮件数']:>4}  成功 {stats['成功']:>4}  失败 {stats['失败']:>3}  "
+                  f"附件 {stats['附件数']:>4}  {stats['附件字节数'] / 1024 / 1024:>7.1f} MB  "
+                  f"{stats['耗时']:>6.1f} 秒  → {save_dir}")
     print("\n所有任务完成！")
-    print("💾 已为每个邮件文件夹创建了元数据文件 (email_metadata.json)")
+
+# ================= 监听模式 =================
+
+def wait_for_new_mail(mail, timeout):
+    """
+    进入 IMAP IDLE 等待服务器推送新邮件通知
+
+    Python 3.11 的 imaplib 没有 IDLE 接口，这里直接收发原始命令。
+    在 timeout 秒内收到 EXISTS 通知或超时后发送 DONE 结束 IDLE。
+
+    Returns:
+        是否收到了新邮件通知
+    """
+    tag = mail._new_tag()
+    mail.send(tag + b' IDLE\r\n')
+    response = mail.readline()
+    if not response.startswith(b'+'):
+        raise imaplib.IMAP4.error(f"服务器拒绝 IDLE: {response!r}")
+
+    sock = mail.socket()
+    got_new_mail = False
+    deadline = time.monotonic() + timeout
+    while not got_new_mail:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        # SSL 连接可能已有解密后未读取的数据
+        pending = getattr(sock, 'pending', lambda: 0)()
+        if not pending:
+            readable, _, _ = select.select([sock], [], [], remaining)
+            if not readable:
+                break
+        line = mail.readline()
+        if not line:
+            raise imaplib.IMAP4.abort("IDLE 期间连接被关闭")
+        if b'EXISTS' in line:
+            got_new_mail = True
+
+    mail.send(b'DONE\r\n')
+    while True:
+        line = mail.readline()
+        if not line:
+            raise imaplib.IMAP4.abort("结束 IDLE 时连接被关闭")
+        if line.startswith(tag):
+            break
+        if b'EXISTS' in line:
+            got_new_mail = True
+    return got_new_mail
+
+def fetch_new_messages(conn, last_uid, save_dir, index, criteria=None, failures=None):
+    """
+    下载 UID 大于 last_uid 的邮件
+
+    处理出错的邮件不会被越过：本轮在它处停下，下一轮从它开始重试；
+    同一封邮件失败超过 MAX_RETRIES 次后才放弃并继续处理后面的邮件。
+
+    Args:
+        criteria: 额外的服务器端搜索条件，只下载符合条件的新邮件
+        failures: {UID: 失败次数}，在多轮之间保留
+
+    Returns:
+        (已处理完的最大 UID, 本次处理的邮件数)
+    """
+    failures = {} if failures is None else failures
+    with PERF.stage("SEARCH"):
+        found = conn.run(lambda mail: search_messages(mail, [("UID", f"{last_uid + 1}:*")] + (criteria or []), uid=True))
+    if not found:
+        return last_uid, 0
+
+    # 「UID n:*」在没有新邮件时也会返回最后一封，需要再过滤一次
+    uids = sorted(int(uid) for uid in found if int(uid) > last_uid)
+    processed = 0
+    for uid in uids:
+        try:
+            if fetch_and_process(conn, str(uid), save_dir, index) is None:
+                raise ValueError("服务器没有返回邮件内容")
+            processed += 1
+            failures.pop(uid, None)
+        except CONNECTION_ERRORS:
+            raise
+        except Exception as e:
+            failures[uid] = failures.get(uid, 0) + 1
+            print(f"  ! 处理邮件出错 (UID {uid}): {e}")
+            if failures[uid] <= MAX_RETRIES:
+                print(f"  🔁 UID {uid} 将在下一轮重试（第 {failures[uid]}/{MAX_RETRIES} 次）")
+                break
+            print(f"  ❌ UID {uid} 重试 {MAX_RETRIES} 次后仍失败，跳过")
+            failures.pop(uid)
+        last_uid = uid
+    return last_uid, processed
+
+def read_uidvalidity(conn, folder):
+    """重新 SELECT 文件夹并返回其 UIDVALIDITY"""
+    def select(mail):
+        status, _ = mail.select(f'"{folder}"')
+        if status != 'OK':
+            raise imaplib.IMAP4.error(f"选中文件夹失败: {folder}")
+        _, data = mail.response('UIDVALIDITY')
+        return int(data[0]) if data and data[0] else 0
+    return conn.run(select)
+
+def resync_uidvalidity(conn, index, folder, uidvalidity, last_uid):
+    """
+    重连后检查 UIDVALIDITY：文件夹被重建时旧的 UID 不再有效，需要从头同步
+
+    Returns:
+        (当前 UIDVALIDITY, 应继续处理的起始 UID)
+    """
+    current = read_uidvalidity(conn, folder)
+    if current == uidvalidity:
+        return uidvalidity, last_uid
+    print(f"⚠️ 文件夹 UIDVALIDITY 已变化（{uidvalidity} → {current}），重新同步全部邮件")
+    return current, index.get_last_uid(folder, current)
+
+def update_reports():
+    """新邮件入库后重新生成分析报告"""
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    for script, args in (("MultiSubmissionAnalyzer.py", []), ("MultiAssignmentAnalyzer.py", ["--incremental"])):
+        print(f"📊 更新报告: {script}")
+        result = subprocess.run([sys.executable, os.path.join(script_dir, script)] + args)
+        if result.returncode != 0:
+            print(f"  ! {script} 运行失败，返回码: {result.returncode}")
+
+def watch_mailbox(idle_timeout=IDLE_TIMEOUT, poll_interval=POLL_INTERVAL, reports=True, criteria=None):
+    """
+    监听模式：保持一个会话，通过 IMAP IDLE（不支持时退回 NOOP 轮询）持续接收新邮件
+
+    已处理的最大 UID 记录在提交索引中，重新启动后只下载新邮件；
+    重连后文件夹的 UIDVALIDITY 变化时从头同步。处理失败的邮件会在之后几轮重试。
+    指定 criteria 时只下载符合条件的新邮件。
+    """
+    print(f"正在连接 QQ 邮箱服务器 (用户: {EMAIL_USER})...")
+    try:
+        conn = open_connection()
+        print("登录成功！")
+    except Exception as e:
+        print(f"登录失败: {e}")
+        print("请检查 .env 文件中的账号和授权码是否正确。")
+        return
+
+    real_folder_path = select_target_folder(conn, TARGET_FOLDER_KEYWORD)
+    if not real_folder_path:
+        conn.close()
+        return
+
+    index = open_index(SAVE_DIR, create=True)
+    uidvalidity = read_uidvalidity(conn, real_folder_path)
+    last_uid = index.get_last_uid(real_folder_path, uidvalidity)
+    failures = {}
+    reconnects = conn.reconnects
+
+    use_idle = 'IDLE' in conn.mail.capabilities
+    mode = f"IMAP IDLE（每 {idle_timeout} 秒续期）" if use_idle else f"NOOP 轮询（每 {poll_interval} 秒）"
+    print(f"👀 进入监听模式: {mode}，已处理到 UID {last_uid}，按 Ctrl+C 退出")
+
+    try:
+        while True:
+            try:
+                if conn.reconnects != reconnects:
+                    # 会话重连过（包括 conn.run 内部的自动重连），确认 UID 空间没有变化
+                    reconnects = conn.reconnects
+                    uidvalidity, last_uid = resync_uidvalidity(conn, index, real_folder_path, uidvalidity, last_uid)
+                    failures.clear()
+
+                last_uid, processed = fetch_new_messages(conn, last_uid, SAVE_DIR, index, criteria, failures)
+                index.set_last_uid(real_folder_path, uidvalidity, last_uid)
+                if processed:
+                    print(f"📥 本轮新增 {processed} 封邮件（{datetime.now().strftime('%H:%M:%S')}）")
+                    if reports:
+                        update_reports()
+
+                # 有待重试的邮件时不进入 IDLE，按轮询间隔尽快重试
+                if use_idle and not failures:
+                    try:
+                        wait_for_new_mail(conn.mail, idle_timeout)
+                        continue
+                    except CONNECTION_ERRORS:
+                        raise
+                    except imaplib.IMAP4.error as e:
+                        print(f"⚠️ IDLE 不可用，改为 NOOP 轮询: {e}")
+                        use_idle = False
+                time.sleep(poll_interval)
+                conn.run(lambda mail: mail.noop())
+            except CONNECTION_ERRORS as e:
+                # 断线后重新登录并选中文件夹，下一轮先核对 UIDVALIDITY 再从已记录的 UID 继续
+                print(f"⚠️ 监听连接中断: {e}，正在重连...")
+                conn.reconnect()
+    except KeyboardInterrupt:
+        print("\n👋 已退出监听模式")
+    finally:
+        index.close()
+        conn.close()
 
 if __name__ == "__main__":
-    download_attachments()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="QQ 邮箱作业附件增强下载器")
+    parser.add_argument("--watch", action="store_true", help="监听模式：持续接收新邮件并更新报告")
+    parser.add_argument("--idle-timeout", type=int, default=IDLE_TIMEOUT, help="单次 IDLE 的最长秒数")
+    parser.add_argument("--poll-interval", type=int, default=POLL_INTERVAL, help="不支持 IDLE 时的轮询间隔（秒）")
+    parser.add_argument("--no-reports", action="store_true", help="监听模式下收到新邮件后不更新报告")
+    parser.add_argument("--since", type=parse_date, help="只下载该日期（含）之后收到的邮件，格式 YYYY-MM-DD")
+    parser.add_argument("--before", type=parse_date, help="只下载该日期（不含）之前收到的邮件，格式 YYYY-MM-DD")
+    parser.add_argument("--from", dest="sender", default="", help="只下载发件人包含该文字的邮件")
+    parser.add_argument("--subject", default="", help="只下载主题包含该文字的邮件（支持中文）")
+    parser.add_argument("--batch", nargs="*", metavar="关键字[=保存目录]",
+                        help="批量模式：一次登录下载多个文件夹，不写目标时读取 .env 中的 TARGET_FOLDERS")
+    parser.add_argument("--connections", type=int, default=1, help="批量模式的会话池大小，大于 1 时多个文件夹并发下载")
+    parser.add_argument("--perf-json", metavar="文件", help="把各阶段耗时统计追加写入 JSON Lines 文件，便于对比趋势")
+    parser.add_argument("--progress", action="store_true", help="输出 JSON 进度行，并从标准输入接收取消命令（供 GUI 使用）")
+    add_profile_argument(parser)
+    args = parser.parse_args()
+    start_profiling(args.profile, "EnhancedDownloadQQAttachments")
+    if args.progress:
+        PROGRESS.enable()
+    criteria = build_search_criteria(args.since, args.before, args.sender, args.subject)
+
+    # 只配置了 TARGET_FOLDERS 时默认使用批量模式
+    if args.batch is None and not TARGET_FOLDER_KEYWORD and not args.watch:
+        args.batch = []
+
+    if args.batch is not None:
+        targets = parse_batch_targets(args.batch or TARGET_FOLDERS.replace(',', ';').split(';'))
+        if not targets:
+            print("❌ 未指定批量下载的文件夹，请在命令行或 .env 的 TARGET_FOLDERS 中填写。")
+            sys.exit(1)
+        batch_download(targets, criteria, args.connections)
+    elif args.watch:
+        if not TARGET_FOLDER_KEYWORD:
+            print("❌ 监听模式只监听一个文件夹，请在 .env 中填写 TARGET_FOLDER。")
+            sys.exit(1)
+        watch_mailbox(args.idle_timeout, args.poll_interval, reports=not args.no_reports, criteria=criteria)
+    else:
+        download_attachments(criteria)
+    PROGRESS.finish()
+    report_perf(args.perf_json, label="EnhancedDownloadQQAttachments")
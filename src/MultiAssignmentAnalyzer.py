@@ -1,12 +1,17 @@
 import os
-import re
 import pandas as pd
 from dotenv import load_dotenv
 import sys
 import io
+import argparse
 from datetime import datetime
-import numpy as np
-from smart_student_info_parser import smart_parse_folder_name, extract_assignment_name, get_folder_modification_time, get_submission_files_info
+from smart_student_info_parser import smart_parse_folder_name, extract_assignment_name, get_folder_modification_time
+from submission_index import iter_submission_records
+from incremental_report import load_state, save_state, write_sheets_incremental
+from student_roster import load_roster, roster_fingerprint
+from completion_matrix import CompletionMatrix
+from archive_inspect import summarize_archives
+from profiling import add_profile_argument, start_profiling
 
 # ===========================================
 # 解决 emoji 报错和中文乱码（仅在需要时重定向）
@@ -22,14 +27,16 @@ if hasattr(sys.stdout, 'buffer'):
 load_dotenv()
 SAVE_DIR = os.getenv('SAVE_DIR', 'downloaded_attachments') # 附件保存的根目录
 OUTPUT_FILE = '作业完成分析_按学生分组.xlsx'
+ROSTER_FILE = os.getenv('ROSTER_FILE', '') # 可选：学生名册（CSV / xlsx，包含学号和姓名两列）
+STATE_VERSION = 5  # 增量状态格式版本，结构变化时递增使旧状态失效
 # ===========================================
 
-def parse_folder_name(folder_name, folder_path=None):
+def parse_folder_name(folder_name, folder_path=None, files=None, metadata=None):
     """
     智能解析文件夹名称，优先使用邮件元数据
     """
     if folder_path:
-        return smart_parse_folder_name(folder_path, folder_name)
+        return smart_parse_folder_name(folder_path, folder_name, files, metadata)
     else:
         # 如果没有提供路径，使用传统解析方法
         from smart_student_info_parser import traditional_parse_folder_name
@@ -39,232 +46,386 @@ def parse_folder_name(folder_name, folder_path=None):
 
 # get_folder_modification_time 函数已从 smart_student_info_parser 导入
 
-def analyze_by_student():
+def build_submission(record, roster=None):
     """
-    按学生分组分析多个作业的完成情况
+    解析一条提交记录，返回报告使用的提交信息
+
+    Args:
+        roster: 学生名册，提供时把学号和姓名对齐到名册中最接近的学生
     """
-    if not os.path.exists(SAVE_DIR):
-        print(f"❌ 找不到目录: {SAVE_DIR}，请先运行下载程序。")
-        return
+    folder = record["folder"]
+    folder_path = record["folder_path"]
+    
+    # 解析文件夹名字
+    parsed_info = parse_folder_name(folder, folder_path, record["files"], record["metadata"])
+    
+    # 统计文件信息
+    files = record["files"]
+    
+    student_id, name = parsed_info["student_id"], parsed_info["name"]
+    extra = {}
+    if roster is not None:
+        entry, method = roster.match(student_id, name)
+        if entry is not None:
+            student_id, name = entry.student_id, entry.name
+        extra["名册匹配"] = method
+    
+    return {
+        "文件夹": folder,
+        "文件夹原名": parsed_info["original_text"],
+        "学号": student_id,
+        "姓名": name,
+        "作业名称": extract_assignment_name(parsed_info["assignment"]),
+        "作业备注": parsed_info["assignment"],
+        "提交时间": get_folder_modification_time(folder_path, record["metadata"]),
+        "附件数量": len(files),
+        "附件列表": "; ".join(files),
+        "压缩包内容": summarize_archives(folder_path, files),
+        **extra
+    }
 
-    print(f"正在扫描目录: {SAVE_DIR} ...")
+def new_state(roster=None):
+    """
+    空的分析状态
+
+    folders      文件夹 -> 指纹和解析结果
+    作业引用      作业名称 -> 提交该作业的文件夹数（决定作业列表）
+    候选         (学生, 作业) -> {文件夹: 提交}，同一学生同一作业的所有提交
+    有效提交      (学生, 作业) -> 计入报告的提交（提交时间最晚的一份）
+    students     学生 -> 学号、姓名、已交作业集合、总文件数
+    assignments  作业 -> 提交学生集合、总文件数、提交时间和、最早/最晚提交
+    rows         学生详细报告按行缓存的内容，只重算受影响的行
+    roster       名册文件标识，名册变化时需要全量重算
+    名册         名册中的学生标识 -> (学号, 姓名)，没有名册时为 None
+    """
+    return {
+        "version": STATE_VERSION,
+        "roster": roster_fingerprint(roster.source) if roster is not None else None,
+        "名册": {entry.key: (entry.student_id, entry.name) for entry in roster.entries} if roster is not None else None,
+        "folders": {},
+        "作业引用": {},
+        "候选": {},
+        "有效提交": {},
+        "students": {},
+        "assignments": {},
+        "all_assignments": [],
+        "rows": {"detail": {}},
+        "sheets": None,
+    }
+
+def _apply_submission(state, student_key, assignment, submission, sign):
+    """把一份有效提交计入（sign=1）或移出（sign=-1）学生和作业的聚合结果"""
+    students = state["students"]
+    assignments = state["assignments"]
+    student = students.setdefault(student_key, {
+        '学号': submission['学号'], '姓名': submission['姓名'], '作业': set(), '总文件数': 0
+    })
+    stats = assignments.setdefault(assignment, {
+        '学生': set(), '总文件数': 0, '时间和': 0.0, '最早': None, '最晚': None, '需重算': False
+    })
+    submit_time = submission['提交时间']
     
-    # 收集所有数据
-    all_submissions = []
+    if sign > 0:
+        student['作业'].add(assignment)
+        stats['学生'].add(student_key)
+        if not stats['需重算']:
+            stats['最早'] = submit_time if stats['最早'] is None else min(stats['最早'], submit_time)
+            stats['最晚'] = submit_time if stats['最晚'] is None else max(stats['最晚'], submit_time)
+    else:
+        student['作业'].discard(assignment)
+        stats['学生'].discard(student_key)
+        # 移除的正好是最早或最晚提交时，需要在该作业内重新计算
+        if submit_time in (stats['最早'], stats['最晚']):
+            stats['需重算'] = True
     
-    # 遍历根目录下的所有文件夹
-    for folder in os.listdir(SAVE_DIR):
-        folder_path = os.path.join(SAVE_DIR, folder)
-        
-        if os.path.isdir(folder_path):
-            # 解析文件夹名字
-            parsed_info = parse_folder_name(folder, folder_path)
-            
-            # 统计文件信息
-            files = os.listdir(folder_path)
-            file_count = len(files)
-            file_names = "; ".join(files)
-            
-            # 获取提交时间
-            submit_time = get_folder_modification_time(folder_path)
-            
-            # 提取标准化作业名称
-            assignment_name = extract_assignment_name(parsed_info["assignment"])
-            
-            submission = {
-                "文件夹原名": parsed_info["original_text"],
-                "学号": parsed_info["student_id"],
-                "姓名": parsed_info["name"],
-                "作业名称": assignment_name,
-                "作业备注": parsed_info["assignment"],
-                "提交时间": submit_time,
-                "附件数量": file_count,
-                "附件列表": file_names
-            }
-            
-            all_submissions.append(submission)
+    student['总文件数'] += sign * submission['附件数量']
+    stats['总文件数'] += sign * submission['附件数量']
+    stats['时间和'] += sign * submit_time.timestamp()
     
-    if not all_submissions:
-        print("没有找到任何记录。")
+    if not student['作业']:
+        del students[student_key]
+    if not stats['学生']:
+        del assignments[assignment]
+
+def _update_candidate(state, submission, folder, new_submission, dirty):
+    """更新某个学生某个作业的候选提交，有效提交变化时应用增量"""
+    student_key = f"{submission['学号']}_{submission['姓名']}"
+    cell_key = (student_key, submission['作业名称'])
+    candidates = state["候选"].setdefault(cell_key, {})
+    if new_submission is None:
+        candidates.pop(folder, None)
+    else:
+        candidates[folder] = new_submission
+    
+    old_winner = state["有效提交"].get(cell_key)
+    new_winner = max(candidates.values(), key=lambda s: (s['提交时间'], s['文件夹'])) if candidates else None
+    if not candidates:
+        del state["候选"][cell_key]
+    if old_winner is new_winner:
         return
     
-    print(f"扫描完成，共 {len(all_submissions)} 条提交记录。")
+    if old_winner is not None:
+        _apply_submission(state, student_key, cell_key[1], old_winner, -1)
+        del state["有效提交"][cell_key]
+    if new_winner is not None:
+        _apply_submission(state, student_key, cell_key[1], new_winner, 1)
+        state["有效提交"][cell_key] = new_winner
     
-    # 获取所有作业列表
-    all_assignments = list(set(sub['作业名称'] for sub in all_submissions))
-    all_assignments.sort()
+    dirty["students"].add(student_key)
+    dirty["assignments"].add(cell_key[1])
+    dirty["cells"].add(cell_key)
+
+def _add_folder(state, folder, fingerprint, submission, dirty):
+    state["folders"][folder] = {"fingerprint": fingerprint, "submission": submission}
+    refs = state["作业引用"]
+    refs[submission['作业名称']] = refs.get(submission['作业名称'], 0) + 1
+    if submission['学号']:  # 没有学号的提交只影响作业列表
+        _update_candidate(state, submission, folder, submission, dirty)
+
+def _remove_folder(state, folder, dirty):
+    submission = state["folders"].pop(folder)["submission"]
+    refs = state["作业引用"]
+    refs[submission['作业名称']] -= 1
+    if refs[submission['作业名称']] == 0:
+        del refs[submission['作业名称']]
+    if submission['学号']:
+        _update_candidate(state, submission, folder, None, dirty)
+
+def refresh_state(state, roster=None):
+    """
+    扫描下载目录，只解析新增或有变化的文件夹，并把变化应用到聚合结果
+
+    Returns:
+        (变化统计, 受影响的学生/作业/单元格)
+    """
+    dirty = {"students": set(), "assignments": set(), "cells": set()}
+    counts = {"新增": 0, "更新": 0, "删除": 0, "未变化": 0}
+    seen = set()
     
-    # 按学生分组
-    student_groups = {}
-    for submission in all_submissions:
-        student_id = submission['学号']
-        student_name = submission['姓名']
-        
-        if not student_id:  # 如果没有学号，跳过
+    # 遍历所有提交记录（优先查询索引数据库）
+    for record in iter_submission_records(SAVE_DIR):
+        folder = record["folder"]
+        seen.add(folder)
+        previous = state["folders"].get(folder)
+        if previous is not None and previous["fingerprint"] == record["fingerprint"]:
+            counts["未变化"] += 1
             continue
-            
-        student_key = f"{student_id}_{student_name}"
-        if student_key not in student_groups:
-            student_groups[student_key] = {
-                '学号': student_id,
-                '姓名': student_name,
-                '作业': {}
-            }
         
-        student_groups[student_key]['作业'][submission['作业名称']] = submission
+        submission = build_submission(record, roster)
+        if previous is not None:
+            _remove_folder(state, folder, dirty)
+            counts["更新"] += 1
+        else:
+            counts["新增"] += 1
+        _add_folder(state, folder, record["fingerprint"], submission, dirty)
     
-    print(f"发现 {len(student_groups)} 名学生，{len(all_assignments)} 个作业")
+    for folder in set(state["folders"]) - seen:
+        _remove_folder(state, folder, dirty)
+        counts["删除"] += 1
     
-    # 创建Excel写入器
-    with pd.ExcelWriter(OUTPUT_FILE, engine='openpyxl') as writer:
-        
-        # 1. 创建学生作业完成矩阵
-        matrix_data = []
-        for student_key, student_data in student_groups.items():
-            row = {
-                '学号': student_data['学号'],
-                '姓名': student_data['姓名']
-            }
-            
-            completed_count = 0
-            total_files = 0
-            
-            for assignment in all_assignments:
-                if assignment in student_data['作业']:
-                    submission = student_data['作业'][assignment]
-                    row[assignment] = f"✓ ({submission['附件数量']}文件)"
-                    completed_count += 1
-                    total_files += submission['附件数量']
-                else:
-                    row[assignment] = "✗ 未交"
-            
-            row['完成作业数'] = completed_count
-            row['总作业数'] = len(all_assignments)
-            row['完成率'] = f"{completed_count/len(all_assignments)*100:.1f}%"
-            row['总文件数'] = total_files
-            
-            matrix_data.append(row)
-        
-        # 按学号排序
-        matrix_df = pd.DataFrame(matrix_data)
-        matrix_df = matrix_df.sort_values('学号')
-        matrix_df.to_excel(writer, sheet_name='作业完成矩阵', index=False)
-        
-        # 2. 创建学生详细报告
-        detailed_data = []
-        for student_key, student_data in student_groups.items():
-            for assignment_name, submission in student_data['作业'].items():
-                detailed_data.append({
-                    '学号': student_data['学号'],
-                    '姓名': student_data['姓名'],
-                    '作业名称': assignment_name,
-                    '提交时间': submission['提交时间'].strftime('%Y-%m-%d %H:%M:%S'),
-                    '附件数量': submission['附件数量'],
-                    '附件列表': submission['附件列表'],
-                    '文件夹原名': submission['文件夹原名'],
-                    '作业备注': submission['作业备注']
-                })
-        
-        detailed_df = pd.DataFrame(detailed_data)
-        detailed_df = detailed_df.sort_values(['学号', '作业名称'])
-        detailed_df.to_excel(writer, sheet_name='学生详细报告', index=False)
-        
-        # 3. 创建作业统计报告
-        assignment_stats = []
-        for assignment in all_assignments:
-            submitted_students = 0
-            total_files = 0
-            submission_times = []
-            
-            for student_data in student_groups.values():
-                if assignment in student_data['作业']:
-                    submitted_students += 1
-                    submission = student_data['作业'][assignment]
-                    total_files += submission['附件数量']
-                    submission_times.append(submission['提交时间'])
-            
-            total_students = len(student_groups)
-            completion_rate = submitted_students / total_students * 100 if total_students > 0 else 0
-            avg_files = total_files / submitted_students if submitted_students > 0 else 0
-            
-            # 计算提交时间统计
-            if submission_times:
-                earliest = min(submission_times)
-                latest = max(submission_times)
-                avg_time = datetime.fromtimestamp(sum(t.timestamp() for t in submission_times) / len(submission_times))
-            else:
-                earliest = latest = avg_time = None
-            
-            assignment_stats.append({
-                '作业名称': assignment,
-                '应交人数': total_students,
-                '实交人数': submitted_students,
-                '完成率': f"{completion_rate:.1f}%",
-                '缺交人数': total_students - submitted_students,
-                '总文件数': total_files,
-                '平均文件数': f"{avg_files:.1f}",
-                '最早提交': earliest.strftime('%Y-%m-%d %H:%M') if earliest else '-',
-                '最晚提交': latest.strftime('%Y-%m-%d %H:%M') if latest else '-',
-                '平均提交时间': avg_time.strftime('%Y-%m-%d %H:%M') if avg_time else '-'
-            })
-        
-        stats_df = pd.DataFrame(assignment_stats)
-        stats_df = stats_df.sort_values('作业名称')
-        stats_df.to_excel(writer, sheet_name='作业统计报告', index=False)
-        
-        # 4. 创建缺交学生名单
-        missing_data = []
-        for student_key, student_data in student_groups.items():
-            missing_assignments = []
-            for assignment in all_assignments:
-                if assignment not in student_data['作业']:
-                    missing_assignments.append(assignment)
-            
-            if missing_assignments:  # 只显示有缺交的学生
-                missing_data.append({
-                    '学号': student_data['学号'],
-                    '姓名': student_data['姓名'],
-                    '缺交作业数': len(missing_assignments),
-                    '缺交作业列表': '; '.join(missing_assignments),
-                    '完成率': f"{(len(all_assignments) - len(missing_assignments))/len(all_assignments)*100:.1f}%"
-                })
-        
-        if missing_data:
-            missing_df = pd.DataFrame(missing_data)
-            missing_df = missing_df.sort_values(['缺交作业数', '学号'], ascending=[False, True])
-            missing_df.to_excel(writer, sheet_name='缺交学生名单', index=False)
-        
-        # 5. 创建班级整体统计
-        total_students = len(student_groups)
-        total_assignments = len(all_assignments)
-        total_possible_submissions = total_students * total_assignments
-        total_actual_submissions = sum(len(student_data['作业']) for student_data in student_groups.values())
+    # 最早/最晚提交被移除的作业，只在该作业的有效提交内重新计算
+    for assignment, stats in state["assignments"].items():
+        if stats['需重算']:
+            times = [state["有效提交"][(student_key, assignment)]['提交时间'] for student_key in stats['学生']]
+            stats['最早'], stats['最晚'], stats['需重算'] = min(times), max(times), False
+    
+    return counts, dirty
+
+def _detail_row(state, cell_key):
+    submission = state["有效提交"][cell_key]
+    student = state["students"][cell_key[0]]
+    row = {
+        '学号': student['学号'],
+        '姓名': student['姓名'],
+        '作业名称': cell_key[1],
+        '提交时间': submission['提交时间'].strftime('%Y-%m-%d %H:%M:%S'),
+        '附件数量': submission['附件数量'],
+        '附件列表': submission['附件列表'],
+        '压缩包内容': submission['压缩包内容'],
+        '文件夹原名': submission['文件夹原名'],
+        '作业备注': submission['作业备注']
+    }
+    if '名册匹配' in submission:
+        row['名册匹配'] = submission['名册匹配']
+    return row
+
+def _stats_frame(state, matrix):
+    """作业统计报告：应交、实交人数来自完成矩阵，文件数和提交时间来自增量维护的作业聚合"""
+    total_students = matrix.expected_count()
+    submitted = matrix.submitted_per_assignment()
+    rows = []
+    for assignment, submitted_students in zip(matrix.assignments, submitted.tolist()):
+        stats = state["assignments"].get(assignment)
+        total_files = stats['总文件数'] if stats else 0
+        completion_rate = submitted_students / total_students * 100 if total_students > 0 else 0
+        # 文件数和提交时间按该作业的全部有效提交平均（名册外的提交也计入了总文件数和时间和）
+        avg_files = total_files / len(stats['学生']) if stats else 0
         
-        overall_stats = {
-            '统计项': ['学生总数', '作业总数', '应提交总数', '实际提交总数', '整体完成率', '平均每学生完成作业数'],
-            '数值': [
-                total_students,
-                total_assignments,
-                total_possible_submissions,
-                total_actual_submissions,
-                f"{total_actual_submissions/total_possible_submissions*100:.1f}%" if total_possible_submissions > 0 else "0%",
-                f"{total_actual_submissions/total_students:.1f}" if total_students > 0 else "0"
-            ]
-        }
+        # 提交时间统计直接取自增量维护的最早/最晚提交和时间和
+        if stats:
+            earliest = stats['最早']
+            latest = stats['最晚']
+            avg_time = datetime.fromtimestamp(stats['时间和'] / len(stats['学生']))
+        else:
+            earliest = latest = avg_time = None
         
-        overall_df = pd.DataFrame(overall_stats)
-        overall_df.to_excel(writer, sheet_name='班级整体统计', index=False)
+        rows.append({
+            '作业名称': assignment,
+            '应交人数': total_students,
+            '实交人数': submitted_students,
+            '完成率': f"{completion_rate:.1f}%",
+            '缺交人数': total_students - submitted_students,
+            '总文件数': total_files,
+            '平均文件数': f"{avg_files:.1f}",
+            '最早提交': earliest.strftime('%Y-%m-%d %H:%M') if earliest else '-',
+            '最晚提交': latest.strftime('%Y-%m-%d %H:%M') if latest else '-',
+            '平均提交时间': avg_time.strftime('%Y-%m-%d %H:%M') if avg_time else '-'
+        })
+    stats_columns = ['作业名称', '应交人数', '实交人数', '完成率', '缺交人数', '总文件数',
+                     '平均文件数', '最早提交', '最晚提交', '平均提交时间']
+    return pd.DataFrame(rows, columns=stats_columns)
+
+def _update_rows(rows, keys, build):
+    """重算指定键的行，build 返回 None 或键已不存在时删除该行"""
+    for key in keys:
+        row = build(key)
+        if row is None:
+            rows.pop(key, None)
+        else:
+            rows[key] = row
+
+def update_report_rows(state, dirty):
+    """
+    只重算学生详细报告中受影响的行
+
+    完成矩阵、缺交名单和作业统计每次由 CompletionMatrix 向量化生成，不再逐行缓存。
+    """
+    state["all_assignments"] = sorted(state["作业引用"])
+    _update_rows(state["rows"]["detail"], dirty["cells"],
+                 lambda key: _detail_row(state, key) if key in state["有效提交"] else None)
+
+def build_sheets(state):
+    """由完成矩阵和缓存的详细报告行组装各工作表"""
+    all_assignments = state["all_assignments"]
+    rows = state["rows"]
+    matrix = CompletionMatrix.from_state(state)
+    sheets = {}
+    
+    # 1. 学生作业完成矩阵（按学号排序）
+    sheets['作业完成矩阵'] = matrix.matrix_frame()
+    
+    # 2. 学生详细报告
+    detail_columns = ['学号', '姓名', '作业名称', '提交时间', '附件数量', '附件列表', '压缩包内容', '文件夹原名', '作业备注']
+    if state["名册"] is not None:
+        detail_columns.append('名册匹配')
+    detailed_df = pd.DataFrame([rows["detail"][key] for key in sorted(rows["detail"])], columns=detail_columns)
+    sheets['学生详细报告'] = detailed_df.sort_values(['学号', '作业名称'], kind='stable')
+    
+    # 3. 作业统计报告
+    sheets['作业统计报告'] = _stats_frame(state, matrix)
+    
+    # 4. 缺交学生名单（没有缺交时不生成该工作表）
+    missing_df = matrix.missing_frame()
+    if not missing_df.empty:
+        sheets['缺交学生名单'] = missing_df
+    
+    # 5. 班级整体统计（有名册时只统计名册中的学生）
+    total_assignments = len(all_assignments)
+    total_students = matrix.expected_count()
+    total_actual_submissions = int(matrix.submitted_per_assignment().sum())
+    total_possible_submissions = total_students * total_assignments
+    
+    overall_stats = {
+        '统计项': ['学生总数', '作业总数', '应提交总数', '实际提交总数', '整体完成率', '平均每学生完成作业数'],
+        '数值': [
+            total_students,
+            total_assignments,
+            total_possible_submissions,
+            total_actual_submissions,
+            f"{total_actual_submissions/total_possible_submissions*100:.1f}%" if total_possible_submissions > 0 else "0%",
+            f"{total_actual_submissions/total_students:.1f}" if total_students > 0 else "0"
+        ]
+    }
+    sheets['班级整体统计'] = pd.DataFrame(overall_stats)
+    return sheets
+
+def analyze_by_student(incremental=False, roster_file=ROSTER_FILE):
+    """
+    按学生分组分析多个作业的完成情况
+
+    Args:
+        incremental: 增量模式。沿用上一次运行保存的聚合结果，只重新解析新增或有变化的文件夹，
+                     并且只改写报告中受影响的行和工作表；没有可用的上一次状态时自动全量分析。
+        roster_file: 学生名册文件，提供时提交会对齐到名册中的学生，应交人数为名册人数
+    """
+    if not os.path.exists(SAVE_DIR):
+        print(f"❌ 找不到目录: {SAVE_DIR}，请先运行下载程序。")
+        return
+    
+    roster = None
+    if roster_file:
+        if not os.path.exists(roster_file):
+            print(f"❌ 找不到名册文件: {roster_file}")
+            return
+        roster = load_roster(roster_file)
+        print(f"📋 已加载名册: {roster_file}（{len(roster)} 名学生）")
+    
+    state = load_state(OUTPUT_FILE, STATE_VERSION) if incremental else None
+    if incremental and state is None:
+        print("没有可用的上一次分析结果，执行全量分析。")
+    elif state is not None and state["roster"] != (roster_fingerprint(roster_file) if roster else None):
+        print("名册已变化，执行全量分析。")
+        state = None
+    if state is None:
+        state = new_state(roster)
+    
+    print(f"正在扫描目录: {SAVE_DIR} ...")
+    counts, dirty = refresh_state(state, roster)
+    
+    if not state["folders"]:
+        print("没有找到任何记录。")
+        return
+    
+    print(f"扫描完成，共 {len(state['folders'])} 条提交记录。")
+    if incremental:
+        print("   " + "，".join(f"{key} {value}" for key, value in counts.items()))
+    
+    update_report_rows(state, dirty)
+    all_assignments = state["all_assignments"]
+    print(f"发现 {len(state['students'])} 名学生，{len(all_assignments)} 个作业")
+    if roster is not None:
+        methods = {}
+        for folder in state["folders"].values():
+            method = folder["submission"].get("名册匹配", "不在名册中")
+            methods[method] = methods.get(method, 0) + 1
+        print("📋 名册匹配: " + "，".join(f"{method} {count}" for method, count in sorted(methods.items(), key=lambda item: -item[1])))
+    
+    sheets = build_sheets(state)
+    actions = write_sheets_incremental(OUTPUT_FILE, sheets, state["sheets"])
+    state["sheets"] = sheets
+    save_state(OUTPUT_FILE, state)
     
     print(f"✅ 分析完成！文件已保存为: {OUTPUT_FILE}")
-    print(f"📊 共分析了 {len(student_groups)} 名学生，{len(all_assignments)} 个作业")
-    print(f"📝 包含工作表：作业完成矩阵、学生详细报告、作业统计报告、缺交学生名单、班级整体统计")
+    print(f"📊 共分析了 {len(state['students'])} 名学生，{len(all_assignments)} 个作业")
+    print("📝 包含工作表：作业完成矩阵、学生详细报告、作业统计报告、缺交学生名单、班级整体统计")
+    if incremental:
+        for name, action in actions.items():
+            print(f"   {name}: {action}")
     
     # 打印预览
     print("\n--- 班级整体统计预览 ---")
-    print(overall_df.to_string(index=False))
+    print(sheets['班级整体统计'].to_string(index=False))
     
     print("\n--- 作业统计预览 ---")
-    print(stats_df[['作业名称', '应交人数', '实交人数', '完成率', '缺交人数']].to_string(index=False))
+    print(sheets['作业统计报告'][['作业名称', '应交人数', '实交人数', '完成率', '缺交人数']].to_string(index=False))
 
 if __name__ == "__main__":
-    analyze_by_student()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="按学生分组分析多个作业的完成情况")
+    parser.add_argument("--incremental", action="store_true",
+                        help="增量模式：只处理有变化的文件夹，只改写受影响的行")
+    parser.add_argument("--roster", default=ROSTER_FILE, metavar="文件",
+                        help="学生名册（CSV / xlsx，学号和姓名两列），默认读取 .env 中的 ROSTER_FILE")
+    add_profile_argument(parser)
+    args = parser.parse_args()
+    start_profiling(args.profile, "MultiAssignmentAnalyzer")
+    analyze_by_student(incremental=args.incremental, roster_file=args.roster)
@@ -1,12 +1,17 @@
 import os
-import re
 import pandas as pd
 from dotenv import load_dotenv
 import sys
 import io
+import argparse
 from datetime import datetime
 import glob
-from smart_student_info_parser import smart_parse_folder_name, extract_assignment_name, get_folder_modification_time, get_submission_files_info
+from smart_student_info_parser import smart_parse_folder_name, extract_assignment_name, get_folder_modification_time, get_submission_files_info, get_email_metadata
+from submission_index import iter_submission_records
+from folder_clusters import cluster_records
+from archive_inspect import summarize_archives
+from near_duplicates import PDF_SUPPORTED, SignatureIndex, attachment_items, find_similar_attachments, template_hashes
+from profiling import add_profile_argument, start_profiling
 
 # ===========================================
 # 解决 emoji 报错和中文乱码（仅在需要时重定向）
@@ -22,14 +27,16 @@ if hasattr(sys.stdout, 'buffer'):
 load_dotenv()
 SAVE_DIR = os.getenv('SAVE_DIR', 'downloaded_attachments') # 附件保存的根目录
 OUTPUT_FILE = '作业提交分析_按作业分组.xlsx'
+SIMILARITY_THRESHOLD = float(os.getenv('SIMILARITY_THRESHOLD', '0.6')) # 估计相似度不低于该值时写入报告
+SIMILARITY_TEMPLATES = [path.strip() for path in os.getenv('SIMILARITY_TEMPLATES', '').split(';') if path.strip()] # 作业模板文件，用分号分隔
 # ===========================================
 
-def parse_folder_name(folder_name, folder_path=None):
+def parse_folder_name(folder_name, folder_path=None, files=None, metadata=None):
     """
     智能解析文件夹名称，优先使用邮件元数据
     """
     if folder_path:
-        return smart_parse_folder_name(folder_path, folder_name)
+        return smart_parse_folder_name(folder_path, folder_name, files, metadata)
     else:
         # 如果没有提供路径，使用传统解析方法
         from smart_student_info_parser import traditional_parse_folder_name
@@ -62,9 +69,48 @@ def classify_submission_status(submissions):
     
     return statuses
 
-def analyze_by_assignment():
+def find_similar_submissions(latest_by_assignment, templates=()):
+    """
+    在每个作业内查找正文相似的附件对
+
+    Args:
+        latest_by_assignment: 作业名称 -> 各学生的最新提交
+        templates: 作业模板文件，其内容不计入相似度
+    """
+    print(f"正在检测相似提交（阈值 {SIMILARITY_THRESHOLD:.0%}）...")
+    if templates:
+        print(f"   排除 {len(templates)} 个作业模板中的内容: {', '.join(os.path.basename(path) for path in templates)}")
+    index = SignatureIndex(SAVE_DIR, template_hashes(templates) if templates else None)
+    rows = []
+    try:
+        for assignment_name, submissions in sorted(latest_by_assignment.items()):
+            items = [item for submission in submissions for item in attachment_items(submission)]
+            for a, b, similarity in find_similar_attachments(items, index, SIMILARITY_THRESHOLD, label=f"{assignment_name}: "):
+                rows.append({
+                    "作业名称": assignment_name,
+                    "学号A": a["submission"]['学号'],
+                    "姓名A": a["submission"]['姓名'],
+                    "附件A": a["file"],
+                    "学号B": b["submission"]['学号'],
+                    "姓名B": b["submission"]['姓名'],
+                    "附件B": b["file"],
+                    "估计相似度": f"{similarity:.1%}"
+                })
+    finally:
+        index.close()
+    print(f"   签名缓存命中 {index.cached}，新计算 {index.computed}，发现 {len(rows)} 对相似附件")
+    if not PDF_SUPPORTED:
+        print("   ⚠️ 未安装 pypdf，PDF 附件未参与相似度检测（pip install pypdf）")
+    columns = ["作业名称", "学号A", "姓名A", "附件A", "学号B", "姓名B", "附件B", "估计相似度"]
+    return pd.DataFrame(rows, columns=columns)
+
+def analyze_by_assignment(check_similarity=True, templates=()):
     """
     按作业分组分析多次提交情况
+
+    Args:
+        check_similarity: 是否检测同一作业中正文相似的附件（写入「疑似相似提交」工作表）
+        templates: 作业模板文件，其内容不计入相似度
     """
     if not os.path.exists(SAVE_DIR):
         print(f"❌ 找不到目录: {SAVE_DIR}，请先运行下载程序。")
@@ -78,50 +124,61 @@ def analyze_by_assignment():
     # 用于检测重复文件夹的字典
     folder_groups = {}
     
-    # 遍历根目录下的所有文件夹
-    for folder in os.listdir(SAVE_DIR):
-        folder_path = os.path.join(SAVE_DIR, folder)
+    # 遍历所有提交记录（优先查询索引数据库），先只读取元数据和提交时间
+    records = []
+    for record in iter_submission_records(SAVE_DIR):
+        if record["metadata"] is None:
+            record["metadata"] = get_email_metadata(record["folder_path"])
+        record["submit_time"] = get_folder_modification_time(record["folder_path"], record["metadata"])
+        records.append(record)
+    
+    # 按归一化文件夹名（去掉 (1) 后缀、Re/回复 前缀、全半角和空白差异）和发件人聚类，
+    # 每组只解析最新的文件夹
+    clusters = cluster_records(records)
+    print(f"共 {len(records)} 个文件夹，归并为 {len(clusters)} 组")
+    
+    for cluster in clusters:
+        record = cluster[-1]
+        folder = record["folder"]
+        folder_path = record["folder_path"]
         
-        if os.path.isdir(folder_path):
-            # 解析文件夹名字
-            parsed_info = parse_folder_name(folder, folder_path)
-            
-            # 统计文件信息
-            files = os.listdir(folder_path)
-            file_count = len(files)
-            file_names = "; ".join(files)
-            
-            # 获取提交时间
-            submit_time = get_folder_modification_time(folder_path)
-            
-            # 提取标准化作业名称
-            assignment_name = extract_assignment_name(parsed_info["assignment"])
-            
-            # 创建唯一标识符（学号+姓名+作业名）
-            unique_key = f"{parsed_info['student_id']}_{parsed_info['name']}_{assignment_name}"
-            
-            # 检测重复文件夹（处理带(1)、(2)后缀的情况）
-            base_folder = re.sub(r'[（(]\d+[）)]$', '', folder)  # 移除末尾的(1)、（2）等
-            
-            if unique_key not in folder_groups:
-                folder_groups[unique_key] = []
-            
-            folder_groups[unique_key].append({
-                "文件夹原名": parsed_info["original_text"],
-                "学号": parsed_info["student_id"],
-                "姓名": parsed_info["name"],
-                "作业名称": assignment_name,
-                "作业备注": parsed_info["assignment"],
-                "提交时间": submit_time,
-                "附件数量": file_count,
-                "附件列表": file_names,
-                "文件夹路径": folder_path,
-                "原始文件夹名": folder
-            })
+        # 解析文件夹名字
+        parsed_info = parse_folder_name(folder, folder_path, record["files"], record["metadata"])
+        
+        # 统计文件信息
+        files = record["files"]
+        file_count = len(files)
+        file_names = "; ".join(files)
+        
+        # 提取标准化作业名称
+        assignment_name = extract_assignment_name(parsed_info["assignment"])
+        
+        # 创建唯一标识符（学号+姓名+作业名），文件夹名差异较大的重复提交解析后再按它合并
+        unique_key = f"{parsed_info['student_id']}_{parsed_info['name']}_{assignment_name}"
+        
+        if unique_key not in folder_groups:
+            folder_groups[unique_key] = []
+        
+        folder_groups[unique_key].append({
+            "文件夹原名": parsed_info["original_text"],
+            "学号": parsed_info["student_id"],
+            "姓名": parsed_info["name"],
+            "作业名称": assignment_name,
+            "作业备注": parsed_info["assignment"],
+            "提交时间": record["submit_time"],
+            "附件数量": file_count,
+            "附件列表": file_names,
+            "附件文件": files,
+            "压缩包内容": summarize_archives(folder_path, files),
+            "文件夹路径": folder_path,
+            "原始文件夹名": folder,
+            "同组文件夹": cluster
+        })
     
     # 处理重复文件夹，只保留最新版本
     for unique_key, submissions in folder_groups.items():
-        if len(submissions) == 1:
+        merged = [record for sub in submissions for record in sub.pop("同组文件夹")]
+        if len(merged) == 1:
             # 没有重复，直接添加
             all_submissions.append(submissions[0])
         else:
@@ -130,12 +187,12 @@ def analyze_by_assignment():
             latest = submissions[-1]
             
             # 标记为重复文件夹
-            latest["文件夹原名"] = f"{latest['原始文件夹名']} (合并自{len(submissions)}个重复文件夹)"
+            latest["文件夹原名"] = f"{latest['原始文件夹名']} (合并自{len(merged)}个重复文件夹)"
             all_submissions.append(latest)
             
             print(f"🔄 合并重复文件夹: {unique_key}")
-            for sub in submissions:
-                print(f"   - {sub['原始文件夹名']} ({sub['提交时间']})")
+            for record in sorted(merged, key=lambda x: x['submit_time']):
+                print(f"   - {record['folder']} ({record['submit_time']})")
             print(f"   ✅ 选择: {latest['原始文件夹名']} ({latest['提交时间']})")
     
     if not all_submissions:
@@ -157,6 +214,7 @@ def analyze_by_assignment():
         
         # 创建汇总表 - 只保留每个学生的最新提交
         summary_data = []
+        latest_by_assignment = {}
         for assignment_name, submissions in assignment_groups.items():
             # 按学号分组，统计每个学生的提交次数
             student_submissions = {}
@@ -173,6 +231,7 @@ def analyze_by_assignment():
                 # 只保留最新提交
                 latest_submission = student_subs[-1]
                 total_submissions = len(student_subs)
+                latest_by_assignment.setdefault(assignment_name, []).append(latest_submission)
                 
                 # 确定提交状态
                 if total_submissions == 1:
@@ -193,6 +252,7 @@ def analyze_by_assignment():
                     "提交状态": status,
                     "提交时间": latest_submission['提交时间'].strftime('%Y-%m-%d %H:%M:%S'),
                     "附件数量": latest_submission['附件数量'],
+                    "压缩包内容": latest_submission['压缩包内容'],
                     "文件夹": latest_submission['文件夹原名']
                 })
         
@@ -203,13 +263,20 @@ def analyze_by_assignment():
             summary_df.to_excel(writer, sheet_name='汇总表', index=False)
         else:
             # 创建空表
-            pd.DataFrame(columns=['作业名称', '学号', '姓名', '提交状态', '提交时间', '附件数量', '文件夹']).to_excel(writer, sheet_name='汇总表', index=False)
+            pd.DataFrame(columns=['作业名称', '学号', '姓名', '提交状态', '提交时间', '附件数量', '压缩包内容', '文件夹']).to_excel(writer, sheet_name='汇总表', index=False)
         
+        # 相似提交：同一作业中不同学生的附件正文高度相似（可能互相抄袭后少量修改）
+        if check_similarity:
+            similar_df = find_similar_submissions(latest_by_assignment, templates)
+            similar_df.to_excel(writer, sheet_name='疑似相似提交', index=False)
 
     
     print(f"✅ 分析完成！文件已保存为: {OUTPUT_FILE}")
     print(f"📊 共分析了 {len(assignment_groups)} 个作业")
-    print(f"📝 只包含汇总表")
+    if check_similarity:
+        print(f"📝 包含工作表：汇总表、疑似相似提交（{len(similar_df)} 对）")
+    else:
+        print(f"📝 只包含汇总表")
     
     # 打印预览
     if summary_data:
@@ -218,4 +285,12 @@ def analyze_by_assignment():
         print(summary_df[['作业名称', '姓名', '学号', '提交状态']].head(10).to_string(index=False))
 
 if __name__ == "__main__":
-    analyze_by_assignment()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="按作业分组分析提交情况")
+    parser.add_argument("--no-similarity", action="store_true",
+                        help="跳过相似提交检测（不提取附件正文）")
+    parser.add_argument("--template", nargs="+", default=SIMILARITY_TEMPLATES, metavar="文件",
+                        help="作业模板文件（docx / txt 等），其中的内容不计入相似度；默认读取 .env 中的 SIMILARITY_TEMPLATES")
+    add_profile_argument(parser)
+    args = parser.parse_args()
+    start_profiling(args.profile, "MultiSubmissionAnalyzer")
+    analyze_by_assignment(check_similarity=not args.no_similarity, templates=args.template)
\ No newline at end of file
@@ -4,6 +4,10 @@ import pandas as pd
 from dotenv import load_dotenv
 import sys
 import io
+import argparse
+from profiling import add_profile_argument, start_profiling
+from archive_inspect import summarize_archives
+from submission_index import list_attachment_files
 
 # ===========================================
 # 强制将标准输出设置为 utf-8，解决 emoji 报错和中文乱码
@@ -81,8 +85,8 @@ def generate_report():
             # 1. 解析文件夹名字
             parsed_info = parse_folder_name(folder)
             
-            # 2. 统计里面的文件
-            files = os.listdir(folder_path)
+            # 2. 统计里面的附件（不含邮件元数据和正文文件）
+            files = list_attachment_files(folder_path)
             file_count = len(files)
             file_names = "; ".join(files) # 把所有文件名拼在一起
             
@@ -94,6 +98,7 @@ def generate_report():
                 "作业备注/其他信息": parsed_info["assignment"],
                 "附件数量": file_count,
                 "附件列表": file_names,
+                "压缩包内容": summarize_archives(folder_path, files),
                 "状态": "正常" if file_count > 0 else "无附件"
             }
             data_list.append(entry)
@@ -123,4 +128,8 @@ def generate_report():
         print("请确保你没有在其他软件中打开该 Excel 文件。")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="统计每个提交文件夹的附件详情")
+    add_profile_argument(parser)
+    args = parser.parse_args()
+    start_profiling(args.profile, "StatisticsAttachmentDetails")
     generate_report()
\ No newline at end of file
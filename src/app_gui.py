@@ -10,25 +10,10 @@ import email
 from email.header import decode_header
 import pandas as pd
 from dotenv import load_dotenv
-
-# ================= 工具类：重定向输出到UI =================
-class IORedirector(object):
-    """把 print 的内容重定向到 Text 控件中"""
-    def __init__(self, text_area):
-        self.text_area = text_area
-
-    def write(self, str_val):
-        # 在主线程更新UI
-        self.text_area.after(0, self._insert_text, str_val)
-
-    def _insert_text(self, str_val):
-        self.text_area.configure(state='normal')
-        self.text_area.insert(tk.END, str_val)
-        self.text_area.see(tk.END) # 自动滚动到底部
-        self.text_area.configure(state='disabled')
-
-    def flush(self):
-        pass
+from imap_search import build_search_criteria, describe_criteria, parse_date, search_messages
+from gui_log import IORedirector
+from archive_inspect import summarize_archives
+from submission_index import list_attachment_files
 
 # ================= 主程序逻辑类 =================
 class QQMailApp:
@@ -46,6 +31,14 @@ class QQMailApp:
             "SAVE_DIR": tk.StringVar(value=os.getenv("SAVE_DIR", "downloaded_attachments"))
         }
 
+        # 服务器端搜索条件（留空表示不限）
+        self.search_filters = {
+            "since": tk.StringVar(),
+            "before": tk.StringVar(),
+            "sender": tk.StringVar(),
+            "subject": tk.StringVar()
+        }
+
         self._init_ui()
 
     def _init_ui(self):
@@ -78,6 +71,14 @@ class QQMailApp:
         action_frame = ttk.LabelFrame(self.root, text="🚀 执行操作", padding=10)
         action_frame.pack(fill="x", padx=10, pady=5)
 
+        # 搜索条件：交给 IMAP 服务器过滤，只下载相关邮件
+        filter_frame = ttk.Frame(action_frame)
+        filter_frame.pack(side="top", fill="x", pady=(0, 5))
+        for text, key, width in (("起始日期:", "since", 11), ("截止日期:", "before", 11),
+                                 ("发件人:", "sender", 14), ("主题包含:", "subject", 14)):
+            ttk.Label(filter_frame, text=text).pack(side="left", padx=2)
+            ttk.Entry(filter_frame, textvariable=self.search_filters[key], width=width).pack(side="left", padx=2)
+
         self.btn_download = ttk.Button(action_frame, text="📥 开始下载附件", command=self.start_download_thread)
         self.btn_download.pack(side="left", expand=True, fill="x", padx=10)
 
@@ -92,8 +93,7 @@ class QQMailApp:
         self.log_text.pack(fill="both", expand=True)
 
         # 重定向输出
-        sys.stdout = IORedirector(self.log_text)
-        sys.stderr = IORedirector(self.log_text)
+        sys.stdout = sys.stderr = IORedirector(self.log_text)
 
     def browse_folder(self):
         folder = filedialog.askdirectory()
@@ -134,6 +134,19 @@ class QQMailApp:
                 print("❌ 请先填写完整配置信息！")
                 return
 
+            try:
+                since = self.search_filters["since"].get().strip()
+                before = self.search_filters["before"].get().strip()
+                criteria = build_search_criteria(
+                    parse_date(since) if since else None,
+                    parse_date(before) if before else None,
+                    self.search_filters["sender"].get(),
+                    self.search_filters["subject"].get()
+                )
+            except ValueError:
+                print("❌ 日期格式错误，请使用 YYYY-MM-DD，例如 2025-09-01")
+                return
+
             print(f"\n--- 开始任务: 连接邮箱 {user} ---")
             mail = imaplib.IMAP4_SSL("imap.qq.com")
             mail.login(user, pwd)
@@ -158,13 +171,14 @@ class QQMailApp:
             print(f"✅ 锁定目标文件夹: {real_path}")
             mail.select(f'"{real_path}"')
 
-            status, messages = mail.search(None, "ALL")
-            if status != "OK" or not messages[0]:
-                print("该文件夹下没有邮件。")
+            if criteria:
+                print(f"搜索条件: {describe_criteria(criteria)}")
+            email_ids = search_messages(mail, criteria)
+            if not email_ids:
+                print("该文件夹下没有符合条件的邮件。" if criteria else "该文件夹下没有邮件。")
                 mail.logout()
                 return
 
-            email_ids = messages[0].split()
             print(f"共发现 {len(email_ids)} 封邮件。开始处理...")
 
             if not os.path.exists(save_dir):
@@ -253,14 +267,15 @@ class QQMailApp:
                 
                 info["other"] = re.sub(r'\s+', ' ', clean_text).strip()
                 
-                files = os.listdir(folder_path)
+                files = list_attachment_files(folder_path)
                 data_list.append({
                     "文件夹原名": folder,
                     "学号": info["id"],
                     "姓名": info["name"],
                     "作业备注": info["other"],
                     "附件数": len(files),
-                    "附件列表": "; ".join(files)
+                    "附件列表": "; ".join(files),
+                    "压缩包内容": summarize_archives(folder_path, files)
                 })
 
         if not data_list:
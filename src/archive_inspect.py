@@ -0,0 +1,142 @@
+import os
+import tarfile
+import zipfile
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import rarfile
+except ImportError:  # rarfile 为可选依赖，未安装时不列出 rar 内容
+    rarfile = None
+
+try:
+    import py7zr
+except ImportError:  # py7zr 为可选依赖，未安装时不列出 7z 内容
+    py7zr = None
+
+# ================= 压缩包内容 =================
+# 很多学生把作业打包成 zip / rar / 7z 提交，分析时只看到一个压缩包。
+# 这里只读取压缩包的目录（zip 的中央目录、tar 的文件头），不解压到磁盘，列出其中的文件名、大小和类型：
+#   * 解析学生信息时，压缩包外的文件名解析不出学号时，改用压缩包内的文件名
+#   * 报告中的「压缩包内容」列
+# rar 需要安装 rarfile（以及 unrar 工具），7z 需要安装 py7zr；未安装时这两种压缩包不列出内容。
+# 结果按 (路径, 大小, 修改时间) 缓存，同一次分析中多个脚本步骤重复查询时不会重复读取。
+
+ARCHIVE_EXTENSIONS = ('.zip', '.rar', '.7z', '.tar', '.tar.gz', '.tgz')
+SUMMARY_LIMIT = 10  # 「压缩包内容」列中每个压缩包最多列出的文件数
+_JUNK_PREFIXES = ('__MACOSX/',)
+_JUNK_NAMES = ('.DS_Store', 'Thumbs.db', 'desktop.ini')
+
+def is_archive(filename: str) -> bool:
+    return filename.lower().endswith(ARCHIVE_EXTENSIONS)
+
+def _zip_name(info: zipfile.ZipInfo) -> str:
+    """没有设置 UTF-8 标志的文件名按 cp437 解码，中文 Windows 打包的实际是 GBK"""
+    if info.flag_bits & 0x800:
+        return info.filename
+    try:
+        return info.filename.encode('cp437').decode('gbk')
+    except (UnicodeEncodeError, UnicodeDecodeError):
+        return info.filename
+
+def _list_zip(path: str) -> List[Tuple[str, int]]:
+    with zipfile.ZipFile(path) as archive:
+        return [(_zip_name(info), info.file_size) for info in archive.infolist() if not info.is_dir()]
+
+def _list_tar(path: str) -> List[Tuple[str, int]]:
+    with tarfile.open(path) as archive:
+        return [(member.name, member.size) for member in archive if member.isfile()]
+
+def _list_rar(path: str) -> List[Tuple[str, int]]:
+    with rarfile.RarFile(path) as archive:
+        return [(info.filename, info.file_size) for info in archive.infolist() if not info.is_dir()]
+
+def _list_7z(path: str) -> List[Tuple[str, int]]:
+    with py7zr.SevenZipFile(path, mode='r') as archive:
+        return [(info.filename, info.uncompressed or 0) for info in archive.list() if not info.is_directory]
+
+def _lister(filename: str):
+    lowered = filename.lower()
+    if lowered.endswith('.zip'):
+        return _list_zip
+    if lowered.endswith(('.tar', '.tar.gz', '.tgz')):
+        return _list_tar
+    if lowered.endswith('.rar') and rarfile is not None:
+        return _list_rar
+    if lowered.endswith('.7z') and py7zr is not None:
+        return _list_7z
+    return None
+
+@lru_cache(maxsize=4096)
+def _cached_members(path: str, size: int, mtime: float) -> Optional[Tuple[Tuple[str, int], ...]]:
+    lister = _lister(path)
+    if lister is None:
+        return None
+    try:
+        entries = lister(path)
+    except Exception as e:
+        print(f"  ! 无法读取压缩包 {os.path.basename(path)}: {e}")
+        return None
+    return tuple((name, size) for name, size in entries
+                 if not name.startswith(_JUNK_PREFIXES) and os.path.basename(name) not in _JUNK_NAMES)
+
+def list_archive(path: str) -> Optional[List[Dict]]:
+    """
+    列出压缩包中的文件（不解压）
+
+    Returns:
+        [{"文件名": 包内路径, "大小": 解压后字节数, "类型": 扩展名}]；
+        不是支持的压缩包、缺少可选依赖或读取失败时返回 None
+    """
+    if not is_archive(path):
+        return None
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    members = _cached_members(path, stat.st_size, stat.st_mtime)
+    if members is None:
+        return None
+    return [{"文件名": name, "大小": size, "类型": os.path.splitext(name)[1].lower() or "unknown"}
+            for name, size in members]
+
+def archive_member_names(folder_path: str, files: List[str]) -> List[str]:
+    """文件夹中所有压缩包内的文件名（不含包内目录）"""
+    names = []
+    for filename in files:
+        if is_archive(filename):
+            for member in list_archive(os.path.join(folder_path, filename)) or []:
+                names.append(os.path.basename(member["文件名"]))
+    return names
+
+def _format_size(size: int) -> str:
+    if size >= 1024 * 1024:
+        return f"{size / 1024 / 1024:.1f}MB"
+    if size >= 1024:
+        return f"{size / 1024:.0f}KB"
+    return f"{size}B"
+
+def summarize_archives(folder_path: str, files: List[str]) -> str:
+    """
+    报告「压缩包内容」列的文本，例如
+
+        作业.zip: 实验一.docx (120KB), src/main.py (3KB)
+
+    没有压缩包时为空字符串，无法列出内容的压缩包标注原因。
+    """
+    parts = []
+    for filename in files:
+        if not is_archive(filename):
+            continue
+        if _lister(filename) is None:
+            parts.append(f"{filename}: (需安装 {'rarfile' if filename.lower().endswith('.rar') else 'py7zr'})")
+            continue
+        members = list_archive(os.path.join(folder_path, filename))
+        if members is None:
+            parts.append(f"{filename}: (无法读取)")
+            continue
+        listed = ", ".join(f"{member['文件名']} ({_format_size(member['大小'])})" for member in members[:SUMMARY_LIMIT])
+        if len(members) > SUMMARY_LIMIT:
+            listed += f" 等 {len(members)} 个文件"
+        parts.append(f"{filename}: {listed or '(空)'}")
+    return "; ".join(parts)
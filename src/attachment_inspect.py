@@ -0,0 +1,165 @@
+import io
+import os
+import re
+import hashlib
+import zipfile
+from typing import Dict, List, Optional
+
+# ================= 附件类型检测 =================
+# 下载器保存附件时字节已经在内存里，顺便记录：
+#   实际类型  由文件头（magic bytes）判断的 MIME 类型，Office 2007+ 文档再看 zip 内的目录结构
+#   页数      PDF 统计页对象，docx / pptx 读取 docProps/app.xml 中的页数 / 幻灯片数，其他格式为 None
+#   SHA256    内容哈希，用于识别内容相同的附件
+# 写入元数据后，提交质量分析不必再读取附件；扩展名与实际类型不符的文件
+# （如改名为 .docx 的图片压缩包）会被标记为可疑。
+
+DOCX_MIME = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+XLSX_MIME = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+PPTX_MIME = 'application/vnd.openxmlformats-officedocument.presentationml.presentation'
+OLE_MIME = 'application/x-ole-storage'  # doc / xls / ppt 等旧版 Office 文档
+INSPECT_FIELDS = ("实际类型", "页数", "SHA256")  # inspect_attachment 写入附件信息的字段
+
+_MAGIC = [
+    (b'%PDF-', 'application/pdf'),
+    (b'PK\x03\x04', 'application/zip'),
+    (b'PK\x05\x06', 'application/zip'),  # 空 zip
+    (b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1', OLE_MIME),
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+    (b'Rar!\x1a\x07', 'application/vnd.rar'),
+    (b'7z\xbc\xaf\x27\x1c', 'application/x-7z-compressed'),
+    (b'\x1f\x8b', 'application/gzip'),
+    (b'{\\rtf', 'application/rtf'),
+]
+
+# zip 内出现这些文件时视为对应的 Office 文档
+_OOXML_MARKERS = [
+    ('word/document.xml', DOCX_MIME),
+    ('xl/workbook.xml', XLSX_MIME),
+    ('ppt/presentation.xml', PPTX_MIME),
+]
+
+# 扩展名 -> 允许的实际类型；不在表中的扩展名不检查
+EXPECTED_TYPES = {
+    '.pdf': {'application/pdf'},
+    '.docx': {DOCX_MIME},
+    '.xlsx': {XLSX_MIME},
+    '.pptx': {PPTX_MIME},
+    '.doc': {OLE_MIME, 'application/rtf'},
+    '.xls': {OLE_MIME},
+    '.ppt': {OLE_MIME},
+    '.zip': {'application/zip', DOCX_MIME, XLSX_MIME, PPTX_MIME},
+    '.rar': {'application/vnd.rar'},
+    '.7z': {'application/x-7z-compressed'},
+    '.png': {'image/png'},
+    '.jpg': {'image/jpeg'},
+    '.jpeg': {'image/jpeg'},
+    '.gif': {'image/gif'},
+    '.txt': {'text/plain'},
+}
+
+_PDF_PAGE = re.compile(rb'/Type\s*/Page(?![a-zA-Z])')
+_PDF_COUNT = re.compile(rb'/Count\s+(\d+)')
+_APP_PAGES = re.compile(r'<(?:\w+:)?(Pages|Slides)>(\d+)</')
+
+def _looks_like_text(payload: bytes) -> bool:
+    sample = payload[:4096]
+    if b'\x00' in sample:
+        return False
+    for encoding in ('utf-8', 'gbk'):
+        try:
+            sample.decode(encoding)
+            return True
+        except UnicodeDecodeError as e:
+            if e.start >= len(sample) - 4:  # 截断在多字节字符中间
+                return True
+    return False
+
+def detect_mime(payload: bytes, archive: Optional[zipfile.ZipFile] = None) -> str:
+    """由文件头判断 MIME 类型，无法识别时为 application/octet-stream"""
+    if not payload:
+        return 'application/x-empty'
+    for magic, mime in _MAGIC:
+        if payload.startswith(magic):
+            if mime == 'application/zip' and archive is not None:
+                names = set(archive.namelist())
+                for marker, office_mime in _OOXML_MARKERS:
+                    if marker in names:
+                        return office_mime
+            return mime
+    if _looks_like_text(payload):
+        return 'text/plain'
+    return 'application/octet-stream'
+
+def _open_zip(payload: bytes) -> Optional[zipfile.ZipFile]:
+    if not payload.startswith(b'PK'):
+        return None
+    try:
+        return zipfile.ZipFile(io.BytesIO(payload))
+    except zipfile.BadZipFile:
+        return None
+
+def count_pages(payload: bytes, mime: str, archive: Optional[zipfile.ZipFile] = None) -> Optional[int]:
+    """PDF / docx / pptx 的页数，无法确定时为 None"""
+    if mime == 'application/pdf':
+        pages = len(_PDF_PAGE.findall(payload))
+        if pages:
+            return pages
+        # 页对象在压缩的对象流中时，退而使用页树根节点的 /Count
+        counts = [int(value) for value in _PDF_COUNT.findall(payload)]
+        return max(counts) if counts else None
+    if mime in (DOCX_MIME, PPTX_MIME) and archive is not None:
+        try:
+            app = archive.read('docProps/app.xml').decode('utf-8', errors='ignore')
+        except KeyError:
+            return None
+        match = _APP_PAGES.search(app)
+        return int(match.group(2)) if match else None
+    return None
+
+def inspect_attachment(payload: bytes) -> Dict:
+    """下载时记录到附件信息中的字段：实际类型、页数、SHA256"""
+    archive = _open_zip(payload)
+    try:
+        mime = detect_mime(payload, archive)
+        pages = count_pages(payload, mime, archive)
+    finally:
+        if archive is not None:
+            archive.close()
+    return {
+        "实际类型": mime,
+        "页数": pages,
+        "SHA256": hashlib.sha256(payload).hexdigest(),
+    }
+
+def type_mismatch(filename: str, mime: Optional[str]) -> Optional[str]:
+    """扩展名与实际类型不符时返回说明，否则返回 None"""
+    if not mime:
+        return None
+    expected = EXPECTED_TYPES.get(os.path.splitext(filename)[1].lower())
+    if expected is None or mime in expected or mime == 'application/x-empty':
+        return None
+    return f"扩展名与内容不符，实际为 {mime}"
+
+def attachment_warnings(file_details: List[Dict]) -> List[str]:
+    """
+    根据下载时记录的实际类型和哈希找出可疑附件（不读取文件）
+
+    Returns:
+        ["文件名 (原因)"]：扩展名与内容不符、与同一提交中另一个附件内容完全相同
+    """
+    warnings = []
+    seen_hashes = {}
+    for detail in file_details:
+        reason = type_mismatch(detail["文件名"], detail.get("实际类型"))
+        if reason:
+            warnings.append(f"{detail['文件名']} ({reason})")
+        digest = detail.get("SHA256")
+        if digest and detail.get("大小", 0) > 0:
+            if digest in seen_hashes:
+                warnings.append(f"{detail['文件名']} (与 {seen_hashes[digest]} 内容相同)")
+            else:
+                seen_hashes[digest] = detail["文件名"]
+    return warnings
@@ -0,0 +1,104 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, Dict, List, Optional
+
+from submission_index import iter_submission_records
+
+# ================= GUI 后台解析 =================
+# 「开始分析」以子进程运行分析脚本，运行期间 GUI 只能等待，也无法中途停止。
+# 这里在 GUI 进程内用线程池扫描下载目录、解析每个提交文件夹：
+#   * 扫描在任务线程中逐条产出记录，解析提交到线程池，同时在途的任务数有上限
+#   * 解析结果按批回调（默认每 0.3 秒或每 200 条），GUI 据此实时刷新预览表格
+#   * cancel() 后不再提交新任务，已排队的任务被丢弃，正在解析的文件夹完成后即停止
+# 解析主要耗时在读取元数据和附件目录上，用线程池即可与扫描重叠；
+# 不使用进程池，避免在 Tk 进程中派生子进程。
+
+PREVIEW_COLUMNS = ['学号', '姓名', '作业名称', '提交时间', '附件数量', '附件列表', '压缩包内容', '文件夹原名', '作业备注', '文件夹']
+
+class ReparseJob:
+    """
+    后台解析任务
+
+    Args:
+        save_dir: 下载目录
+        on_batch: 每批解析结果的回调 on_batch(提交列表, 进度)，在任务线程中调用
+        on_done: 结束时的回调 on_done(进度)，进度中 cancelled 表示是否被取消
+        workers: 线程池大小
+    """
+
+    def __init__(self, save_dir: str, on_batch: Callable[[List[Dict], Dict], None],
+                 on_done: Optional[Callable[[Dict], None]] = None, workers: int = 4,
+                 batch_size: int = 200, batch_interval: float = 0.3):
+        self.save_dir = save_dir
+        self.on_batch = on_batch
+        self.on_done = on_done
+        self.workers = max(1, workers)
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self.cancelled = threading.Event()
+        self.progress = {"scanned": 0, "parsed": 0, "errors": 0, "scan_finished": False,
+                         "elapsed": 0.0, "cancelled": False}
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def is_running(self) -> bool:
+        return self._thread.is_alive()
+
+    def _run(self):
+        # 分析脚本在导入时会读取配置，放到后台线程中导入，避免拖慢 GUI 启动
+        from MultiAssignmentAnalyzer import build_submission
+
+        started = time.monotonic()
+        batch: List[Dict] = []
+        last_flush = time.monotonic()
+        pending = set()
+
+        def collect(done):
+            for future in done:
+                try:
+                    batch.append(future.result())
+                    self.progress["parsed"] += 1
+                except Exception as e:
+                    self.progress["errors"] += 1
+                    print(f"  ! 解析文件夹出错: {e}")
+            if batch and (len(batch) >= self.batch_size or time.monotonic() - last_flush >= self.batch_interval):
+                flush()
+
+        def flush():
+            nonlocal batch, last_flush
+            self.progress["elapsed"] = time.monotonic() - started
+            if batch:
+                self.on_batch(batch, dict(self.progress))
+            batch, last_flush = [], time.monotonic()
+
+        executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="reparse")
+        try:
+            for record in iter_submission_records(self.save_dir):
+                if self.cancelled.is_set():
+                    break
+                self.progress["scanned"] += 1
+                pending.add(executor.submit(build_submission, record))
+                # 限制在途任务数，取消时能很快停下，也不会一次占用过多内存
+                if len(pending) >= self.workers * 4:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(done)
+            self.progress["scan_finished"] = not self.cancelled.is_set()
+            while pending and not self.cancelled.is_set():
+                done, pending = wait(pending, timeout=self.batch_interval, return_when=FIRST_COMPLETED)
+                collect(done)
+        except Exception as e:
+            print(f"❌ 后台解析出错: {e}")
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+            flush()
+            self.progress["elapsed"] = time.monotonic() - started
+            self.progress["cancelled"] = self.cancelled.is_set()
+            if self.on_done is not None:
+                self.on_done(dict(self.progress))
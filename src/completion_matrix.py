@@ -0,0 +1,113 @@
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# ================= 作业完成矩阵 =================
+# 学生 × 作业的完成情况用 NumPy 矩阵表示：submitted 为是否提交（bool），
+# files 为有效提交的附件数（int）。完成作业数、各作业实交人数、缺交名单等
+# 都是矩阵上的向量化运算，「✓ (3文件)」这样的文本只在导出工作表时生成。
+
+class CompletionMatrix:
+    """
+    学生 × 作业完成矩阵
+
+    Args:
+        students: [(学生标识, 学号, 姓名)]，决定行顺序
+        assignments: 作业名称列表，决定列顺序
+        submissions: {(学生标识, 作业名称): 附件数}
+        roster: 名册中的学生标识集合，为 None 时所有学生都计入应交人数
+    """
+
+    def __init__(self, students: List[Tuple[str, str, str]], assignments: List[str],
+                 submissions: Dict[Tuple[str, str], int], roster: Optional[set] = None):
+        self.keys = [key for key, _, _ in students]
+        self.student_ids = np.array([student_id for _, student_id, _ in students], dtype=object)
+        self.names = np.array([name for _, _, name in students], dtype=object)
+        self.assignments = list(assignments)
+        self.student_index = {key: i for i, key in enumerate(self.keys)}
+        self.assignment_index = {assignment: j for j, assignment in enumerate(self.assignments)}
+
+        shape = (len(self.keys), len(self.assignments))
+        self.submitted = np.zeros(shape, dtype=bool)
+        self.files = np.zeros(shape, dtype=np.int32)
+        if submissions:
+            cells = [(self.student_index[key], self.assignment_index[assignment], count)
+                     for (key, assignment), count in submissions.items()]
+            rows, cols, counts = (np.array(values) for values in zip(*cells))
+            self.submitted[rows, cols] = True
+            self.files[rows, cols] = counts
+
+        # 计入应交人数的学生（有名册时只有名册中的学生）
+        if roster is None:
+            self.expected = np.ones(len(self.keys), dtype=bool)
+        else:
+            self.expected = np.array([key in roster for key in self.keys], dtype=bool)
+
+    @classmethod
+    def from_state(cls, state) -> "CompletionMatrix":
+        """由分析状态构建：提交过作业的学生加上名册中的全部学生，按学生标识排序"""
+        roster = state["名册"]
+        students = {key: (student['学号'], student['姓名']) for key, student in state["students"].items()}
+        if roster is not None:
+            for key, info in roster.items():
+                students.setdefault(key, info)
+        ordered = [(key,) + students[key] for key in sorted(students)]
+        submissions = {cell: submission['附件数量'] for cell, submission in state["有效提交"].items()}
+        return cls(ordered, state["all_assignments"], submissions, set(roster) if roster is not None else None)
+
+    # ---------- 向量化统计 ----------
+
+    def completed_per_student(self) -> np.ndarray:
+        return self.submitted.sum(axis=1)
+
+    def files_per_student(self) -> np.ndarray:
+        return self.files.sum(axis=1)
+
+    def submitted_per_assignment(self) -> np.ndarray:
+        """各作业的实交人数（只统计应交的学生）"""
+        return self.submitted[self.expected].sum(axis=0)
+
+    def expected_count(self) -> int:
+        return int(self.expected.sum())
+
+    def missing_assignments(self, row: int) -> List[str]:
+        return [self.assignments[j] for j in np.flatnonzero(~self.submitted[row])]
+
+    # ---------- 导出 ----------
+
+    @staticmethod
+    def _percent(numerator: np.ndarray, denominator) -> np.ndarray:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rate = np.where(denominator > 0, numerator / np.maximum(denominator, 1) * 100, 0.0)
+        return np.char.add(np.char.mod('%.1f', rate), '%')
+
+    def matrix_frame(self) -> pd.DataFrame:
+        """作业完成矩阵工作表（按学号排序）"""
+        total = len(self.assignments)
+        completed = self.completed_per_student()
+        data = {'学号': self.student_ids, '姓名': self.names}
+        for j, assignment in enumerate(self.assignments):
+            done = np.char.add(np.char.add('✓ (', self.files[:, j].astype(str)), '文件)')
+            data[assignment] = np.where(self.submitted[:, j], done, '✗ 未交').astype(object)
+        data['完成作业数'] = completed
+        data['总作业数'] = np.full(len(self.keys), total)
+        data['完成率'] = self._percent(completed, total).astype(object)
+        data['总文件数'] = self.files_per_student()
+        columns = ['学号', '姓名'] + self.assignments + ['完成作业数', '总作业数', '完成率', '总文件数']
+        return pd.DataFrame(data, columns=columns).sort_values('学号', kind='stable')
+
+    def missing_frame(self) -> pd.DataFrame:
+        """缺交学生名单（只含应交且有缺交的学生，缺交多的在前；有名册时不含名册外的学生）"""
+        total = len(self.assignments)
+        completed = self.completed_per_student()
+        rows = np.flatnonzero((completed < total) & self.expected)
+        missing_count = total - completed[rows]
+        frame = pd.DataFrame({
+            '学号': self.student_ids[rows],
+            '姓名': self.names[rows],
+            '缺交作业数': missing_count,
+            '缺交作业列表': ['; '.join(self.missing_assignments(row)) for row in rows],
+            '完成率': self._percent(completed[rows], total).astype(object),
+        })
+        return frame.sort_values(['缺交作业数', '学号'], ascending=[False, True], kind='stable')
@@ -8,28 +8,14 @@ import re
 import imaplib
 import email
 from email.header import decode_header
-import pandas as pd
 from dotenv import load_dotenv
 import subprocess
-
-# ================= 工具类：重定向输出到UI =================
-class IORedirector(object):
-    """把 print 的内容重定向到 Text 控件中"""
-    def __init__(self, text_area):
-        self.text_area = text_area
-
-    def write(self, str_val):
-        # 在主线程更新UI
-        self.text_area.after(0, self._insert_text, str_val)
-
-    def _insert_text(self, str_val):
-        self.text_area.configure(state='normal')
-        self.text_area.insert(tk.END, str_val)
-        self.text_area.see(tk.END) # 自动滚动到底部
-        self.text_area.configure(state='disabled')
-
-    def flush(self):
-        pass
+from submission_index import open_index
+from imap_search import parse_date
+from gui_log import IORedirector
+from progress_channel import CANCEL_COMMAND, parse_progress_line, format_eta
+from table_preview import ColumnarTable, PreviewWindow, WorkbookCache
+from background_parse import PREVIEW_COLUMNS, ReparseJob
 
 # ================= 主程序逻辑类 =================
 class EnhancedQQMailApp:
@@ -47,8 +33,20 @@ class EnhancedQQMailApp:
             "SAVE_DIR": tk.StringVar(value=os.getenv("SAVE_DIR", "downloaded_attachments"))
         }
 
+        # 服务器端搜索条件（留空表示不限）
+        self.search_filters = {
+            "since": tk.StringVar(),
+            "before": tk.StringVar(),
+            "sender": tk.StringVar(),
+            "subject": tk.StringVar()
+        }
+
         # 分析模式选择
         self.analysis_mode = tk.StringVar(value="basic")
+
+        # 结果预览的工作表缓存（按文件修改时间失效）
+        self.preview_cache = WorkbookCache()
+        self.reparse_job = None
         
         self._init_ui()
 
@@ -82,6 +80,26 @@ class EnhancedQQMailApp:
         download_frame = ttk.LabelFrame(self.root, text="📥 下载操作", padding=10)
         download_frame.pack(fill="x", padx=10, pady=5)
 
+        # 搜索条件：交给 IMAP 服务器过滤，只下载相关邮件
+        filter_frame = ttk.Frame(download_frame)
+        filter_frame.pack(side="top", fill="x", pady=(0, 5))
+        for text, key, width in (("起始日期:", "since", 11), ("截止日期:", "before", 11),
+                                 ("发件人:", "sender", 16), ("主题包含:", "subject", 16)):
+            ttk.Label(filter_frame, text=text).pack(side="left", padx=2)
+            ttk.Entry(filter_frame, textvariable=self.search_filters[key], width=width).pack(side="left", padx=2)
+        ttk.Label(filter_frame, text="(日期格式 YYYY-MM-DD，留空不限)").pack(side="left", padx=5)
+
+        # 下载进度：由下载脚本的 --progress 进度行驱动
+        progress_frame = ttk.Frame(download_frame)
+        progress_frame.pack(side="bottom", fill="x", pady=(5, 0))
+        self.progress_bar = ttk.Progressbar(progress_frame, mode="determinate")
+        self.progress_bar.pack(side="left", expand=True, fill="x", padx=5)
+        self.progress_status = tk.StringVar(value="未开始")
+        ttk.Label(progress_frame, textvariable=self.progress_status, width=42).pack(side="left", padx=5)
+        self.btn_cancel = ttk.Button(progress_frame, text="⏹ 取消", command=self.cancel_download, state="disabled")
+        self.btn_cancel.pack(side="left", padx=5)
+        self.download_process = None
+
         self.btn_download_basic = ttk.Button(download_frame, text="📥 标准下载附件", command=self.start_download_thread)
         self.btn_download_basic.pack(side="left", expand=True, fill="x", padx=5)
 
@@ -135,6 +153,19 @@ class EnhancedQQMailApp:
         self.btn_preview = ttk.Button(button_frame, text="👁️ 预览结果", command=self.preview_results)
         self.btn_preview.pack(side="left", expand=True, fill="x", padx=5)
 
+        self.btn_index = ttk.Button(button_frame, text="🗂️ 查询提交索引", command=self.preview_index)
+        self.btn_index.pack(side="left", expand=True, fill="x", padx=5)
+
+        # 在 GUI 进程内后台解析，结果实时显示在预览表格中，可随时停止
+        reparse_frame = ttk.Frame(analysis_frame)
+        reparse_frame.pack(fill="x", pady=5)
+
+        self.btn_reparse = ttk.Button(reparse_frame, text="⚡ 后台解析并实时预览", command=self.start_background_parse)
+        self.btn_reparse.pack(side="left", expand=True, fill="x", padx=5)
+
+        self.btn_stop_reparse = ttk.Button(reparse_frame, text="⏹ 停止解析", command=self.stop_background_parse, state="disabled")
+        self.btn_stop_reparse.pack(side="left", expand=True, fill="x", padx=5)
+
         # 4. 功能说明区域
         info_frame = ttk.LabelFrame(self.root, text="ℹ️ 功能说明", padding=10)
         info_frame.pack(fill="x", padx=10, pady=5)
@@ -158,8 +189,7 @@ class EnhancedQQMailApp:
         self.log_text.pack(fill="both", expand=True)
 
         # 重定向输出
-        sys.stdout = IORedirector(self.log_text)
-        sys.stderr = IORedirector(self.log_text)
+        sys.stdout = sys.stderr = IORedirector(self.log_text)
 
     def browse_folder(self):
         folder = filedialog.askdirectory()
@@ -195,6 +225,20 @@ class EnhancedQQMailApp:
         t = threading.Thread(target=self.run_download_logic, args=(True,))
         t.start()
 
+    def _search_args(self):
+        """把界面上的搜索条件转换为下载脚本的命令行参数"""
+        args = []
+        for key, option in (("since", "--since"), ("before", "--before")):
+            value = self.search_filters[key].get().strip()
+            if value:
+                parse_date(value)  # 格式错误时抛出 ValueError
+                args += [option, value]
+        for key, option in (("sender", "--from"), ("subject", "--subject")):
+            value = self.search_filters[key].get().strip()
+            if value:
+                args += [option, value]
+        return args
+
     def run_download_logic(self, enhanced=False):
         try:
             # 获取当前配置
@@ -207,26 +251,88 @@ class EnhancedQQMailApp:
                 print("❌ 请先填写完整配置信息！")
                 return
 
+            try:
+                search_args = self._search_args()
+            except ValueError:
+                print("❌ 日期格式错误，请使用 YYYY-MM-DD，例如 2025-09-01")
+                return
+
             script_name = ".\EnhancedDownloadQQAttachments.py" if enhanced else "DownloadQQAttachments.py"
             print(f"\n--- 开始任务: 使用 {script_name} 连接邮箱 {user} ---")
             
-            # 运行相应的下载脚本
+            # 运行相应的下载脚本，逐行读取输出：进度行更新进度条，其余显示在日志区
             try:
-                result = subprocess.run([sys.executable, script_name], 
-                                      capture_output=False, text=True, 
-                                      cwd=os.getcwd())
-                if result.returncode == 0:
+                env = dict(os.environ, PYTHONIOENCODING="utf-8")
+                process = subprocess.Popen([sys.executable, script_name, "--progress"] + search_args,
+                                           stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                           text=True, encoding="utf-8", errors="replace",
+                                           cwd=os.getcwd(), env=env)
+                self.download_process = process
+                self.root.after(0, self._start_progress)
+                cancelled = False
+                for line in process.stdout:
+                    progress = parse_progress_line(line)
+                    if progress is None:
+                        print(line, end="")
+                        continue
+                    cancelled = progress["cancelled"]
+                    self.root.after(0, self._update_progress, progress)
+                returncode = process.wait()
+                if cancelled:
+                    print("⏹ 下载任务已取消。")
+                elif returncode == 0:
                     print("✅ 下载任务完成！")
                 else:
-                    print(f"❌ 下载脚本执行失败，返回码: {result.returncode}")
+                    print(f"❌ 下载脚本执行失败，返回码: {returncode}")
             except Exception as e:
                 print(f"❌ 执行下载脚本时出错: {e}")
+            finally:
+                self.download_process = None
 
         except Exception as e:
             print(f"❌ 发生严重错误: {e}")
         finally:
             self.root.after(0, self._reset_buttons)
 
+    def _start_progress(self):
+        self.progress_bar.configure(value=0, maximum=1)
+        self.progress_status.set("正在连接...")
+        self.btn_cancel.config(state="normal")
+
+    def _update_progress(self, progress):
+        """根据下载脚本的进度行更新进度条、速率和预计剩余时间"""
+        finished = progress["done"] + progress["failed"]
+        total = progress["total"]
+        self.progress_bar.configure(maximum=max(total, 1), value=finished)
+        status = (f"{finished}/{total} 封  {progress['messages_per_second']:.1f} 封/秒  "
+                  f"{progress['bytes_per_second'] / 1024 / 1024:.2f} MB/秒  剩余 {format_eta(progress['eta'])}")
+        if progress["failed"]:
+            status += f"  失败 {progress['failed']}"
+        if progress["cancelled"]:
+            status = "正在取消... " + status if progress["event"] != "done" else f"已取消（完成 {finished}/{total} 封）"
+        elif progress["event"] == "done":
+            status = f"完成 {finished}/{total} 封，用时 {format_eta(progress['elapsed'])}"
+        self.progress_status.set(status)
+
+    def cancel_download(self):
+        """请求下载脚本在处理完当前邮件后停止，超时仍未退出则强制结束"""
+        process = self.download_process
+        if process is None or process.poll() is not None:
+            return
+        self.btn_cancel.config(state="disabled")
+        self.progress_status.set("正在取消...")
+        try:
+            process.stdin.write(CANCEL_COMMAND + "\n")
+            process.stdin.flush()
+        except OSError:
+            pass
+        self.root.after(15000, self._force_stop, process)
+
+    def _force_stop(self, process):
+        if process.poll() is None:
+            print("⚠️ 下载脚本未能及时停止，已强制结束。")
+            process.terminate()
+
     def start_analyze_thread(self):
         self.btn_download_basic.config(state="disabled")
         self.btn_download_enhanced.config(state="disabled")
@@ -299,52 +405,135 @@ class EnhancedQQMailApp:
                 messagebox.showinfo("提示", "未找到分析结果文件，请先运行分析。")
                 return
             
-            # 创建预览窗口
-            preview_window = tk.Toplevel(self.root)
-            preview_window.title("分析结果预览")
-            preview_window.geometry("600x400")
-            
-            # 文件选择
-            file_frame = ttk.Frame(preview_window)
-            file_frame.pack(fill="x", padx=10, pady=5)
-            
-            ttk.Label(file_frame, text="选择文件:").pack(side="left", padx=5)
-            
-            file_var = tk.StringVar(value=excel_files[0])
-            file_combo = ttk.Combobox(file_frame, textvariable=file_var, values=excel_files, state="readonly")
-            file_combo.pack(side="left", padx=5)
-            
-            # 预览区域
-            preview_text = scrolledtext.ScrolledText(preview_window, height=15, state='disabled')
-            preview_text.pack(fill="both", expand=True, padx=10, pady=5)
-            
-            def load_preview():
-                try:
-                    df = pd.read_excel(file_var.get())
-                    preview_text.configure(state='normal')
-                    preview_text.delete(1.0, tk.END)
-                    preview_text.insert(tk.END, f"文件: {file_var.get()}\n")
-                    preview_text.insert(tk.END, f"行数: {len(df)}, 列数: {len(df.columns)}\n")
-                    preview_text.insert(tk.END, "="*50 + "\n\n")
-                    preview_text.insert(tk.END, df.head(10).to_string(index=False))
-                    if len(df) > 10:
-                        preview_text.insert(tk.END, f"\n\n... 还有 {len(df)-10} 行数据")
-                    preview_text.configure(state='disabled')
-                except Exception as e:
-                    messagebox.showerror("错误", f"读取文件失败: {e}")
-            
-            ttk.Button(file_frame, text="刷新预览", command=load_preview).pack(side="left", padx=5)
-            
-            # 初始加载
-            load_preview()
+            # 表格只渲染可见行，工作表按需读取并缓存，再次打开时不必重新读取
+            PreviewWindow(self.root, excel_files, self.preview_cache)
             
         except Exception as e:
             messagebox.showerror("错误", f"预览功能出错: {e}")
 
+    def start_background_parse(self):
+        """用线程池扫描并解析下载目录，解析结果按批显示在预览窗口中"""
+        if self.reparse_job is not None and self.reparse_job.is_running():
+            return
+        save_dir = self.config["SAVE_DIR"].get()
+        if not os.path.exists(save_dir):
+            print("❌ 下载目录不存在，请先下载附件。")
+            return
+        os.environ['PARSE_MODE'] = self.parse_mode.get()
+
+        table = ColumnarTable.empty(PREVIEW_COLUMNS)
+        preview = PreviewWindow(self.root, [], self.preview_cache)
+        preview.show_live("后台解析", table)
+
+        def on_batch(submissions, progress):
+            self.root.after(0, self._on_reparse_batch, preview, table, submissions, progress)
+
+        def on_done(progress):
+            self.root.after(0, self._on_reparse_done, preview, progress)
+
+        job = ReparseJob(save_dir, on_batch, on_done, workers=min(8, (os.cpu_count() or 2) * 2))
+        self.reparse_job = job
+
+        def close_preview():
+            job.cancel()
+            preview.window.destroy()
+
+        preview.window.protocol("WM_DELETE_WINDOW", close_preview)
+        self.btn_reparse.config(state="disabled")
+        self.btn_stop_reparse.config(state="normal")
+        print(f"\n--- 开始后台解析: {save_dir}（解析模式 = {self.parse_mode.get()}）---")
+        job.start()
+
+    def stop_background_parse(self):
+        if self.reparse_job is not None:
+            self.reparse_job.cancel()
+            self.btn_stop_reparse.config(state="disabled")
+            print("⏹ 正在停止后台解析...")
+
+    def _on_reparse_batch(self, preview, table, submissions, progress):
+        if not preview.window.winfo_exists():
+            return
+        table.append_rows(submissions)
+        preview.refresh_live()
+        preview.status.set(f"后台解析中：已扫描 {progress['scanned']} 个文件夹，已解析 {progress['parsed']} 个，"
+                           f"用时 {progress['elapsed']:.1f} 秒")
+
+    def _on_reparse_done(self, preview, progress):
+        self.btn_reparse.config(state="normal")
+        self.btn_stop_reparse.config(state="disabled")
+        summary = (f"已解析 {progress['parsed']} 个文件夹"
+                   + (f"，{progress['errors']} 个出错" if progress['errors'] else "")
+                   + f"，用时 {progress['elapsed']:.1f} 秒")
+        if progress["cancelled"]:
+            print(f"⏹ 后台解析已停止，{summary}")
+        else:
+            print(f"✅ 后台解析完成，{summary}")
+        if preview.window.winfo_exists():
+            preview.status.set(("已停止：" if progress["cancelled"] else "解析完成：") + summary)
+
+    def preview_index(self):
+        """直接查询提交索引数据库，按学号/作业/时间筛选"""
+        save_dir = self.config["SAVE_DIR"].get()
+        index = open_index(save_dir)
+        if index is None:
+            messagebox.showinfo("提示", "未找到提交索引，请先使用增强下载器下载附件。")
+            return
+        
+        index_window = tk.Toplevel(self.root)
+        index_window.title(f"提交索引 - {index.path}")
+        index_window.geometry("900x500")
+        index_window.protocol("WM_DELETE_WINDOW", lambda: (index.close(), index_window.destroy()))
+        
+        # 筛选条件
+        filter_frame = ttk.Frame(index_window)
+        filter_frame.pack(fill="x", padx=10, pady=5)
+        
+        filters = {
+            "student_id": tk.StringVar(),
+            "assignment": tk.StringVar(),
+            "since": tk.StringVar(),
+            "until": tk.StringVar()
+        }
+        labels = [("学号:", "student_id", 14), ("作业:", "assignment", 14),
+                  ("起始时间:", "since", 12), ("截止时间:", "until", 12)]
+        for text, key, width in labels:
+            ttk.Label(filter_frame, text=text).pack(side="left", padx=2)
+            ttk.Entry(filter_frame, textvariable=filters[key], width=width).pack(side="left", padx=2)
+        
+        # 结果表格
+        columns = [("folder_name", "文件夹", 220), ("student_id", "学号", 120), ("name", "姓名", 70),
+                   ("assignment", "作业", 140), ("send_time", "发送时间", 160), ("attachment_count", "附件数", 60)]
+        tree = ttk.Treeview(index_window, columns=[c[0] for c in columns], show="headings")
+        for key, heading, width in columns:
+            tree.heading(key, text=heading)
+            tree.column(key, width=width, anchor="w")
+        scrollbar = ttk.Scrollbar(index_window, orient="vertical", command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side="right", fill="y")
+        tree.pack(fill="both", expand=True, padx=10, pady=5)
+        
+        status_var = tk.StringVar()
+        ttk.Label(index_window, textvariable=status_var).pack(anchor="w", padx=10, pady=2)
+        
+        def run_query():
+            try:
+                rows = index.query_messages(**{k: v.get().strip() for k, v in filters.items()})
+            except Exception as e:
+                messagebox.showerror("错误", f"查询索引失败: {e}")
+                return
+            tree.delete(*tree.get_children())
+            for row in rows:
+                tree.insert("", tk.END, values=[row[key] for key, _, _ in columns])
+            status_var.set(f"共 {index.count_messages()} 条记录，当前显示 {len(rows)} 条")
+        
+        ttk.Button(filter_frame, text="查询", command=run_query).pack(side="left", padx=5)
+        run_query()
+
     def _reset_buttons(self):
         self.root.after(0, lambda: self.btn_download_basic.config(state="normal"))
         self.root.after(0, lambda: self.btn_download_enhanced.config(state="normal"))
         self.root.after(0, lambda: self.btn_analyze.config(state="normal"))
+        self.root.after(0, lambda: self.btn_cancel.config(state="disabled"))
 
 if __name__ == "__main__":
     root = tk.Tk()
@@ -1,8 +1,10 @@
 import os
 import re
-import json
 from datetime import datetime
 from typing import Dict, List, Optional, Tuple
+from metadata_store import METADATA_FILENAME, METADATA_FILES, load_metadata
+from submission_index import NOT_INDEXED, lookup_indexed_metadata, lookup_indexed_attachments
+from attachment_inspect import INSPECT_FIELDS, attachment_warnings
 
 def parse_folder_name(folder_name: str) -> Dict[str, str]:
     """
@@ -66,15 +68,16 @@ def extract_assignment_name(assignment_text: str) -> str:
 
 def get_email_metadata(folder_path: str) -> Optional[Dict]:
     """
-    读取邮件元数据文件
+    读取邮件元数据，存在提交索引时直接从索引读取
     """
-    metadata_file = os.path.join(folder_path, 'email_metadata.json')
-    if os.path.exists(metadata_file):
-        try:
-            with open(metadata_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception as e:
-            print(f"读取元数据文件失败 {metadata_file}: {e}")
+    metadata = lookup_indexed_metadata(folder_path)
+    if metadata is not NOT_INDEXED:
+        return metadata
+    
+    try:
+        return load_metadata(folder_path)
+    except Exception as e:
+        print(f"读取元数据文件失败 {os.path.join(folder_path, METADATA_FILENAME)}: {e}")
     return None
 
 def get_folder_modification_time(folder_path: str) -> datetime:
@@ -97,8 +100,8 @@ def get_folder_modification_time(folder_path: str) -> datetime:
     try:
         for root, dirs, files in os.walk(folder_path):
             for file in files:
-                if file == 'email_metadata.json':
-                    continue  # 跳过元数据文件
+                if file in METADATA_FILES:
+                    continue  # 跳过元数据和正文文件
                 file_path = os.path.join(root, file)
                 file_time = datetime.fromtimestamp(os.path.getmtime(file_path))
                 if file_time > latest_time:
@@ -116,26 +119,37 @@ def get_submission_files_info(folder_path: str) -> Tuple[int, List[str], List[Di
     """
     获取提交文件的信息，包括文件名、大小等
     """
-    if not os.path.exists(folder_path):
-        return 0, [], []
-    
     files = []
     file_details = []
     
     # 首先尝试从元数据获取文件信息
     metadata = get_email_metadata(folder_path)
+    indexed_attachments = None
+    if not (metadata and "附件列表" in metadata):
+        indexed_attachments = lookup_indexed_attachments(folder_path)
+    
     if metadata and "附件列表" in metadata:
         for attachment in metadata["附件列表"]:
             files.append(attachment["文件名"])
-            file_details.append({
+            detail = {
                 "文件名": attachment["文件名"],
                 "大小": attachment.get("大小", 0),
                 "类型": attachment.get("类型", "unknown")
-            })
+            }
+            # 下载时记录的实际类型、页数和哈希
+            detail.update({key: attachment[key] for key in INSPECT_FIELDS if key in attachment})
+            file_details.append(detail)
+    elif indexed_attachments is not None:
+        # 索引中记录了磁盘上的附件
+        for attachment in indexed_attachments:
+            files.append(attachment["文件名"])
+            file_details.append(attachment)
+    elif not os.path.exists(folder_path):
+        return 0, [], []
     else:
         # 从文件系统获取信息
         for item in os.listdir(folder_path):
-            if item == 'email_metadata.json':
+            if item in METADATA_FILES:
                 continue
             item_path = os.path.join(folder_path, item)
             if os.path.isfile(item_path):
@@ -174,6 +188,12 @@ def analyze_submission_quality(folder_path: str) -> Dict[str, any]:
             quality_info["可疑文件"].append(f"{detail['文件名']} (空文件)")
         elif detail["大小"] < 1024:  # 小于1KB
             quality_info["可疑文件"].append(f"{detail['文件名']} (文件过小)")
+    # 扩展名与实际类型不符、内容重复的附件（依据下载时记录的信息，不读取文件）
+    quality_info["可疑文件"].extend(attachment_warnings(file_details))
+    
+    pages = [detail["页数"] for detail in file_details if detail.get("页数")]
+    if pages:
+        quality_info["总页数"] = sum(pages)
     
     # 简单的质量评分（基于文件数量和大小）
     score = 0
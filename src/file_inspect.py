@@ -0,0 +1,151 @@
+import os
+import mmap
+import hashlib
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, Iterable, List
+
+from attachment_inspect import INSPECT_FIELDS, count_pages, detect_mime
+from metadata_store import METADATA_FILES, load_metadata, save_metadata
+
+# ================= 磁盘上的附件检查 =================
+# 视频、数据集等大附件不能整个读成 Python bytes：
+#   * 哈希用固定大小的缓冲区分块读取（readinto 复用同一块 bytearray），内存占用与文件大小无关
+#   * 文件头判断类型、PDF 页数统计等需要扫描内容的操作在 mmap 上进行，由操作系统按页调入
+#   * 多个文件用线程池并行，hashlib 处理大块数据时会释放 GIL，读盘和计算可以重叠
+# 字段与下载时 inspect_attachment 写入的一致，供 ConsolidateMetadata --inspect 给旧的下载补齐。
+# 各方式的吞吐量和峰值内存见 benchmarks/bench_file_inspect.py。
+
+CHUNK_SIZE = 1024 * 1024  # 分块哈希的缓冲区大小
+HEAD_SIZE = 4096  # 判断文件类型读取的文件头长度
+PDF_SCAN_LIMIT = 256 * 1024 * 1024  # 超过该大小的 PDF 不统计页数
+DEFAULT_WORKERS = min(8, (os.cpu_count() or 2) * 2)
+
+@contextmanager
+def mapped(path: str):
+    """只读 mmap 整个文件；空文件无法映射，返回 b''"""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b''
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            yield view
+
+def hash_file(path: str, algorithm: str = 'sha256', chunk_size: int = CHUNK_SIZE, use_mmap: bool = False) -> str:
+    """
+    分块计算文件哈希
+
+    Args:
+        use_mmap: 为 True 时在 mmap 上按块切片（不复制）送入哈希，否则用固定缓冲区 readinto
+    """
+    digest = hashlib.new(algorithm)
+    if use_mmap:
+        with mapped(path) as view:
+            data = memoryview(view)
+            try:
+                for start in range(0, len(data), chunk_size):
+                    digest.update(data[start:start + chunk_size])
+            finally:
+                data.release()
+        return digest.hexdigest()
+
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    with open(path, 'rb', buffering=0) as f:
+        while True:
+            read = f.readinto(buffer)
+            if not read:
+                break
+            digest.update(view[:read])
+    return digest.hexdigest()
+
+def inspect_file(path: str) -> Dict:
+    """
+    检查磁盘上的附件，返回与 inspect_attachment 相同的字段（实际类型、页数、SHA256）
+
+    文件头和 PDF 页数在 mmap 上读取，哈希分块计算，整个过程不把文件读入内存。
+    """
+    with mapped(path) as view:
+        head = bytes(view[:HEAD_SIZE])
+        archive = None
+        if head.startswith(b'PK'):
+            try:
+                archive = zipfile.ZipFile(path)  # 只读取中央目录
+            except zipfile.BadZipFile:
+                archive = None
+        try:
+            mime = detect_mime(head, archive)
+            too_large = mime == 'application/pdf' and len(view) > PDF_SCAN_LIMIT
+            pages = None if too_large else count_pages(view, mime, archive)
+        finally:
+            if archive is not None:
+                archive.close()
+    return {
+        "实际类型": mime,
+        "页数": pages,
+        "SHA256": hash_file(path),
+    }
+
+def inspect_files(paths: Iterable[str], workers: int = DEFAULT_WORKERS) -> Dict[str, Dict]:
+    """用线程池并行检查多个文件，读取失败的文件不出现在结果中"""
+    def safe_inspect(path):
+        try:
+            return path, inspect_file(path)
+        except OSError as e:
+            print(f"  ! 无法读取附件 {path}: {e}")
+            return path, None
+
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="inspect") as executor:
+        return {path: info for path, info in executor.map(safe_inspect, paths) if info is not None}
+
+def backfill_attachment_info(save_dir: str, workers: int = DEFAULT_WORKERS) -> Dict:
+    """
+    为旧的下载补齐附件的实际类型、页数和哈希（写回 email_metadata.json）
+
+    只处理元数据中缺少这些字段、且磁盘上存在的附件。
+
+    Returns:
+        updated_folders 更新过的文件夹名列表，files / bytes 检查的附件数和总字节数
+    """
+    pending: Dict[str, List[Dict]] = {}
+    metadata_by_folder: Dict[str, Dict] = {}
+    paths = []
+    with os.scandir(save_dir) as entries:
+        for entry in entries:
+            if not entry.is_dir():
+                continue
+            try:
+                metadata = load_metadata(entry.path)
+            except Exception as e:
+                print(f"读取元数据文件失败 {entry.path}: {e}")
+                continue
+            if not metadata:
+                continue
+            for attachment in metadata.get("附件列表", []):
+                filename = attachment.get("文件名", "")
+                path = os.path.join(entry.path, filename)
+                if all(key in attachment for key in INSPECT_FIELDS) or filename in METADATA_FILES or not os.path.isfile(path):
+                    continue
+                pending.setdefault(entry.name, []).append(attachment)
+                metadata_by_folder[entry.name] = metadata
+                paths.append(path)
+
+    results = inspect_files(paths, workers)
+    updated = []
+    for folder, attachments in pending.items():
+        folder_path = os.path.join(save_dir, folder)
+        changed = False
+        for attachment in attachments:
+            info = results.get(os.path.join(folder_path, attachment["文件名"]))
+            if info is not None:
+                attachment.update(info)
+                changed = True
+        if changed:
+            save_metadata(folder_path, metadata_by_folder[folder])
+            updated.append(folder)
+    return {
+        "updated_folders": updated,
+        "files": len(results),
+        "bytes": sum(os.path.getsize(path) for path in results),
+    }
@@ -0,0 +1,59 @@
+import re
+import unicodedata
+from email.utils import parseaddr
+from typing import Dict, List, Optional, Tuple
+
+# ================= 重复文件夹归并 =================
+# 同一封作业邮件常以多个文件夹出现：重复下载或手动复制留下的「(1)」「（2）」后缀，
+# 回复 / 转发产生的「Re」「回复」前缀（文件名中的冒号已被去掉），全角半角混用，多余的空格。
+# 解析文件夹（读取附件名、正则提取学号姓名）比较耗时，这里先按归一化后的文件夹名
+# 加发件人地址把这些变体聚成一组，每组只解析提交时间最晚的那个文件夹。
+# 发件人也是分组键的一部分：不同学生用同样的主题（如「实验一」）提交时不会被合并。
+# 没有元数据（无从得知发件人）的文件夹不预先归并，每个文件夹单独一组，
+# 解析出学号姓名后再由调用方按学生合并。
+
+_COPY_SUFFIX = re.compile(r'\(\d+\)$')
+_REPLY_PREFIX = re.compile(r'^(?:(?:re|fwd?)(?:\s*:\s*|\s+|(?=[^a-z]))|(?:回复|答复|转发)\s*:?\s*)')
+_WHITESPACE = re.compile(r'\s+')
+
+def normalize_folder_key(folder_name: str) -> str:
+    """
+    文件夹名的归一化键
+
+    全角转半角（NFKC）、不区分大小写，去掉开头的回复/转发前缀、末尾的 (n) 后缀和所有空白。
+    """
+    key = unicodedata.normalize('NFKC', folder_name).lower().strip()
+    previous = None
+    while key != previous:
+        previous = key
+        key = _REPLY_PREFIX.sub('', key).strip()
+        key = _COPY_SUFFIX.sub('', key).strip()
+    return _WHITESPACE.sub('', key) or folder_name
+
+def sender_address(metadata: Optional[Dict]) -> str:
+    """元数据中发件人的邮箱地址（小写），没有元数据时为空"""
+    if not metadata:
+        return ""
+    return parseaddr(metadata.get("发件人") or "")[1].lower()
+
+def cluster_key(folder_name: str, metadata: Optional[Dict]) -> Tuple[str, str]:
+    """分组键；没有发件人时用原文件夹名，即不与其他文件夹归并"""
+    sender = sender_address(metadata)
+    if not sender:
+        return "", folder_name
+    return sender, normalize_folder_key(folder_name)
+
+def cluster_records(records) -> List[List[Dict]]:
+    """
+    按 (发件人, 归一化文件夹名) 把提交记录分组，没有发件人的记录各自一组
+
+    Args:
+        records: 提交记录，metadata 需已加载，submit_time 为提交时间
+
+    Returns:
+        分组列表，每组按提交时间从早到晚排列，最后一个为要解析的最新版本
+    """
+    clusters: Dict[Tuple[str, str], List[Dict]] = {}
+    for record in records:
+        clusters.setdefault(cluster_key(record["folder"], record["metadata"]), []).append(record)
+    return [sorted(members, key=lambda record: record["submit_time"]) for members in clusters.values()]
@@ -0,0 +1,65 @@
+import queue
+import tkinter as tk
+
+# ================= 工具类：重定向输出到UI =================
+# 之前每次 write 都 after(0, ...) 插入一次文本，下载成千上万个附件时
+# Tk 事件队列被淹没，窗口卡死。现在 write 只把文本放进线程安全的队列，
+# 由主线程定时取出、合并成一次插入；日志区只保留最近 max_lines 行。
+
+class IORedirector(object):
+    """
+    把 print 的内容重定向到 Text 控件中
+
+    Args:
+        text_area: 显示日志的 Text / ScrolledText 控件
+        interval: 刷新间隔（毫秒）
+        max_lines: 日志区最多保留的行数，超出时删除最早的行
+    """
+    encoding = 'utf-8'
+
+    def __init__(self, text_area, interval: int = 100, max_lines: int = 5000):
+        self.text_area = text_area
+        self.interval = interval
+        self.max_lines = max_lines
+        self._queue = queue.SimpleQueue()
+        self.text_area.after(self.interval, self._flush)
+
+    def write(self, str_val):
+        # 可以在任意线程调用，UI 只在主线程的 _flush 中更新
+        if str_val:
+            self._queue.put(str_val)
+        return len(str_val)
+
+    def _drain(self) -> str:
+        chunks = []
+        while True:
+            try:
+                chunks.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        text = "".join(chunks)
+        # 一次积压超过保留行数时，只插入最后 max_lines 行
+        if text.count("\n") > self.max_lines:
+            text = "\n".join(text.split("\n")[-self.max_lines - 1:])
+        return text
+
+    def _flush(self):
+        try:
+            text = self._drain()
+            if text:
+                # 用户向上翻看时不强制滚动到底部
+                at_bottom = self.text_area.yview()[1] >= 0.999
+                self.text_area.configure(state='normal')
+                self.text_area.insert(tk.END, text)
+                lines = int(self.text_area.index('end-1c').split('.')[0])
+                if lines > self.max_lines:
+                    self.text_area.delete('1.0', f'{lines - self.max_lines + 1}.0')
+                if at_bottom:
+                    self.text_area.see(tk.END)
+                self.text_area.configure(state='disabled')
+            self.text_area.after(self.interval, self._flush)
+        except tk.TclError:
+            pass  # 窗口已关闭
+
+    def flush(self):
+        pass
@@ -0,0 +1,214 @@
+import time
+import imaplib
+import threading
+from contextlib import contextmanager
+from typing import Callable, List, Optional
+
+# ================= IMAP 连接管理 =================
+# 长时间下载时，QQ 邮箱会因空闲或超时断开连接（imaplib.IMAP4.abort / socket 错误），
+# 之前的做法是后续每封邮件都打印一条错误。这里统一处理：
+#   * 空闲超过 keepalive 秒的会话先发 NOOP 保活，池中空闲的会话由后台线程定期保活
+#   * 连接断开时按指数退避重新登录，并重新选中原来的文件夹
+#   * 操作在重连后自动重试，调用方只会看到重试耗尽后的异常
+
+# 视为连接失效、需要重连的异常
+CONNECTION_ERRORS = (imaplib.IMAP4.abort, OSError, EOFError)
+
+class IMAPConnection:
+    """
+    自动保活、断线重连的 IMAP 会话
+
+    Args:
+        connect: 建立连接并登录的函数，返回 imaplib.IMAP4 对象
+        keepalive: 空闲超过该秒数后先发送 NOOP
+        max_retries: 单个操作因连接错误重试的最大次数
+        backoff_base / backoff_max: 重连等待时间为 backoff_base * 2^n 秒，最长 backoff_max 秒
+    """
+
+    def __init__(self, connect: Callable[[], imaplib.IMAP4], keepalive: float = 120,
+                 max_retries: int = 5, backoff_base: float = 1.0, backoff_max: float = 60.0):
+        self._connect = connect
+        self.keepalive = keepalive
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.lock = threading.RLock()
+        self.mail: Optional[imaplib.IMAP4] = None
+        self.selected: Optional[str] = None
+        self.last_used = 0.0
+        self.reconnects = 0
+
+    def open(self):
+        with self.lock:
+            if self.mail is None:
+                self.mail = self._connect()
+                self.last_used = time.monotonic()
+            return self
+
+    def select(self, folder: str) -> bool:
+        """选中文件夹并记住它，重连后自动重新选中"""
+        status, _ = self.run(lambda mail: mail.select(f'"{folder}"'))
+        if status == 'OK':
+            self.selected = folder
+        return status == 'OK'
+
+    def unselect(self):
+        """关闭当前文件夹（不退出登录），之后重连不再自动选中"""
+        with self.lock:
+            if self.mail is not None and self.selected is not None:
+                try:
+                    self.mail.close()
+                except Exception:
+                    pass
+            self.selected = None
+
+    def reconnect(self):
+        """丢弃当前连接，按指数退避重新登录并重新选中文件夹"""
+        with self.lock:
+            self._drop()
+            attempt = 0
+            while True:
+                delay = min(self.backoff_base * (2 ** attempt), self.backoff_max)
+                try:
+                    self.mail = self._connect()
+                    if self.selected is not None:
+                        status, _ = self.mail.select(f'"{self.selected}"')
+                        if status != 'OK':
+                            raise imaplib.IMAP4.abort(f"重新选中文件夹失败: {self.selected}")
+                    self.last_used = time.monotonic()
+                    self.reconnects += 1
+                    print(f"🔄 已重新连接邮箱服务器（第 {self.reconnects} 次）")
+                    return
+                except CONNECTION_ERRORS + (imaplib.IMAP4.error,) as e:
+                    self._drop()
+                    attempt += 1
+                    if attempt > self.max_retries:
+                        raise imaplib.IMAP4.abort(f"重连失败（已尝试 {attempt} 次）: {e}")
+                    print(f"⚠️ 重连失败: {e}，{delay:.0f} 秒后重试")
+                    time.sleep(delay)
+
+    def noop_if_idle(self):
+        """空闲超过 keepalive 秒时发送 NOOP，连接已失效则立即重连"""
+        with self.lock:
+            if self.mail is None or time.monotonic() - self.last_used < self.keepalive:
+                return
+            try:
+                self.mail.noop()
+                self.last_used = time.monotonic()
+            except CONNECTION_ERRORS:
+                self.reconnect()
+
+    def run(self, operation: Callable[[imaplib.IMAP4], object]):
+        """
+        在会话上执行一个操作，连接错误时重连并重试
+
+        Args:
+            operation: 接收 imaplib.IMAP4 对象的函数，如 lambda mail: mail.uid('FETCH', uid, '(RFC822)')
+        """
+        with self.lock:
+            self.open()
+            self.noop_if_idle()
+            attempt = 0
+            while True:
+                try:
+                    result = operation(self.mail)
+                    self.last_used = time.monotonic()
+                    return result
+                except CONNECTION_ERRORS as e:
+                    attempt += 1
+                    if attempt > self.max_retries:
+                        raise
+                    print(f"⚠️ 连接中断: {e}，正在重连...")
+                    self.reconnect()
+
+    def _drop(self):
+        if self.mail is not None:
+            try:
+                self.mail.shutdown()
+            except Exception:
+                pass
+        self.mail = None
+
+    def close(self):
+        """关闭文件夹并退出登录"""
+        with self.lock:
+            if self.mail is None:
+                return
+            try:
+                if self.selected is not None:
+                    self.mail.close()
+                self.mail.logout()
+            except Exception:
+                self._drop()
+            self.mail = None
+            self.selected = None
+
+class ConnectionPool:
+    """
+    IMAP 会话池，供批量模式的多个文件夹并发下载复用
+
+    取出的会话由使用者独占；放回池中的空闲会话由后台线程定期发送 NOOP 保活。
+    """
+
+    def __init__(self, connect: Callable[[], imaplib.IMAP4], size: int = 1, **options):
+        self._connect = connect
+        self._options = options
+        self.size = max(1, size)
+        self._idle: List[IMAPConnection] = []
+        self._created = 0
+        self._cond = threading.Condition()
+        self._closed = threading.Event()
+        keepalive = options.get("keepalive", 120)
+        self._keeper = threading.Thread(target=self._keepalive_loop, args=(keepalive,), daemon=True)
+        self._keeper.start()
+
+    def acquire(self) -> IMAPConnection:
+        with self._cond:
+            while not self._idle and self._created >= self.size:
+                self._cond.wait()
+            if self._idle:
+                return self._idle.pop()
+            self._created += 1
+        try:
+            return IMAPConnection(self._connect, **self._options).open()
+        except Exception:
+            with self._cond:
+                self._created -= 1
+                self._cond.notify()
+            raise
+
+    def release(self, conn: IMAPConnection):
+        conn.unselect()
+        with self._cond:
+            self._idle.append(conn)
+            self._cond.notify()
+
+    @contextmanager
+    def session(self):
+        """with pool.session() as conn: ... 使用完自动放回池中"""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def _keepalive_loop(self, keepalive: float):
+        while not self._closed.wait(max(keepalive / 2, 1)):
+            with self._cond:
+                idle = list(self._idle)
+            for conn in idle:
+                # 会话可能刚被取走，拿不到锁就跳过，由使用者自行保活
+                if conn.lock.acquire(blocking=False):
+                    try:
+                        conn.noop_if_idle()
+                    except Exception:
+                        pass
+                    finally:
+                        conn.lock.release()
+
+    def close(self):
+        self._closed.set()
+        with self._cond:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
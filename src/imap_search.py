@@ -0,0 +1,103 @@
+from datetime import date, datetime
+from typing import List, Optional, Tuple
+
+# ================= IMAP 服务器端搜索条件 =================
+# 把日期范围、发件人、主题等筛选条件转换为 IMAP SEARCH 条件交给服务器过滤，
+# 只枚举和下载相关的邮件，而不是每次 SEARCH ALL 拉取整个学期的邮件。
+#
+# 中文关键字需要以 CHARSET UTF-8 + literal 形式发送。imaplib 每条命令只能附带一个
+# literal，因此有多个非 ASCII 条件时分别搜索后取交集。
+
+_MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+# 值为字符串、需要加引号或以 literal 发送的搜索键
+_TEXT_KEYS = {"FROM", "SUBJECT"}
+
+def parse_date(value: str) -> date:
+    """解析命令行 / 界面输入的日期（YYYY-MM-DD）"""
+    return datetime.strptime(value.strip(), '%Y-%m-%d').date()
+
+def format_imap_date(value: date) -> str:
+    """IMAP 日期格式 1-Sep-2025（月份固定为英文缩写，不受系统区域设置影响）"""
+    return f"{value.day}-{_MONTHS[value.month - 1]}-{value.year}"
+
+def build_search_criteria(since: Optional[date] = None, before: Optional[date] = None,
+                          sender: str = "", subject: str = "") -> List[Tuple[str, str]]:
+    """
+    生成搜索条件列表 [(键, 值)]
+
+    Args:
+        since: 只搜索该日期（含）之后收到的邮件
+        before: 只搜索该日期（不含）之前收到的邮件
+        sender: 发件人地址或昵称中包含的文字
+        subject: 主题中包含的文字（可以是中文）
+    """
+    criteria = []
+    if since:
+        criteria.append(("SINCE", format_imap_date(since)))
+    if before:
+        criteria.append(("BEFORE", format_imap_date(before)))
+    if sender:
+        criteria.append(("FROM", sender.strip()))
+    if subject:
+        criteria.append(("SUBJECT", subject.strip()))
+    return criteria
+
+def describe_criteria(criteria: List[Tuple[str, str]]) -> str:
+    """用于日志输出的条件描述"""
+    if not criteria:
+        return "ALL"
+    return " ".join(f'{key} "{value}"' if key in _TEXT_KEYS else f"{key} {value}" for key, value in criteria)
+
+def _quote(value: str) -> str:
+    return '"' + value.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+def _run_search(mail, args: List[str], uid: bool, charset: Optional[str]) -> List[bytes]:
+    if uid:
+        if charset:
+            status, data = mail.uid('SEARCH', 'CHARSET', charset, *args)
+        else:
+            status, data = mail.uid('SEARCH', *args)
+    else:
+        status, data = mail.search(charset, *args)
+    if status != 'OK' or not data or not data[0]:
+        return []
+    return data[0].split()
+
+def search_messages(mail, criteria: List[Tuple[str, str]], uid: bool = False) -> List[bytes]:
+    """
+    在当前选中的文件夹中按条件搜索
+
+    Args:
+        criteria: build_search_criteria 生成的条件，可追加 ("UID", "n:*") 等其他条件
+        uid: 为 True 时使用 UID SEARCH，返回 UID；否则返回序号
+
+    Returns:
+        按服务器返回顺序排列的邮件序号或 UID
+    """
+    ascii_args = []
+    literals = []
+    for key, value in criteria:
+        if key not in _TEXT_KEYS:
+            ascii_args.extend([key, value])
+        elif value.isascii():
+            ascii_args.extend([key, _quote(value)])
+        else:
+            literals.append((key, value.encode('utf-8')))
+
+    if not literals:
+        return _run_search(mail, ascii_args or ["ALL"], uid, None)
+
+    # 每个非 ASCII 条件单独作为命令末尾的 literal 发送，结果取交集
+    results = None
+    for key, data in literals:
+        mail.literal = data
+        ids = _run_search(mail, ascii_args + [key], uid, 'UTF-8')
+        if results is None:
+            results = ids
+        else:
+            found = set(ids)
+            results = [i for i in results if i in found]
+        if not results:
+            break
+    return results
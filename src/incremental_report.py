@@ -0,0 +1,100 @@
+import os
+import math
+import pickle
+from typing import Dict, Optional
+import pandas as pd
+from openpyxl import load_workbook
+
+# ================= 增量报告工具 =================
+# 保存上一次分析的中间状态（已解析的提交、聚合结果、各工作表内容），
+# 再次运行时只重新解析有变化的文件夹，并且只改写内容有变化的行和工作表。
+
+def state_path(output_file: str) -> str:
+    """增量状态文件路径（与报告放在一起）"""
+    return output_file + '.state.pkl'
+
+def load_state(output_file: str, version: int) -> Optional[Dict]:
+    """读取上一次的增量状态，不存在、损坏或版本不符时返回 None"""
+    path = state_path(output_file)
+    if not os.path.exists(path) or not os.path.exists(output_file):
+        return None
+    try:
+        with open(path, 'rb') as f:
+            state = pickle.load(f)
+    except Exception as e:
+        print(f"⚠️ 读取增量状态失败，将全量重建: {e}")
+        return None
+    if not isinstance(state, dict) or state.get("version") != version:
+        return None
+    return state
+
+def save_state(output_file: str, state: Dict) -> None:
+    path = state_path(output_file)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+def _cell_value(value):
+    """把 pandas / numpy 的值转换为 openpyxl 可写入的值"""
+    if hasattr(value, 'item'):
+        value = value.item()
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+def _frame_rows(df: pd.DataFrame):
+    return [tuple(_cell_value(v) for v in row) for row in df.itertuples(index=False, name=None)]
+
+def write_sheets_incremental(output_file: str, sheets: Dict[str, pd.DataFrame],
+                             previous: Optional[Dict[str, pd.DataFrame]]) -> Dict[str, str]:
+    """
+    写入报告工作簿，只改写与上一次相比有变化的行
+
+    列和行数都没变的工作表逐行比较、只改写变化的单元格行；结构有变化的工作表整表重写；
+    本次没有的工作表会被删除。没有上一次的内容时整个工作簿全量写入。
+
+    Returns:
+        每个工作表的处理结果说明
+    """
+    if previous is None or not os.path.exists(output_file):
+        with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
+            for name, df in sheets.items():
+                df.to_excel(writer, sheet_name=name, index=False)
+        return {name: "全量写入" for name in sheets}
+
+    workbook = load_workbook(output_file)
+    actions = {}
+    for position, (name, df) in enumerate(sheets.items()):
+        old = previous.get(name)
+        new_rows = _frame_rows(df)
+        if (name in workbook.sheetnames and old is not None
+                and list(old.columns) == list(df.columns) and len(old) == len(df)):
+            old_rows = _frame_rows(old)
+            changed = [i for i, (a, b) in enumerate(zip(old_rows, new_rows)) if a != b]
+            if not changed:
+                actions[name] = "未变化"
+                continue
+            sheet = workbook[name]
+            for i in changed:
+                for j, value in enumerate(new_rows[i]):
+                    sheet.cell(row=i + 2, column=j + 1, value=value)
+            actions[name] = f"更新 {len(changed)} 行"
+        else:
+            if name in workbook.sheetnames:
+                position = workbook.sheetnames.index(name)
+                del workbook[name]
+            sheet = workbook.create_sheet(name, position)
+            sheet.append(list(df.columns))
+            for row in new_rows:
+                sheet.append(list(row))
+            actions[name] = "整表重写"
+
+    for name in list(workbook.sheetnames):
+        if name not in sheets:
+            del workbook[name]
+            actions[name] = "删除"
+
+    if any(action != "未变化" for action in actions.values()):
+        workbook.save(output_file)
+    return actions
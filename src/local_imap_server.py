@@ -0,0 +1,443 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地 IMAP 替身服务器
+
+实现下载器用到的 IMAP4rev1 子集（LOGIN / LIST / SELECT / SEARCH / FETCH / UID / NOOP / IDLE），
+SEARCH 支持 ALL、序号集合、UID、SINCE、BEFORE、FROM、SUBJECT 和 CHARSET，
+用于在不连接真实 QQ 邮箱的情况下测试下载器、监听模式和基准测试。
+
+用法：
+    python src/local_imap_server.py --port 1143 --folder 25TA --seed-dir 某个包含 .eml 的目录
+
+然后在 .env 中设置 IMAP_HOST=127.0.0.1、IMAP_PORT=1143、IMAP_SSL=0 即可让下载器连接本服务器。
+"""
+
+import os
+import re
+import glob
+import time
+import select
+import socket
+import argparse
+import threading
+import socketserver
+from datetime import date, datetime
+from email import message_from_bytes
+from email.header import decode_header, make_header
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, Optional
+
+CAPABILITIES = "IMAP4rev1 IDLE LITERAL+"
+
+# QQ 邮箱的自定义文件夹带有修改版 UTF-7 编码的前缀，这里模拟同样的路径形式
+DEFAULT_FOLDER_PREFIX = "&UXZO1mWHTvZZOQ-/"
+
+class Mailbox:
+    """单个文件夹中的邮件"""
+
+    def __init__(self, name: str, uidvalidity: int):
+        self.name = name
+        self.uidvalidity = uidvalidity
+        self.uidnext = 1
+        self.messages = []  # [{"uid", "data", "internaldate"}]
+
+    def append(self, data: bytes) -> int:
+        uid = self.uidnext
+        self.uidnext += 1
+        self.messages.append({"uid": uid, "data": data, "internaldate": _message_date(data)})
+        return uid
+
+class MailStore:
+    """线程安全的邮件存储，多个会话共享"""
+
+    def __init__(self):
+        self.lock = threading.Condition()
+        self.mailboxes: Dict[str, Mailbox] = {"INBOX": Mailbox("INBOX", 1)}
+
+    def add_folder(self, name: str) -> Mailbox:
+        with self.lock:
+            if name not in self.mailboxes:
+                self.mailboxes[name] = Mailbox(name, len(self.mailboxes) + 1)
+            return self.mailboxes[name]
+
+    def recreate_folder(self, name: str) -> Mailbox:
+        """删除并重建文件夹（模拟邮箱重建）：UIDVALIDITY 改变，UID 从 1 重新编号"""
+        with self.lock:
+            uidvalidity = max(mailbox.uidvalidity for mailbox in self.mailboxes.values()) + 1
+            self.mailboxes[name] = Mailbox(name, uidvalidity)
+            return self.mailboxes[name]
+
+    def append(self, folder: str, data: bytes) -> int:
+        with self.lock:
+            uid = self.add_folder(folder).append(data)
+            self.lock.notify_all()
+            return uid
+
+def _message_date(data: bytes) -> float:
+    """以 Date 头作为收件时间（INTERNALDATE），便于用固定日期的测试邮件检验 SINCE / BEFORE"""
+    try:
+        return parsedate_to_datetime(message_from_bytes(data)["Date"]).timestamp()
+    except Exception:
+        return time.time()
+
+def _header_text(data: bytes, name: str) -> str:
+    value = message_from_bytes(data)[name]
+    if value is None:
+        return ""
+    try:
+        return str(make_header(decode_header(value)))
+    except Exception:
+        return str(value)
+
+def _parse_imap_date(text: str) -> date:
+    return datetime.strptime(text, '%d-%b-%Y').date()
+
+def _parse_sequence_set(text: str, max_value: int) -> List[int]:
+    """解析 1,3:5,7:* 形式的序号集合"""
+    values = []
+    for part in text.split(','):
+        if ':' in part:
+            low, high = part.split(':', 1)
+            low = max_value if low == '*' else int(low)
+            high = max_value if high == '*' else int(high)
+            if low > high:
+                low, high = high, low
+            values.extend(range(low, high + 1))
+        else:
+            values.append(max_value if part == '*' else int(part))
+    return values
+
+class _Session(socketserver.StreamRequestHandler):
+    """单个客户端连接"""
+
+    def setup(self):
+        super().setup()
+        # 响应由多次小块写入组成，关闭 Nagle 算法，避免与客户端延迟确认叠加出每条命令约 40ms 的等待
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.store: MailStore = self.server.store
+        self.authenticated = False
+        self.selected: Optional[Mailbox] = None
+        self.reported_exists = 0
+
+    # ---------- 收发 ----------
+
+    def _send(self, line):
+        if isinstance(line, str):
+            line = line.encode('utf-8')
+        self.wfile.write(line + b'\r\n')
+        self.wfile.flush()
+
+    def _read_command(self) -> Optional[List]:
+        """读取一条完整命令（含 literal），返回 token 列表"""
+        tokens = []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return None
+            line = line.rstrip(b'\r\n')
+            literal = re.search(rb'\{(\d+)(\+?)\}$', line)
+            if not literal:
+                tokens.extend(self._tokenize(line))
+                return tokens
+            tokens.extend(self._tokenize(line[:literal.start()]))
+            if not literal.group(2):
+                self._send("+ Ready for literal data")
+            tokens.append(self.rfile.read(int(literal.group(1))))
+
+    @staticmethod
+    def _tokenize(line: bytes) -> List:
+        tokens = []
+        text = line.decode('utf-8', errors='replace')
+        i = 0
+        while i < len(text):
+            ch = text[i]
+            if ch == ' ':
+                i += 1
+            elif ch == '"':
+                j = i + 1
+                buf = []
+                while j < len(text) and text[j] != '"':
+                    if text[j] == '\\' and j + 1 < len(text):
+                        j += 1
+                    buf.append(text[j])
+                    j += 1
+                tokens.append(''.join(buf))
+                i = j + 1
+            elif ch == '(':
+                depth, j = 0, i
+                while j < len(text):
+                    depth += text[j] == '('
+                    depth -= text[j] == ')'
+                    j += 1
+                    if depth == 0:
+                        break
+                tokens.append(text[i:j])
+                i = j
+            else:
+                j = text.find(' ', i)
+                j = len(text) if j == -1 else j
+                tokens.append(text[i:j])
+                i = j
+        return tokens
+
+    # ---------- 主循环 ----------
+
+    def handle(self):
+        self._send(f"* OK [CAPABILITY {CAPABILITIES}] Local IMAP stand-in ready")
+        while True:
+            try:
+                tokens = self._read_command()
+            except (ConnectionError, OSError):
+                return
+            if tokens is None:
+                return
+            if len(tokens) < 2:
+                self._send("* BAD empty command")
+                continue
+            tag, command, args = tokens[0], str(tokens[1]).upper(), tokens[2:]
+            use_uid = False
+            if command == 'UID' and args:
+                use_uid = True
+                command, args = str(args[0]).upper(), args[1:]
+            handler = getattr(self, f"cmd_{command.lower()}", None)
+            if handler is None:
+                self._send(f"{tag} BAD unknown command {command}")
+                continue
+            if command not in ('CAPABILITY', 'LOGIN', 'LOGOUT', 'NOOP') and not self.authenticated:
+                self._send(f"{tag} NO not authenticated")
+                continue
+            try:
+                if handler(tag, args, use_uid) is False:
+                    return
+            except (ConnectionError, OSError):
+                return
+            except Exception as e:
+                self._send(f"{tag} BAD {e}")
+
+    # ---------- 命令 ----------
+
+    def cmd_capability(self, tag, args, use_uid):
+        self._send(f"* CAPABILITY {CAPABILITIES}")
+        self._send(f"{tag} OK CAPABILITY completed")
+
+    def cmd_login(self, tag, args, use_uid):
+        user, password = (str(a) if not isinstance(a, bytes) else a.decode() for a in args[:2])
+        if (user, password) != (self.server.user, self.server.password):
+            self._send(f"{tag} NO [AUTHENTICATIONFAILED] invalid credentials")
+            return
+        self.authenticated = True
+        self._send(f"{tag} OK LOGIN completed")
+
+    def cmd_logout(self, tag, args, use_uid):
+        self._send("* BYE logging out")
+        self._send(f"{tag} OK LOGOUT completed")
+        return False
+
+    def cmd_list(self, tag, args, use_uid):
+        with self.store.lock:
+            names = list(self.store.mailboxes)
+        for name in names:
+            self._send(f'* LIST (\\HasNoChildren) "/" "{name}"')
+        self._send(f"{tag} OK LIST completed")
+
+    def cmd_select(self, tag, args, use_uid):
+        name = args[0] if args else ''
+        name = name.decode() if isinstance(name, bytes) else name
+        with self.store.lock:
+            mailbox = self.store.mailboxes.get(name)
+            if mailbox is None:
+                self._send(f"{tag} NO mailbox does not exist")
+                return
+            self.selected = mailbox
+            self.reported_exists = len(mailbox.messages)
+            self._send(f"* {len(mailbox.messages)} EXISTS")
+            self._send("* 0 RECENT")
+            self._send(f"* OK [UIDVALIDITY {mailbox.uidvalidity}] UIDs valid")
+            self._send(f"* OK [UIDNEXT {mailbox.uidnext}] predicted next UID")
+        self._send(f"{tag} OK [READ-WRITE] SELECT completed")
+
+    cmd_examine = cmd_select
+
+    def cmd_close(self, tag, args, use_uid):
+        self.selected = None
+        self._send(f"{tag} OK CLOSE completed")
+
+    def _report_new_messages(self):
+        if self.selected is None:
+            return
+        with self.store.lock:
+            count = len(self.selected.messages)
+        if count != self.reported_exists:
+            self.reported_exists = count
+            self._send(f"* {count} EXISTS")
+
+    def cmd_noop(self, tag, args, use_uid):
+        self._report_new_messages()
+        self._send(f"{tag} OK NOOP completed")
+
+    def _select_messages(self, spec: str, use_uid: bool):
+        """按序号或 UID 集合选出邮件，返回 [(序号, 邮件)]"""
+        messages = self.selected.messages
+        if not messages:
+            return []
+        if use_uid:
+            wanted = set(_parse_sequence_set(spec, messages[-1]["uid"]))
+            return [(i + 1, m) for i, m in enumerate(messages) if m["uid"] in wanted]
+        wanted = set(_parse_sequence_set(spec, len(messages)))
+        return [(i + 1, m) for i, m in enumerate(messages) if (i + 1) in wanted]
+
+    def _search_matches(self, criteria: List, seq: int, message: Dict) -> bool:
+        i = 0
+        while i < len(criteria):
+            key = str(criteria[i]).upper()
+            if key == 'ALL':
+                i += 1
+            elif key == 'UID':
+                wanted = _parse_sequence_set(str(criteria[i + 1]), self.selected.messages[-1]["uid"])
+                if message["uid"] not in wanted:
+                    return False
+                i += 2
+            elif key in ('SINCE', 'BEFORE'):
+                received = datetime.fromtimestamp(message["internaldate"]).date()
+                wanted = _parse_imap_date(str(criteria[i + 1]))
+                if (received < wanted) if key == 'SINCE' else (received >= wanted):
+                    return False
+                i += 2
+            elif key in ('FROM', 'SUBJECT'):
+                value = criteria[i + 1]
+                if isinstance(value, bytes):
+                    value = value.decode(self.search_charset, errors='replace')
+                header = _header_text(message["data"], key.capitalize())
+                if value.lower() not in header.lower():
+                    return False
+                i += 2
+            elif re.match(r'^[\d:*,]+$', key):
+                if seq not in _parse_sequence_set(key, len(self.selected.messages)):
+                    return False
+                i += 1
+            else:
+                raise ValueError(f"unsupported search key {key}")
+        return True
+
+    def cmd_search(self, tag, args, use_uid):
+        if self.selected is None:
+            self._send(f"{tag} NO no mailbox selected")
+            return
+        criteria = list(args)
+        self.search_charset = 'us-ascii'
+        if criteria and str(criteria[0]).upper() == 'CHARSET':
+            self.search_charset = str(criteria[1])
+            criteria = criteria[2:]
+        with self.store.lock:
+            hits = [
+                str(m["uid"] if use_uid else i + 1)
+                for i, m in enumerate(self.selected.messages)
+                if self._search_matches(criteria, i + 1, m)
+            ]
+        self._send("* SEARCH" + ("".join(" " + h for h in hits)))
+        self._send(f"{tag} OK SEARCH completed")
+
+    def cmd_fetch(self, tag, args, use_uid):
+        if self.selected is None:
+            self._send(f"{tag} NO no mailbox selected")
+            return
+        spec, items = str(args[0]), str(args[1]).upper() if len(args) > 1 else 'RFC822'
+        with self.store.lock:
+            selected = self._select_messages(spec, use_uid)
+        for seq, message in selected:
+            parts = []
+            if use_uid or 'UID' in items:
+                parts.append(f"UID {message['uid']}".encode())
+            if 'RFC822.SIZE' in items:
+                parts.append(f"RFC822.SIZE {len(message['data'])}".encode())
+            if 'FLAGS' in items:
+                parts.append(b"FLAGS (\\Seen)")
+            body_item = None
+            if re.search(r'RFC822(?![.\w])', items):
+                body_item = b"RFC822"
+            elif 'BODY[]' in items or 'BODY.PEEK[]' in items:
+                body_item = b"BODY[]"
+            if body_item:
+                parts.append(body_item + b" {%d}\r\n" % len(message['data']) + message['data'])
+            self.wfile.write(b"* %d FETCH (" % seq + b" ".join(parts) + b")\r\n")
+        self.wfile.flush()
+        self._send(f"{tag} OK FETCH completed")
+
+    def cmd_idle(self, tag, args, use_uid):
+        self._send("+ idling")
+        while True:
+            readable, _, _ = select.select([self.connection], [], [], 0.1)
+            if readable:
+                line = self.rfile.readline()
+                if not line or line.strip().upper() == b'DONE':
+                    break
+            self._report_new_messages()
+        self._send(f"{tag} OK IDLE terminated")
+
+class LocalIMAPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    """
+    可在进程内启动的 IMAP 替身服务器
+
+    示例：
+        server = LocalIMAPServer(user="a@qq.com", password="secret")
+        server.store.append("&UXZO1mWHTvZZOQ-/25TA", raw_email_bytes)
+        server.start()
+        ...
+        server.stop()
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0,
+                 user: str = "test@qq.com", password: str = "password",
+                 store: Optional[MailStore] = None):
+        super().__init__((host, port), _Session)
+        self.user = user
+        self.password = password
+        self.store = store or MailStore()
+        self._thread = None
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+def main():
+    parser = argparse.ArgumentParser(description="本地 IMAP 替身服务器")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1143)
+    parser.add_argument("--user", default=os.getenv('QQ_EMAIL', 'test@qq.com'))
+    parser.add_argument("--password", default=os.getenv('QQ_PASSWORD', 'password'))
+    parser.add_argument("--folder", default=os.getenv('TARGET_FOLDER', '25TA'), help="文件夹名（会自动加上 QQ 邮箱风格的前缀）")
+    parser.add_argument("--seed-dir", help="包含 .eml 文件的目录，启动时导入")
+    args = parser.parse_args()
+
+    server = LocalIMAPServer(args.host, args.port, args.user, args.password)
+    folder = DEFAULT_FOLDER_PREFIX + args.folder
+    server.store.add_folder(folder)
+    if args.seed_dir:
+        for path in sorted(glob.glob(os.path.join(args.seed_dir, '*.eml'))):
+            with open(path, 'rb') as f:
+                server.store.append(folder, f.read())
+
+    count = len(server.store.mailboxes[folder].messages)
+    print(f"本地 IMAP 服务器已启动: {args.host}:{server.port}，文件夹 {folder}，{count} 封邮件")
+    print("按 Ctrl+C 停止")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
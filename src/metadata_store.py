@@ -0,0 +1,174 @@
+import os
+import json
+import gzip
+import tempfile
+from datetime import date, datetime
+from typing import Any, Dict, Optional
+
+try:
+    import zstandard
+except ImportError:  # zstd 为可选依赖，未安装时使用 gzip
+    zstandard = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+# ================= 邮件元数据存储格式 =================
+# email_metadata.json 只保存体积小、解析快的头部信息（解析信息、发送时间、附件列表等），
+# 邮件正文单独压缩保存为 email_body.txt.zst / email_body.txt.gz，只在需要时读取。
+# 旧版把「邮件正文」直接写在 email_metadata.json 中，读取函数对两种格式都兼容。
+
+METADATA_FILENAME = 'email_metadata.json'
+BODY_FILENAME_ZSTD = 'email_body.txt.zst'
+BODY_FILENAME_GZIP = 'email_body.txt.gz'
+
+# 下载目录中由程序生成、不属于学生附件的文件
+METADATA_FILES = {METADATA_FILENAME, BODY_FILENAME_ZSTD, BODY_FILENAME_GZIP}
+
+# ================= JSON 序列化后端 =================
+# 优先使用 orjson / ujson，未安装时回退到标准库 json。
+# datetime / date 统一编码为 ISO 8601 字符串（orjson 原生支持），不再依赖 default=str。
+
+def _json_default(obj: Any):
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    raise TypeError(f"无法序列化类型 {type(obj).__name__}")
+
+def _stdlib_dumps(obj: Any) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':'), default=_json_default).encode('utf-8')
+
+def _stdlib_loads(data: bytes) -> Any:
+    return json.loads(data)
+
+JSON_BACKENDS = {"json": (_stdlib_dumps, _stdlib_loads)}
+
+if ujson is not None:
+    JSON_BACKENDS["ujson"] = (
+        lambda obj: ujson.dumps(obj, ensure_ascii=False, default=_json_default).encode('utf-8'),
+        ujson.loads,
+    )
+
+if orjson is not None:
+    JSON_BACKENDS["orjson"] = (
+        lambda obj: orjson.dumps(obj, default=_json_default),
+        orjson.loads,
+    )
+
+def _default_backend() -> str:
+    configured = os.getenv('METADATA_JSON_BACKEND', '')
+    if configured in JSON_BACKENDS:
+        return configured
+    for name in ("orjson", "ujson", "json"):
+        if name in JSON_BACKENDS:
+            return name
+
+_backend = _default_backend()
+
+def set_json_backend(name: str) -> None:
+    """切换 JSON 后端（json / ujson / orjson），主要用于基准测试"""
+    global _backend
+    if name not in JSON_BACKENDS:
+        raise ValueError(f"未安装的 JSON 后端: {name}，可用: {', '.join(JSON_BACKENDS)}")
+    _backend = name
+
+def get_json_backend() -> str:
+    return _backend
+
+def dumps(obj: Any) -> bytes:
+    """序列化为 UTF-8 编码的紧凑 JSON"""
+    return JSON_BACKENDS[_backend][0](obj)
+
+def loads(data) -> Any:
+    """反序列化 JSON（接受 bytes 或 str）"""
+    return JSON_BACKENDS[_backend][1](data)
+
+def _compress_body(body: str):
+    """压缩正文，返回 (文件名, 压缩后的字节)"""
+    data = body.encode('utf-8')
+    if zstandard is not None:
+        return BODY_FILENAME_ZSTD, zstandard.ZstdCompressor(level=10).compress(data)
+    return BODY_FILENAME_GZIP, gzip.compress(data, compresslevel=6)
+
+def _decompress_body(filename: str, data: bytes) -> str:
+    if filename.endswith('.zst'):
+        if zstandard is None:
+            raise RuntimeError("读取 zstd 压缩的正文需要安装 zstandard")
+        return zstandard.ZstdDecompressor().decompress(data).decode('utf-8')
+    return gzip.decompress(data).decode('utf-8')
+
+def _write_replace(path: str, data: bytes) -> None:
+    """
+    先写入同目录的临时文件再替换目标文件
+
+    替换会更新所在文件夹的修改时间，提交索引据此发现元数据被改写；
+    写入中途出错时原文件保持不变。
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+def save_metadata(folder_path: str, metadata: Dict) -> None:
+    """
+    保存邮件元数据：头部写入 email_metadata.json，正文压缩后单独保存
+    """
+    header = dict(metadata)
+    body = header.pop("邮件正文", "")
+    try:
+        if body:
+            body_filename, data = _compress_body(body)
+            _write_replace(os.path.join(folder_path, body_filename), data)
+            header["正文文件"] = body_filename
+
+        _write_replace(os.path.join(folder_path, METADATA_FILENAME), dumps(header))
+    except Exception as e:
+        print(f"  ! 保存元数据失败: {e}")
+
+def load_metadata(folder_path: str) -> Optional[Dict]:
+    """
+    读取邮件元数据头部，文件不存在时返回 None
+
+    旧格式的文件仍包含「邮件正文」字段，原样返回。
+    """
+    metadata_file = os.path.join(folder_path, METADATA_FILENAME)
+    if not os.path.exists(metadata_file):
+        return None
+    with open(metadata_file, 'rb') as f:
+        return loads(f.read())
+
+def load_email_body(folder_path: str, metadata: Optional[Dict] = None) -> str:
+    """
+    按需读取邮件正文
+
+    Args:
+        metadata: 已加载的元数据头部，为 None 时从文件读取
+    """
+    if metadata is None:
+        metadata = load_metadata(folder_path) or {}
+
+    # 旧格式：正文直接保存在元数据中
+    if "邮件正文" in metadata:
+        return metadata["邮件正文"] or ""
+
+    body_filename = metadata.get("正文文件")
+    if not body_filename:
+        return ""
+    body_file = os.path.join(folder_path, body_filename)
+    if not os.path.exists(body_file):
+        return ""
+    with open(body_file, 'rb') as f:
+        return _decompress_body(body_filename, f.read())
@@ -0,0 +1,250 @@
+import os
+import re
+import hashlib
+import sqlite3
+import zipfile
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    from pypdf import PdfReader
+except ImportError:  # pypdf 为可选依赖，未安装时跳过 PDF 附件
+    PdfReader = None
+
+PDF_SUPPORTED = PdfReader is not None
+
+# ================= 相似作业检测 =================
+# 除了逐字节相同的文件，还要找出互相抄袭、只改了少量内容的报告：
+#   1. 从 docx / pdf / txt 等附件中提取正文，去掉空白和标点后切成字符 5-gram（中文没有分词，用字符更稳）
+#   2. 每份附件计算 128 维 MinHash 签名，估计两份附件 5-gram 集合的 Jaccard 相似度
+#   3. 签名分成 32 段（每段 4 行）做 LSH 分桶，只比较至少有一段完全相同的附件对，
+#      不做两两全量比较，数千份提交也是近似线性的
+#   4. 候选对用签名估计相似度，不低于阈值的写入报告
+# 作业模板（题目、表格框架等所有人都有的内容）通过 --template 指定，其 5-gram 在计算签名前从每份附件中去掉，
+# 不会让所有提交都显得相似。没有排除的公共内容会形成很大的桶，桶内仍逐对比较，并打印桶的大小作为提示。
+# 签名缓存在 SAVE_DIR 下的 similarity_index.db 中，按文件路径、大小、修改时间和模板失效，
+# 再次分析时只需处理新增或修改过的附件。
+
+SHINGLE_SIZE = 5
+NUM_PERM = 128
+BANDS = 32
+ROWS_PER_BAND = NUM_PERM // BANDS
+MIN_SHINGLES = 50  # 正文太短（如只有姓名学号）的附件不参与比较
+LARGE_BUCKET_SIZE = 20  # 同一段签名完全相同的附件达到该数量时打印提示（多为未排除的模板或大面积抄袭）
+INDEX_FILENAME = 'similarity_index.db'
+MAX_TEXT_BYTES = 8 * 1024 * 1024  # 文本类附件最多读取的字节数
+
+TEXT_EXTENSIONS = ('.txt', '.md', '.py', '.c', '.cpp', '.java')
+SUPPORTED_EXTENSIONS = TEXT_EXTENSIONS + ('.docx', '.pdf')
+
+# MinHash 的置换用 multiply-shift 哈希 ((a*x + b) mod 2^64) >> 32 代替取模素数，
+# 全部是 uint64 上的原地乘加和移位，比逐元素取模快数倍
+_rng = np.random.RandomState(20250101)  # 固定种子，缓存的签名在不同运行之间可比
+_PERM_A = (_rng.randint(0, 2 ** 62, size=(NUM_PERM, 1), dtype=np.uint64) << np.uint64(1)) | np.uint64(1)
+_PERM_B = _rng.randint(0, 2 ** 62, size=(NUM_PERM, 1), dtype=np.uint64)
+_SHINGLE_BASE = np.uint64(1099511628211)
+_SHIFT = np.uint64(32)
+_NON_TEXT = re.compile(r'[\W_]+')
+_DOCX_TEXT = re.compile(r'<w:t(?:\s[^>]*)?>([^<]*)</w:t>|<w:p[\s>/]')
+
+def _read_text_file(path: str) -> str:
+    # 超大的文本（如数据集）只取开头部分，不把整个文件读入内存
+    with open(path, 'rb') as f:
+        data = f.read(MAX_TEXT_BYTES)
+    for encoding in ('utf-8', 'gbk'):
+        try:
+            return data.decode(encoding)
+        except UnicodeDecodeError as e:
+            if len(data) == MAX_TEXT_BYTES and e.start >= len(data) - 4:  # 截断在多字节字符中间
+                return data[:e.start].decode(encoding, errors='ignore')
+    return data.decode('utf-8', errors='ignore')
+
+def _read_docx(path: str) -> str:
+    with zipfile.ZipFile(path) as archive:
+        xml = archive.read('word/document.xml').decode('utf-8', errors='ignore')
+    return '\n'.join(match.group(1) or '' for match in _DOCX_TEXT.finditer(xml))
+
+def _read_pdf(path: str) -> str:
+    reader = PdfReader(path)
+    return '\n'.join(page.extract_text() or '' for page in reader.pages)
+
+def extract_text(path: str) -> Optional[str]:
+    """提取附件正文，不支持的格式或读取失败时返回 None"""
+    extension = os.path.splitext(path)[1].lower()
+    try:
+        if extension in TEXT_EXTENSIONS:
+            return _read_text_file(path)
+        if extension == '.docx':
+            return _read_docx(path)
+        if extension == '.pdf' and PdfReader is not None:
+            return _read_pdf(path)
+    except Exception as e:
+        print(f"  ! 无法提取正文 {os.path.basename(path)}: {e}")
+    return None
+
+def shingle_hashes(text: str) -> np.ndarray:
+    """正文归一化（小写，去掉空白和标点）后所有字符 5-gram 的 32 位哈希（去重）"""
+    normalized = _NON_TEXT.sub('', text.lower())
+    count = len(normalized) - SHINGLE_SIZE + 1
+    if count <= 0:
+        return np.empty(0, dtype=np.uint64)
+    # 按码位做多项式滚动哈希，一次算出所有 5-gram
+    codes = np.frombuffer(normalized.encode('utf-32-le'), dtype=np.uint32).astype(np.uint64)
+    hashes = np.zeros(count, dtype=np.uint64)
+    for offset in range(SHINGLE_SIZE):
+        hashes *= _SHINGLE_BASE
+        hashes += codes[offset:offset + count]
+    hashes ^= hashes >> _SHIFT
+    return np.unique(hashes & np.uint64(0xFFFFFFFF))
+
+def template_hashes(paths: Iterable[str]) -> np.ndarray:
+    """作业模板文件的 5-gram 哈希（并集），无法提取正文的模板会被跳过"""
+    parts = [np.empty(0, dtype=np.uint64)]
+    for path in paths:
+        text = extract_text(path)
+        if text is None:
+            print(f"  ! 无法读取模板 {path}，已忽略")
+            continue
+        parts.append(shingle_hashes(text))
+    return np.unique(np.concatenate(parts))
+
+def minhash_signature(hashes: np.ndarray, chunk: int = 4096) -> np.ndarray:
+    """MinHash 签名：每个置换下的最小哈希值，分块计算控制内存"""
+    signature = np.full(NUM_PERM, np.iinfo(np.uint32).max, dtype=np.uint32)
+    for start in range(0, len(hashes), chunk):
+        permuted = np.multiply(_PERM_A, hashes[start:start + chunk])
+        permuted += _PERM_B
+        permuted >>= _SHIFT
+        np.minimum(signature, permuted.min(axis=1).astype(np.uint32), out=signature)
+    return signature
+
+def estimate_similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """两个签名相同分量的比例，即 Jaccard 相似度的估计"""
+    return float(np.count_nonzero(a == b)) / NUM_PERM
+
+class SignatureIndex:
+    """
+    附件签名缓存（SQLite），键为文件路径，大小、修改时间或模板变化时重新计算
+
+    Args:
+        templates: 作业模板的 5-gram 哈希（template_hashes 的结果），计算签名前从附件中去掉
+    """
+
+    def __init__(self, save_dir: str, templates: Optional[np.ndarray] = None):
+        self.conn = sqlite3.connect(os.path.join(save_dir, INDEX_FILENAME))
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS signatures ("
+            " path TEXT PRIMARY KEY, size INTEGER, mtime REAL, shingles INTEGER, signature BLOB, template TEXT)"
+        )
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(signatures)")}
+        if "template" not in columns:  # 旧版缓存没有模板列
+            self.conn.execute("ALTER TABLE signatures ADD COLUMN template TEXT")
+        self.templates = templates if templates is not None and len(templates) else None
+        self.template_key = hashlib.sha1(self.templates.tobytes()).hexdigest() if self.templates is not None else ""
+        self.cached = 0
+        self.computed = 0
+
+    def get(self, path: str) -> Optional[np.ndarray]:
+        """附件的签名；正文（去掉模板内容后）太短或无法提取时返回 None"""
+        stat = os.stat(path)
+        row = self.conn.execute("SELECT size, mtime, shingles, signature, template FROM signatures WHERE path = ?",
+                                (path,)).fetchone()
+        if (row is not None and row[0] == stat.st_size and row[1] == stat.st_mtime
+                and (row[4] or "") == self.template_key):
+            self.cached += 1
+            shingles, blob = row[2], row[3]
+        else:
+            self.computed += 1
+            text = extract_text(path)
+            hashes = shingle_hashes(text) if text else np.empty(0, dtype=np.uint64)
+            if self.templates is not None:
+                hashes = np.setdiff1d(hashes, self.templates, assume_unique=True)
+            shingles = len(hashes)
+            blob = minhash_signature(hashes).tobytes() if shingles >= MIN_SHINGLES else None
+            self.conn.execute("INSERT OR REPLACE INTO signatures VALUES (?, ?, ?, ?, ?, ?)",
+                              (path, stat.st_size, stat.st_mtime, shingles, blob, self.template_key))
+        if shingles < MIN_SHINGLES or blob is None:
+            return None
+        return np.frombuffer(blob, dtype=np.uint32)
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+def candidate_pairs(signatures: np.ndarray) -> Tuple[List[Tuple[int, int]], List[List[int]]]:
+    """
+    LSH 分桶
+
+    Returns:
+        (至少有一段签名完全相同的 (i, j) 对（i < j，不重复）,
+         成员数不少于 LARGE_BUCKET_SIZE 的桶（成员相同的桶只保留一个）)
+    """
+    pairs, seen = [], set()
+    large, seen_large = [], set()
+    for band in range(BANDS):
+        buckets: Dict[bytes, List[int]] = defaultdict(list)
+        rows = signatures[:, band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]
+        for i, key in enumerate(rows):
+            buckets[key.tobytes()].append(i)
+        for members in buckets.values():
+            if len(members) < 2:
+                continue
+            if len(members) >= LARGE_BUCKET_SIZE and frozenset(members) not in seen_large:
+                seen_large.add(frozenset(members))
+                large.append(members)
+            for x, i in enumerate(members):
+                for j in members[x + 1:]:
+                    if (i, j) not in seen:
+                        seen.add((i, j))
+                        pairs.append((i, j))
+    return pairs, large
+
+def find_similar_attachments(items: List[Dict], index: SignatureIndex,
+                             threshold: float, label: str = "") -> List[Tuple[Dict, Dict, float]]:
+    """
+    在同一作业的附件中查找相似的附件对（同一学生的附件之间不比较）
+
+    Args:
+        items: 附件列表，每项包含 path（附件路径）和 student（学生标识）
+        index: 签名缓存
+        threshold: 估计相似度不低于该值的附件对才返回（由调用方从 .env 的 SIMILARITY_THRESHOLD 读取）
+        label: 提示信息的前缀，如作业名称
+
+    Returns:
+        [(附件 A, 附件 B, 估计相似度)]，按相似度从高到低排列
+    """
+    usable, signatures = [], []
+    for item in items:
+        signature = index.get(item["path"])
+        if signature is not None:
+            usable.append(item)
+            signatures.append(signature)
+    if len(usable) < 2:
+        return []
+    matrix = np.vstack(signatures)
+    candidates, large = candidate_pairs(matrix)
+    for members in sorted(large, key=len, reverse=True):
+        students = len({usable[i]["student"] for i in members})
+        print(f"   ⚠️ {label}{len(members)} 份附件（{students} 名学生）有一段签名完全相同，"
+              f"可能是未排除的作业模板或大面积抄袭，例如 {usable[members[0]]['file']}")
+    pairs = []
+    for i, j in candidates:
+        if usable[i]["student"] == usable[j]["student"]:
+            continue
+        similarity = estimate_similarity(matrix[i], matrix[j])
+        if similarity >= threshold:
+            pairs.append((usable[i], usable[j], similarity))
+    pairs.sort(key=lambda pair: -pair[2])
+    return pairs
+
+def attachment_items(submission: Dict) -> List[Dict]:
+    """提交中可提取正文的附件"""
+    return [
+        {"path": os.path.join(submission['文件夹路径'], filename), "file": filename,
+         "student": f"{submission['学号']}_{submission['姓名']}", "submission": submission}
+        for filename in submission['附件文件']
+        if filename.lower().endswith(SUPPORTED_EXTENSIONS)
+        and os.path.isfile(os.path.join(submission['文件夹路径'], filename))
+    ]
@@ -0,0 +1,139 @@
+import json
+import math
+import time
+import threading
+import unicodedata
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional
+
+# ================= 下载性能统计 =================
+# 记录下载过程中各阶段（LIST / SELECT / SEARCH / FETCH、MIME 解析、正文提取、
+# 学生信息合并、文件写入等）的耗时和字节数，结束时输出汇总表，
+# 也可以追加写入 JSON Lines 文件，便于对比多次运行的趋势。
+
+def percentile(samples: List[float], p: float) -> float:
+    """最近秩法百分位数，samples 需已排序"""
+    if not samples:
+        return 0.0
+    rank = max(1, math.ceil(p / 100 * len(samples)))
+    return samples[min(rank, len(samples)) - 1]
+
+def _pad(text: str, width: int) -> str:
+    """按显示宽度左对齐（中文字符占两列）"""
+    shown = sum(2 if unicodedata.east_asian_width(ch) in 'WF' else 1 for ch in text)
+    return text + " " * max(width - shown, 0)
+
+class _StageRecord:
+    """stage() 上下文中可追加本次处理的字节数"""
+    __slots__ = ("bytes",)
+
+    def __init__(self, nbytes: int = 0):
+        self.bytes = nbytes
+
+class StageTimer:
+    """线程安全的分阶段计时器"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started = time.perf_counter()
+            self.durations: Dict[str, List[float]] = defaultdict(list)
+            self.stage_bytes: Dict[str, int] = defaultdict(int)
+            self.messages = 0
+            self.message_bytes = 0
+
+    def add(self, name: str, seconds: float, nbytes: int = 0):
+        with self._lock:
+            self.durations[name].append(seconds)
+            self.stage_bytes[name] += nbytes
+
+    @contextmanager
+    def stage(self, name: str, nbytes: int = 0):
+        """
+        记录一个阶段的耗时
+
+        with PERF.stage("FETCH") as record:
+            data = ...
+            record.bytes = len(data)
+        """
+        record = _StageRecord(nbytes)
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            self.add(name, time.perf_counter() - start, record.bytes)
+
+    def count_message(self, nbytes: int):
+        """每处理完一封邮件调用一次，用于计算邮件/秒和整体吞吐量"""
+        with self._lock:
+            self.messages += 1
+            self.message_bytes += nbytes
+
+    def summary(self) -> Dict:
+        """汇总结果（秒 / 字节），可直接序列化为 JSON"""
+        with self._lock:
+            wall = time.perf_counter() - self.started
+            stages = {}
+            for name, samples in self.durations.items():
+                ordered = sorted(samples)
+                total = sum(ordered)
+                nbytes = self.stage_bytes[name]
+                stages[name] = {
+                    "count": len(ordered),
+                    "total_seconds": total,
+                    "p50_seconds": percentile(ordered, 50),
+                    "p95_seconds": percentile(ordered, 95),
+                    "bytes": nbytes,
+                    "bytes_per_second": nbytes / total if total > 0 and nbytes else 0.0,
+                }
+            return {
+                "wall_seconds": wall,
+                "messages": self.messages,
+                "bytes": self.message_bytes,
+                "messages_per_second": self.messages / wall if wall > 0 else 0.0,
+                "bytes_per_second": self.message_bytes / wall if wall > 0 else 0.0,
+                "stages": stages,
+            }
+
+    def print_summary(self, title: str = "下载性能统计"):
+        result = self.summary()
+        print(f"\n--- {title} ---")
+        print(f"总耗时 {result['wall_seconds']:.2f} 秒，邮件 {result['messages']} 封，"
+              f"{result['bytes'] / 1024 / 1024:.2f} MB，"
+              f"{result['messages_per_second']:.2f} 封/秒，{result['bytes_per_second'] / 1024 / 1024:.2f} MB/秒")
+        if not result["stages"]:
+            return
+        print(f"{_pad('阶段', 14)}{'次数':>8}{'总耗时(秒)':>12}{'占比':>8}{'p50(毫秒)':>12}{'p95(毫秒)':>12}{'MB/秒':>10}")
+        wall = result["wall_seconds"] or 1.0
+        for name, stage in sorted(result["stages"].items(), key=lambda item: -item[1]["total_seconds"]):
+            throughput = f"{stage['bytes_per_second'] / 1024 / 1024:.2f}" if stage["bytes"] else "-"
+            print(f"{_pad(name, 14)}{stage['count']:>8}{stage['total_seconds']:>12.3f}"
+                  f"{stage['total_seconds'] / wall * 100:>7.1f}%"
+                  f"{stage['p50_seconds'] * 1000:>12.2f}{stage['p95_seconds'] * 1000:>12.2f}{throughput:>10}")
+
+    def write_json(self, path: str, label: str = ""):
+        """把本次汇总作为一行 JSON 追加到 path（JSON Lines），便于记录趋势"""
+        result = self.summary()
+        result["timestamp"] = datetime.now().isoformat(timespec="seconds")
+        if label:
+            result["label"] = label
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(result, ensure_ascii=False) + "\n")
+
+# 下载脚本共用的全局计时器
+PERF = StageTimer()
+
+def report(json_path: Optional[str] = None, label: str = ""):
+    """打印汇总表，指定 json_path 时同时追加写入 JSON"""
+    PERF.print_summary()
+    if json_path:
+        try:
+            PERF.write_json(json_path, label)
+            print(f"📈 性能数据已追加到: {json_path}")
+        except Exception as e:
+            print(f"  ! 写入性能数据失败: {e}")
@@ -0,0 +1,137 @@
+import os
+import sys
+import time
+import atexit
+import pstats
+import cProfile
+import threading
+from collections import Counter
+from datetime import datetime
+from typing import Optional
+
+# ================= 性能剖析开关 =================
+# 各脚本的 --profile 选项：
+#   --profile / --profile cprofile   cProfile 统计（.prof，可用 snakeviz / pstats 查看）
+#   --profile sample                 只做采样，开销最小
+#   --profile pyinstrument           pyinstrument 报告（.html，需要安装 pyinstrument）
+# 三种模式都会同时运行一个采样线程，输出可直接交给 flamegraph.pl / speedscope
+# 生成火焰图的折叠调用栈文件（.collapsed.txt）。所有文件写入 profiles/ 目录。
+
+PROFILE_DIR = os.getenv('PROFILE_DIR', 'profiles')
+PROFILE_MODES = ("cprofile", "sample", "pyinstrument")
+SAMPLE_INTERVAL = 0.005  # 采样间隔（秒）
+
+try:
+    import pyinstrument
+except ImportError:  # pyinstrument 为可选依赖
+    pyinstrument = None
+
+def add_profile_argument(parser):
+    """给脚本的 argparse 添加统一的 --profile 选项"""
+    parser.add_argument("--profile", nargs="?", const="cprofile", choices=PROFILE_MODES,
+                        help=f"性能剖析，结果写入 {PROFILE_DIR}/（默认 cprofile，可选 sample / pyinstrument）")
+
+class StackSampler:
+    """定时抓取所有线程的调用栈，统计折叠栈（flamegraph collapsed 格式）"""
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL):
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        own_ident = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def write(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+class Profiler:
+    """一次剖析会话，进程退出时自动写出结果"""
+
+    def __init__(self, mode: str, name: str):
+        self.mode = mode
+        self.name = name
+        self.base = os.path.join(PROFILE_DIR, f"{name}-{datetime.now().strftime('%Y%m%d-%H%M%S')}")
+        self.sampler = StackSampler()
+        self.cprofile = cProfile.Profile() if mode == "cprofile" else None
+        self.pyinstrument = None
+        if mode == "pyinstrument":
+            if pyinstrument is None:
+                print("⚠️ 未安装 pyinstrument，改为只输出采样结果（pip install pyinstrument）")
+            else:
+                self.pyinstrument = pyinstrument.Profiler()
+        self.started = 0.0
+
+    def start(self):
+        self.started = time.perf_counter()
+        self.sampler.start()
+        if self.cprofile is not None:
+            self.cprofile.enable()
+        if self.pyinstrument is not None:
+            self.pyinstrument.start()
+        atexit.register(self.stop)
+        return self
+
+    def stop(self):
+        if self.cprofile is not None:
+            self.cprofile.disable()
+        if self.pyinstrument is not None:
+            self.pyinstrument.stop()
+        self.sampler.stop()
+        elapsed = time.perf_counter() - self.started
+
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        written = []
+        collapsed = self.base + ".collapsed.txt"
+        self.sampler.write(collapsed)
+        written.append(collapsed)
+
+        if self.cprofile is not None:
+            prof = self.base + ".prof"
+            self.cprofile.dump_stats(prof)
+            written.append(prof)
+        if self.pyinstrument is not None:
+            html = self.base + ".html"
+            with open(html, 'w', encoding='utf-8') as f:
+                f.write(self.pyinstrument.output_html())
+            written.append(html)
+
+        print(f"\n🔬 性能剖析完成（{self.mode}，{elapsed:.2f} 秒，{sum(self.sampler.stacks.values())} 个采样）")
+        for path in written:
+            print(f"   {path}")
+        if self.cprofile is not None:
+            print("--- 累计耗时前 15 的函数 ---")
+            pstats.Stats(self.cprofile, stream=sys.stdout).sort_stats("cumulative").print_stats(15)
+
+def start_profiling(mode: Optional[str], name: str) -> Optional[Profiler]:
+    """
+    按 --profile 的取值开始剖析，mode 为 None 时什么也不做
+
+    Args:
+        name: 脚本名，用作输出文件名前缀
+    """
+    if not mode:
+        return None
+    return Profiler(mode, name).start()
@@ -0,0 +1,116 @@
+import sys
+import json
+import time
+import threading
+from typing import Dict, Optional
+
+# ================= 下载进度通道 =================
+# GUI 以子进程方式运行下载脚本。加上 --progress 后，下载脚本在标准输出中
+# 穿插以 PROGRESS_PREFIX 开头的 JSON 行（已完成 / 总数、字节数、速率、预计剩余时间），
+# GUI 逐行读取：进度行用来更新进度条，其余行照常显示在日志区。
+# 取消时 GUI 向子进程的标准输入写入一行 "cancel"，下载脚本在处理完当前邮件后停止，
+# 正常关闭索引数据库和 IMAP 连接。
+
+PROGRESS_PREFIX = "@@progress "
+CANCEL_COMMAND = "cancel"
+
+class ProgressReporter:
+    """线程安全的进度统计，enabled 时按 interval 秒节流输出进度行"""
+
+    def __init__(self, interval: float = 0.2):
+        self.interval = interval
+        self.enabled = False
+        self.cancelled = threading.Event()
+        self._lock = threading.Lock()
+        self.started = time.monotonic()
+        self.total = 0
+        self.done = 0
+        self.failed = 0
+        self.bytes = 0
+        self._last_emit = 0.0
+
+    def enable(self, listen: bool = True):
+        """开启进度输出，listen 时在后台线程监听标准输入中的取消命令"""
+        self.enabled = True
+        self.started = time.monotonic()
+        if hasattr(sys.stdout, "reconfigure"):
+            sys.stdout.reconfigure(line_buffering=True)  # 管道中也要逐行送达
+        if listen:
+            threading.Thread(target=self._listen, daemon=True).start()
+
+    def _listen(self):
+        for line in sys.stdin:
+            if line.strip() == CANCEL_COMMAND:
+                print("⏹ 收到取消请求，处理完当前邮件后停止...")
+                self.cancelled.set()
+                self.emit(force=True)
+                return
+
+    def add_total(self, count: int):
+        with self._lock:
+            self.total += count
+        self.emit(force=True)
+
+    def advance(self, nbytes: int = 0, count: int = 1, failed: bool = False):
+        """完成 count 封邮件（failed 表示重试后仍失败）"""
+        with self._lock:
+            if failed:
+                self.failed += count
+            else:
+                self.done += count
+                self.bytes += nbytes
+        self.emit()
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            elapsed = time.monotonic() - self.started
+            finished = self.done + self.failed
+            rate = self.done / elapsed if elapsed > 0 else 0.0
+            remaining = max(self.total - finished, 0)
+            return {
+                "done": self.done,
+                "failed": self.failed,
+                "total": self.total,
+                "bytes": self.bytes,
+                "elapsed": elapsed,
+                "messages_per_second": rate,
+                "bytes_per_second": self.bytes / elapsed if elapsed > 0 else 0.0,
+                "eta": remaining / rate if rate > 0 else None,
+                "cancelled": self.cancelled.is_set(),
+            }
+
+    def emit(self, force: bool = False, event: str = "progress"):
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_emit < self.interval:
+            return
+        self._last_emit = now
+        data = self.snapshot()
+        data["event"] = event
+        print(PROGRESS_PREFIX + json.dumps(data), flush=True)
+
+    def finish(self):
+        """输出最后一条进度（event 为 done）"""
+        self.emit(force=True, event="done")
+
+# 下载脚本共用的全局进度
+PROGRESS = ProgressReporter()
+
+def parse_progress_line(line: str) -> Optional[Dict]:
+    """GUI 端：是进度行时返回数据字典，否则返回 None"""
+    if not line.startswith(PROGRESS_PREFIX):
+        return None
+    try:
+        return json.loads(line[len(PROGRESS_PREFIX):])
+    except ValueError:
+        return None
+
+def format_eta(seconds: Optional[float]) -> str:
+    """把剩余秒数格式化为 mm:ss / h:mm:ss"""
+    if seconds is None:
+        return "--:--"
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes:02d}:{seconds:02d}"
@@ -1,38 +1,46 @@
 import os
 import re
-import json
 from datetime import datetime
 from typing import Dict, List, Optional, Tuple
 from email_content_parser import extract_info_from_subject, extract_info_from_body, extract_info_from_filename, extract_info_from_sender, combine_extraction_results
+from metadata_store import METADATA_FILENAME, METADATA_FILES, load_metadata
+from submission_index import NOT_INDEXED, lookup_indexed_metadata, lookup_indexed_attachments
+from attachment_inspect import INSPECT_FIELDS, attachment_warnings
+from archive_inspect import is_archive, archive_member_names
 
 def get_email_metadata(folder_path: str) -> Optional[Dict]:
     """
-    读取邮件元数据文件
+    读取邮件元数据，存在提交索引时直接从索引读取
     """
-    metadata_file = os.path.join(folder_path, 'email_metadata.json')
-    if os.path.exists(metadata_file):
-        try:
-            with open(metadata_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception as e:
-            print(f"读取元数据文件失败 {metadata_file}")
+    metadata = lookup_indexed_metadata(folder_path)
+    if metadata is not NOT_INDEXED:
+        return metadata
+    
+    try:
+        return load_metadata(folder_path)
+    except Exception as e:
+        print(f"读取元数据文件失败 {os.path.join(folder_path, METADATA_FILENAME)}")
     return None
 
-def extract_info_from_attachments(folder_path: str) -> Optional[Dict]:
+def extract_info_from_attachments(folder_path: str, files: Optional[List[str]] = None) -> Optional[Dict]:
     """
     从附件文件名中提取学生信息
-    """
-    if not os.path.exists(folder_path):
-        return None
     
-    # 获取文件夹中的所有文件（排除元数据文件）
-    files = []
-    for item in os.listdir(folder_path):
-        if item == 'email_metadata.json':
-            continue
-        item_path = os.path.join(folder_path, item)
-        if os.path.isfile(item_path):
-            files.append(item)
+    Args:
+        files: 已知的附件文件名列表（如来自索引数据库），提供时不再读取目录
+    """
+    if files is None:
+        if not os.path.exists(folder_path):
+            return None
+        
+        # 获取文件夹中的所有文件（排除元数据文件）
+        files = []
+        for item in os.listdir(folder_path):
+            if item in METADATA_FILES:
+                continue
+            item_path = os.path.join(folder_path, item)
+            if os.path.isfile(item_path):
+                files.append(item)
     
     if not files:
         return None
@@ -48,7 +56,20 @@ def extract_info_from_attachments(folder_path: str) -> Optional[Dict]:
     target_file = priority_files[0] if priority_files else files[0]
     
     # 使用专门的文件名解析函数
-    return extract_info_from_filename_improved(target_file)
+    result = extract_info_from_filename_improved(target_file)
+    
+    # 外层文件名解析不出学号时，改用压缩包内的文件名（文档优先，只读目录不解压）
+    if not result["student_id"] and any(is_archive(filename) for filename in files):
+        inner = archive_member_names(folder_path, files)
+        inner.sort(key=lambda name: os.path.splitext(name)[1].lower() not in ['.pdf', '.doc', '.docx'])
+        for filename in inner:
+            candidate = extract_info_from_filename_improved(filename)
+            if candidate["confidence"] > result["confidence"]:
+                candidate["source"] = "压缩包内文件名"
+                result = candidate
+            if result["student_id"]:
+                break
+    return result
 
 def extract_info_from_filename_improved(filename: str) -> Dict[str, any]:
     """
@@ -164,13 +185,16 @@ def extract_info_from_filename_improved(filename: str) -> Dict[str, any]:
     
     return result
 
-def smart_parse_folder_name(folder_path: str, folder_name: str) -> Dict[str, str]:
+def smart_parse_folder_name(folder_path: str, folder_name: str,
+                            files: Optional[List[str]] = None, metadata: Optional[Dict] = None) -> Dict[str, str]:
     """
     智能解析文件夹名称，优先使用邮件元数据中的解析结果
     
     Args:
         folder_path: 文件夹路径
         folder_name: 文件夹名称
+        files: 已知的附件文件名列表，为 None 时读取目录
+        metadata: 已加载的邮件元数据，为 None 时读取元数据文件
         
     Returns:
         包含解析结果的字典
@@ -188,7 +212,7 @@ def smart_parse_folder_name(folder_path: str, folder_name: str) -> Dict[str, str
     
     # 智能解析模式
     # 1. 首先尝试从附件文件名解析（最高优先级）
-    attachment_info = extract_info_from_attachments(folder_path)
+    attachment_info = extract_info_from_attachments(folder_path, files)
     if attachment_info and attachment_info.get("confidence", 0) > 30:
         return {
             "original_text": folder_name,
@@ -201,7 +225,8 @@ def smart_parse_folder_name(folder_path: str, folder_name: str) -> Dict[str, str
         }
     
     # 2. 尝试从邮件元数据获取解析结果
-    metadata = get_email_metadata(folder_path)
+    if metadata is None:
+        metadata = get_email_metadata(folder_path)
     if metadata and "解析信息" in metadata:
         parsed_info = metadata["解析信息"]
         if parsed_info["confidence"] > 30:  # 置信度阈值
@@ -452,12 +477,13 @@ def extract_assignment_name(assignment_text: str) -> str:
     
     return assignment_text[:10] if len(assignment_text) > 10 else assignment_text
 
-def get_folder_modification_time(folder_path: str) -> datetime:
+def get_folder_modification_time(folder_path: str, metadata: Optional[Dict] = None) -> datetime:
     """
     获取文件夹的提交时间，优先使用邮件元数据中的时间
     """
     # 首先尝试从元数据获取时间
-    metadata = get_email_metadata(folder_path)
+    if metadata is None:
+        metadata = get_email_metadata(folder_path)
     if metadata and "发送时间" in metadata:
         try:
             dt = datetime.fromisoformat(metadata["发送时间"])
@@ -474,8 +500,8 @@ def get_folder_modification_time(folder_path: str) -> datetime:
     try:
         for root, dirs, files in os.walk(folder_path):
             for file in files:
-                if file == 'email_metadata.json':
-                    continue  # 跳过元数据文件
+                if file in METADATA_FILES:
+                    continue  # 跳过元数据和正文文件
                 file_path = os.path.join(root, file)
                 file_time = datetime.fromtimestamp(os.path.getmtime(file_path))
                 if file_time > latest_time:
@@ -493,26 +519,37 @@ def get_submission_files_info(folder_path: str) -> Tuple[int, List[str], List[Di
     """
     获取提交文件的信息，包括文件名、大小等
     """
-    if not os.path.exists(folder_path):
-        return 0, [], []
-    
     files = []
     file_details = []
     
     # 首先尝试从元数据获取文件信息
     metadata = get_email_metadata(folder_path)
+    indexed_attachments = None
+    if not (metadata and "附件列表" in metadata):
+        indexed_attachments = lookup_indexed_attachments(folder_path)
+    
     if metadata and "附件列表" in metadata:
         for attachment in metadata["附件列表"]:
             files.append(attachment["文件名"])
-            file_details.append({
+            detail = {
                 "文件名": attachment["文件名"],
                 "大小": attachment.get("大小", 0),
                 "类型": attachment.get("类型", "unknown")
-            })
+            }
+            # 下载时记录的实际类型、页数和哈希
+            detail.update({key: attachment[key] for key in INSPECT_FIELDS if key in attachment})
+            file_details.append(detail)
+    elif indexed_attachments is not None:
+        # 索引中记录了磁盘上的附件
+        for attachment in indexed_attachments:
+            files.append(attachment["文件名"])
+            file_details.append(attachment)
+    elif not os.path.exists(folder_path):
+        return 0, [], []
     else:
         # 从文件系统获取信息
         for item in os.listdir(folder_path):
-            if item == 'email_metadata.json':
+            if item in METADATA_FILES:
                 continue
             item_path = os.path.join(folder_path, item)
             if os.path.isfile(item_path):
@@ -551,6 +588,12 @@ def analyze_submission_quality(folder_path: str) -> Dict[str, any]:
             quality_info["可疑文件"].append(f"{detail['文件名']} (空文件)")
         elif detail["大小"] < 1024:  # 小于1KB
             quality_info["可疑文件"].append(f"{detail['文件名']} (文件过小)")
+    # 扩展名与实际类型不符、内容重复的附件（依据下载时记录的信息，不读取文件）
+    quality_info["可疑文件"].extend(attachment_warnings(file_details))
+    
+    pages = [detail["页数"] for detail in file_details if detail.get("页数")]
+    if pages:
+        quality_info["总页数"] = sum(pages)
     
     # 简单的质量评分（基于文件数量和大小）
     score = 0
@@ -0,0 +1,183 @@
+import os
+import csv
+from collections import defaultdict
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+# ================= 学生名册 =================
+# 学号和姓名来自正则解析，写错一位学号或姓名错别字都会在报告中多出一个“学生”。
+# 提供名册文件（CSV / xlsx，包含学号和姓名两列）后，每份提交都会对齐到名册中最接近的学生：
+#   1. 学号完全一致（哈希表）
+#   2. 学号编辑距离不超过 1：每个学号预先登记「删掉一个字符」的所有变体，
+#      查询时只需查自身和自身的删除变体，十几次哈希查找即可找到全部候选；候选有多个时用姓名区分
+#   3. 姓名一致或只差一个字（单字 n-gram 索引找候选），且学号编辑距离不超过 2
+#   4. 没有学号或学号对不上时，按姓名查找：完全一致且唯一，或三个字以上的姓名只差一个字且唯一
+# 学号长度相同、数字随机，彼此的编辑距离都差不多，BK 树剪枝效果很差，所以学号用删除变体索引。
+# 对不上的提交保留原样，并标记为「不在名册中」。
+
+ID_COLUMNS = ("学号", "id", "student_id", "学生学号")
+NAME_COLUMNS = ("姓名", "name", "学生姓名")
+MAX_ID_DISTANCE_WITH_NAME = 2  # 姓名也对得上时允许的学号编辑距离
+
+def edit_distance(a: str, b: str) -> int:
+    """Levenshtein 编辑距离"""
+    if a == b:
+        return 0
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+def _deletions(text: str) -> set:
+    """删掉一个字符得到的所有字符串"""
+    return {text[:i] + text[i + 1:] for i in range(len(text))}
+
+class RosterEntry:
+    __slots__ = ("student_id", "name")
+
+    def __init__(self, student_id: str, name: str):
+        self.student_id = student_id
+        self.name = name
+
+    @property
+    def key(self) -> str:
+        """与分析脚本一致的学生标识：学号_姓名"""
+        return f"{self.student_id}_{self.name}"
+
+class Roster:
+    """名册索引：学号哈希表、学号删除变体索引、姓名单字索引"""
+
+    def __init__(self, entries: List[Tuple[str, str]], source: str = ""):
+        self.source = source
+        self.entries: List[RosterEntry] = []
+        self.by_id: Dict[str, RosterEntry] = {}
+        self.by_name: Dict[str, List[RosterEntry]] = defaultdict(list)
+        self.name_grams: Dict[str, set] = defaultdict(set)
+        self.id_variants: Dict[str, set] = defaultdict(set)
+        for student_id, name in entries:
+            if not student_id or student_id in self.by_id:
+                continue
+            entry = RosterEntry(student_id, name)
+            self.entries.append(entry)
+            self.by_id[student_id] = entry
+            for variant in _deletions(student_id) | {student_id}:
+                self.id_variants[variant].add(student_id)
+            if name:
+                self.by_name[name].append(entry)
+                for gram in set(name):
+                    self.name_grams[gram].add(name)
+        self._match = lru_cache(maxsize=65536)(self._lookup)
+
+    def __len__(self):
+        return len(self.entries)
+
+    @property
+    def keys(self) -> List[str]:
+        return [entry.key for entry in self.entries]
+
+    def _names_near(self, name: str) -> List[Tuple[int, str]]:
+        """姓名只差一个字的候选（至少共享 len-1 个字）"""
+        counts: Dict[str, int] = defaultdict(int)
+        for gram in set(name):
+            for candidate in self.name_grams.get(gram, ()):
+                counts[candidate] += 1
+        need = max(1, len(set(name)) - 1)
+        near = []
+        for candidate, shared in counts.items():
+            if shared >= need:
+                distance = edit_distance(name, candidate)
+                if distance <= 1:
+                    near.append((distance, candidate))
+        return sorted(near)
+
+    def _ids_near(self, student_id: str) -> List[str]:
+        """编辑距离为 1 的名册学号"""
+        candidates = set()
+        for variant in _deletions(student_id) | {student_id}:
+            candidates.update(self.id_variants.get(variant, ()))
+        return [value for value in candidates if edit_distance(student_id, value) == 1]
+
+    def _lookup(self, student_id: str, name: str) -> Tuple[Optional[RosterEntry], str]:
+        if student_id:
+            entry = self.by_id.get(student_id)
+            if entry is not None:
+                return entry, "学号一致"
+            if name:
+                named = sorted((edit_distance(student_id, entry.student_id), entry.student_id)
+                               for _, candidate in self._names_near(name) for entry in self.by_name[candidate])
+                named = [(distance, value) for distance, value in named if distance <= MAX_ID_DISTANCE_WITH_NAME]
+                if len(named) == 1 or (named and named[0][0] < named[1][0]):
+                    return self.by_id[named[0][1]], f"学号相近（差 {named[0][0]} 位）且姓名相符"
+            close = self._ids_near(student_id)
+            if len(close) == 1:
+                return self.by_id[close[0]], "学号相近（差 1 位）"
+        if name:
+            exact = self.by_name.get(name, [])
+            if len(exact) == 1:
+                return exact[0], "姓名一致"
+            if not exact and len(name) >= 3:
+                near = self._names_near(name)
+                if len(near) == 1 and len(self.by_name[near[0][1]]) == 1:
+                    return self.by_name[near[0][1]][0], "姓名相近（差 1 字）"
+        return None, "不在名册中"
+
+    def match(self, student_id: str, name: str) -> Tuple[Optional[RosterEntry], str]:
+        """
+        查找最接近的名册条目
+
+        Returns:
+            (名册条目或 None, 匹配方式说明)
+        """
+        return self._match(student_id or "", name or "")
+
+def _pick_column(header: List[str], names, fallback: int) -> int:
+    lowered = [str(column).strip().lower() for column in header]
+    for name in names:
+        if name.lower() in lowered:
+            return lowered.index(name.lower())
+    return fallback
+
+def _read_rows(path: str) -> List[List[str]]:
+    if path.lower().endswith(('.xlsx', '.xls')):
+        import pandas as pd
+        df = pd.read_excel(path, dtype=str, header=None).fillna("")
+        return df.values.tolist()
+    for encoding in ('utf-8-sig', 'gbk'):
+        try:
+            with open(path, 'r', encoding=encoding, newline='') as f:
+                return list(csv.reader(f))
+        except UnicodeDecodeError:
+            continue
+    raise ValueError(f"无法识别名册文件编码: {path}")
+
+def load_roster(path: str) -> Roster:
+    """
+    读取名册文件（CSV 或 xlsx）
+
+    第一行为表头时按「学号」「姓名」列名取值，否则使用前两列。
+    """
+    rows = [[str(cell).strip() for cell in row] for row in _read_rows(path) if any(str(cell).strip() for cell in row)]
+    if not rows:
+        return Roster([], path)
+    header = rows[0]
+    has_header = not any(cell.isdigit() for cell in header)
+    id_column = _pick_column(header, ID_COLUMNS, 0) if has_header else 0
+    name_column = _pick_column(header, NAME_COLUMNS, 1) if has_header else 1
+    entries = []
+    for row in rows[1:] if has_header else rows:
+        student_id = row[id_column] if id_column < len(row) else ""
+        if student_id.endswith('.0'):  # Excel 把学号存成数字时
+            student_id = student_id[:-2]
+        entries.append((student_id, row[name_column] if name_column < len(row) else ""))
+    return Roster(entries, path)
+
+def roster_fingerprint(path: str) -> Optional[str]:
+    """名册文件的标识（路径和修改时间），名册变化时增量分析需要全量重算"""
+    if not path:
+        return None
+    return f"{os.path.abspath(path)}|{os.path.getmtime(path)}"
@@ -0,0 +1,451 @@
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+from metadata_store import METADATA_FILENAME, METADATA_FILES, load_metadata, dumps, loads
+
+# ================= 提交索引数据库 =================
+# 下载器在 SAVE_DIR 下维护一个 SQLite 数据库，集中记录邮件、附件、解析出的学生信息和时间，
+# 分析脚本与 GUI 直接查询该数据库，不再逐个目录扫描和读取 email_metadata.json。
+
+INDEX_FILENAME = 'submission_index.db'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    folder_name      TEXT PRIMARY KEY,
+    mail_id          TEXT,
+    subject          TEXT,
+    sender           TEXT,
+    recipient        TEXT,
+    send_time        TEXT,
+    receive_time     TEXT,
+    student_id       TEXT,
+    name             TEXT,
+    assignment       TEXT,
+    confidence       REAL,
+    source           TEXT,
+    attachment_count INTEGER,
+    metadata         TEXT,
+    indexed_at       TEXT,
+    folder_mtime     REAL
+);
+CREATE TABLE IF NOT EXISTS attachments (
+    folder_name  TEXT NOT NULL,
+    filename     TEXT NOT NULL,
+    size         INTEGER,
+    content_type TEXT,
+    created_at   TEXT,
+    PRIMARY KEY (folder_name, filename)
+);
+CREATE TABLE IF NOT EXISTS sync_state (
+    mailbox     TEXT PRIMARY KEY,
+    uidvalidity INTEGER,
+    last_uid    INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_messages_student_id ON messages(student_id);
+CREATE INDEX IF NOT EXISTS idx_messages_assignment ON messages(assignment);
+CREATE INDEX IF NOT EXISTS idx_messages_send_time ON messages(send_time);
+"""
+
+# get_metadata 的返回标记：文件夹不在索引中
+NOT_INDEXED = object()
+
+def _iso(value) -> str:
+    """时间字段统一以 ISO 8601 字符串存入索引，便于按范围查询"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value or ""
+
+def index_path(save_dir: str) -> str:
+    """返回索引数据库文件路径"""
+    return os.path.join(save_dir, INDEX_FILENAME)
+
+class SubmissionIndex:
+    """SAVE_DIR 下的提交索引数据库"""
+
+    def __init__(self, save_dir: str):
+        self.save_dir = save_dir
+        self.path = index_path(save_dir)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+        self._migrate()
+        self.conn.commit()
+
+    def _migrate(self) -> None:
+        """为旧版索引补充新增的列"""
+        columns = {row["name"] for row in self.conn.execute("PRAGMA table_info(messages)")}
+        if "folder_mtime" not in columns:
+            self.conn.execute("ALTER TABLE messages ADD COLUMN folder_mtime REAL")
+
+    def _upsert_message(self, folder_name: str, metadata: Optional[Dict], folder_mtime: Optional[float]) -> None:
+        metadata = metadata or {}
+        student_info = metadata.get("解析信息") or {}
+        # 正文体积较大且分析时用不到，不写入索引
+        slim = {k: v for k, v in metadata.items() if k != "邮件正文"}
+        self.conn.execute(
+            """
+            INSERT OR REPLACE INTO messages (
+                folder_name, mail_id, subject, sender, recipient, send_time, receive_time,
+                student_id, name, assignment, confidence, source, attachment_count,
+                metadata, indexed_at, folder_mtime
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                folder_name,
+                metadata.get("邮件ID", ""),
+                metadata.get("原始主题", ""),
+                metadata.get("发件人", ""),
+                metadata.get("收件人", ""),
+                _iso(metadata.get("发送时间", "")),
+                _iso(metadata.get("接收时间", "")),
+                student_info.get("student_id", ""),
+                student_info.get("name", ""),
+                student_info.get("assignment", ""),
+                student_info.get("confidence", 0),
+                student_info.get("source", ""),
+                metadata.get("附件数量", 0),
+                dumps(slim).decode('utf-8') if slim else None,
+                datetime.now().isoformat(),
+                folder_mtime,
+            ),
+        )
+
+    def record_message(self, metadata: Dict, folder_mtime: Optional[float] = None) -> None:
+        """
+        写入（或覆盖）一封邮件的元数据及其附件
+
+        与 email_metadata.json 的语义一致：同名文件夹以最后一封邮件为准，附件则累加。
+
+        Args:
+            folder_mtime: 写入后文件夹的修改时间，供增量刷新判断是否需要重新读取
+        """
+        folder_name = metadata.get("文件夹名称", "")
+        with self._lock:
+            self._upsert_message(folder_name, metadata, folder_mtime)
+            self.conn.executemany(
+                """
+                INSERT OR REPLACE INTO attachments (folder_name, filename, size, content_type, created_at)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                [
+                    (folder_name, att["文件名"], att.get("大小", 0), att.get("类型", ""), _iso(att.get("创建时间", "")))
+                    for att in metadata.get("附件列表", [])
+                ],
+            )
+            self.conn.commit()
+
+    def _index_folder(self, folder_name: str, folder_path: str, folder_mtime: float) -> None:
+        """从磁盘读取单个文件夹的元数据与附件列表写入索引"""
+        metadata = None
+        files = []
+        for item in os.listdir(folder_path):
+            if item == METADATA_FILENAME:
+                try:
+                    metadata = load_metadata(folder_path)
+                except Exception as e:
+                    print(f"读取元数据文件失败 {os.path.join(folder_path, item)}: {e}")
+            elif item in METADATA_FILES:
+                continue
+            elif os.path.isfile(os.path.join(folder_path, item)):
+                files.append(item)
+
+        known = {}
+        if metadata:
+            known = {att.get("文件名"): att for att in metadata.get("附件列表", [])}
+        attachments = []
+        for filename in files:
+            att = known.get(filename)
+            if att is None:
+                att = {"大小": os.path.getsize(os.path.join(folder_path, filename))}
+            attachments.append((folder_name, filename, att.get("大小", 0), att.get("类型", ""), _iso(att.get("创建时间", ""))))
+
+        self._upsert_message(folder_name, metadata, folder_mtime)
+        self.conn.execute("DELETE FROM attachments WHERE folder_name = ?", (folder_name,))
+        self.conn.executemany(
+            """
+            INSERT OR REPLACE INTO attachments (folder_name, filename, size, content_type, created_at)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            attachments,
+        )
+
+    def refresh(self, full: bool = False) -> Dict[str, int]:
+        """
+        与磁盘目录同步索引
+
+        只列一次 SAVE_DIR，按文件夹修改时间判断是否需要重新读取，未变化的文件夹不再打开
+        email_metadata.json；已删除的文件夹从索引中移除。
+
+        Args:
+            full: 为 True 时忽略修改时间，重新读取所有文件夹
+
+        Returns:
+            新增 / 更新 / 删除 / 未变化的文件夹数量
+        """
+        stats = {"新增": 0, "更新": 0, "删除": 0, "未变化": 0}
+        with self._lock:
+            known = {
+                row["folder_name"]: row["folder_mtime"]
+                for row in self.conn.execute("SELECT folder_name, folder_mtime FROM messages")
+            }
+            seen = set()
+            with os.scandir(self.save_dir) as entries:
+                for entry in entries:
+                    if not entry.is_dir():
+                        continue
+                    seen.add(entry.name)
+                    mtime = entry.stat().st_mtime
+                    indexed_mtime = known.get(entry.name)
+                    if not full and indexed_mtime is not None and indexed_mtime >= mtime:
+                        stats["未变化"] += 1
+                        continue
+                    try:
+                        self._index_folder(entry.name, entry.path, mtime)
+                    except OSError as e:
+                        print(f"索引文件夹失败 {entry.path}: {e}")
+                        continue
+                    stats["更新" if entry.name in known else "新增"] += 1
+
+            removed = [(name,) for name in known if name not in seen]
+            if removed:
+                self.conn.executemany("DELETE FROM messages WHERE folder_name = ?", removed)
+                self.conn.executemany("DELETE FROM attachments WHERE folder_name = ?", removed)
+                stats["删除"] = len(removed)
+            self.conn.commit()
+        return stats
+
+    def get_metadata(self, folder_name: str, folder_mtime: Optional[float] = None):
+        """
+        读取索引中的元数据
+
+        Args:
+            folder_mtime: 文件夹当前的修改时间；给出时，建立索引后又有变化的文件夹视为未索引
+
+        Returns:
+            文件夹不在索引中时返回 NOT_INDEXED；已索引但没有元数据文件时返回 None
+        """
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT metadata, folder_mtime FROM messages WHERE folder_name = ?", (folder_name,)
+            ).fetchone()
+        if row is None:
+            return NOT_INDEXED
+        if folder_mtime is not None and (row["folder_mtime"] is None or row["folder_mtime"] < folder_mtime):
+            return NOT_INDEXED
+        return loads(row["metadata"]) if row["metadata"] else None
+
+    def get_attachments(self, folder_name: str) -> List[Dict]:
+        """读取索引中某个文件夹的附件信息"""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT filename, size, content_type FROM attachments WHERE folder_name = ? ORDER BY filename",
+                (folder_name,),
+            ).fetchall()
+        return [{"文件名": row["filename"], "大小": row["size"] or 0, "类型": row["content_type"] or "unknown"} for row in rows]
+
+    def get_last_uid(self, mailbox: str, uidvalidity: int) -> int:
+        """读取某个邮箱文件夹已处理到的最大 UID，UIDVALIDITY 变化时从头开始"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT uidvalidity, last_uid FROM sync_state WHERE mailbox = ?", (mailbox,)
+            ).fetchone()
+        if row is None or row["uidvalidity"] != uidvalidity:
+            return 0
+        return row["last_uid"]
+
+    def set_last_uid(self, mailbox: str, uidvalidity: int, last_uid: int) -> None:
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO sync_state (mailbox, uidvalidity, last_uid) VALUES (?, ?, ?)",
+                (mailbox, uidvalidity, last_uid),
+            )
+            self.conn.commit()
+
+    def _attachments_by_folder(self) -> Dict[str, List[str]]:
+        files = {}
+        for row in self.conn.execute("SELECT folder_name, filename FROM attachments ORDER BY folder_name, filename"):
+            files.setdefault(row["folder_name"], []).append(row["filename"])
+        return files
+
+    def iter_folders(self) -> Iterator[Dict]:
+        """按文件夹输出提交记录，格式与 iter_submission_records 一致"""
+        with self._lock:
+            files = self._attachments_by_folder()
+            rows = self.conn.execute(
+                "SELECT folder_name, metadata, folder_mtime, indexed_at FROM messages ORDER BY folder_name"
+            ).fetchall()
+        for row in rows:
+            folder = row["folder_name"]
+            yield {
+                "folder": folder,
+                "folder_path": os.path.join(self.save_dir, folder),
+                "files": files.get(folder, []),
+                "metadata": loads(row["metadata"]) if row["metadata"] else None,
+                "fingerprint": f"{row['folder_mtime']}|{row['indexed_at']}",
+            }
+
+    def query_messages(self, student_id: str = "", assignment: str = "",
+                       since: str = "", until: str = "", limit: int = 1000) -> List[Dict]:
+        """
+        按学号、作业、发送时间范围查询邮件记录
+
+        Args:
+            student_id: 学号（精确匹配）
+            assignment: 作业名（模糊匹配）
+            since / until: ISO 格式时间范围，闭区间 / 开区间
+        """
+        clauses = []
+        params = []
+        if student_id:
+            clauses.append("student_id = ?")
+            params.append(student_id)
+        if assignment:
+            clauses.append("assignment LIKE ?")
+            params.append(f"%{assignment}%")
+        if since:
+            clauses.append("send_time >= ?")
+            params.append(since)
+        if until:
+            clauses.append("send_time < ?")
+            params.append(until)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        sql = (
+            "SELECT folder_name, mail_id, subject, sender, send_time, student_id, name, assignment, "
+            f"confidence, attachment_count FROM messages {where} ORDER BY send_time LIMIT ?"
+        )
+        params.append(limit)
+        with self._lock:
+            return [dict(row) for row in self.conn.execute(sql, params)]
+
+    def count_messages(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self.conn.close()
+
+def open_index(save_dir: str, create: bool = False) -> Optional[SubmissionIndex]:
+    """
+    打开索引数据库
+
+    Args:
+        create: 为 False 时若数据库不存在则返回 None
+    """
+    if not create and not os.path.exists(index_path(save_dir)):
+        return None
+    if create and not os.path.exists(save_dir):
+        os.makedirs(save_dir)
+    return SubmissionIndex(save_dir)
+
+def list_attachment_files(folder_path: str) -> List[str]:
+    """列出文件夹中的附件（排除元数据文件）"""
+    files = []
+    for item in os.listdir(folder_path):
+        if item in METADATA_FILES:
+            continue
+        if os.path.isfile(os.path.join(folder_path, item)):
+            files.append(item)
+    return files
+
+def iter_submission_records(save_dir: str) -> Iterator[Dict]:
+    """
+    遍历所有提交记录，优先查询索引数据库，索引不存在时回退到目录扫描
+
+    每条记录包含 folder、folder_path、files（附件文件名列表）、metadata
+    （索引中的元数据；目录扫描时为 None，由解析函数按需读取）和 fingerprint
+    （文件夹内容变化时随之变化的标识，供增量分析判断是否需要重新解析）。
+    """
+    index = open_index(save_dir)
+    if index is not None:
+        try:
+            # 先增量同步新出现或有变化的文件夹
+            index.refresh()
+            records = list(index.iter_folders())
+        finally:
+            index.close()
+        yield from records
+        return
+
+    with os.scandir(save_dir) as entries:
+        for entry in entries:
+            if not entry.is_dir():
+                continue
+            metadata_file = os.path.join(entry.path, METADATA_FILENAME)
+            metadata_mtime = os.path.getmtime(metadata_file) if os.path.exists(metadata_file) else None
+            yield {
+                "folder": entry.name,
+                "folder_path": entry.path,
+                "files": list_attachment_files(entry.path),
+                "metadata": None,
+                "fingerprint": f"{entry.stat().st_mtime}|{metadata_mtime}",
+            }
+
+# 按 SAVE_DIR 缓存已打开的索引，供 get_email_metadata 等按文件夹查询时复用
+_index_cache = {}  # SAVE_DIR 绝对路径 -> (数据库文件 inode, SubmissionIndex)
+_index_cache_lock = threading.Lock()
+
+def _cached_index(save_dir: str) -> Optional[SubmissionIndex]:
+    """
+    返回缓存的索引；数据库不存在时不缓存，之后被创建（如 GUI 运行期间开始下载）即可使用，
+    数据库文件被删除或重建时重新打开
+    """
+    key = os.path.abspath(save_dir)
+    try:
+        inode = os.stat(index_path(key)).st_ino
+    except OSError:
+        inode = None
+    with _index_cache_lock:
+        cached = _index_cache.get(key)
+        if cached is not None and cached[0] == inode:
+            return cached[1]
+        if cached is not None:
+            cached[1].close()
+            del _index_cache[key]
+        if inode is None:
+            return None
+        index = open_index(key)
+        _index_cache[key] = (inode, index)
+        return index
+
+def _current_metadata(folder_path: str):
+    """查询索引中的元数据，文件夹在建立索引后被修改过时返回 NOT_INDEXED（由调用方读取磁盘）"""
+    index = _cached_index(os.path.dirname(folder_path))
+    if index is None:
+        return NOT_INDEXED
+    try:
+        folder_mtime = os.path.getmtime(folder_path)
+    except OSError:
+        return NOT_INDEXED
+    return index.get_metadata(os.path.basename(folder_path), folder_mtime)
+
+def lookup_indexed_metadata(folder_path: str):
+    """
+    从文件夹所在 SAVE_DIR 的索引中读取元数据
+
+    Returns:
+        没有索引、文件夹未被索引或索引已过期时返回 NOT_INDEXED
+    """
+    return _current_metadata(os.path.abspath(folder_path))
+
+def lookup_indexed_attachments(folder_path: str) -> Optional[List[Dict]]:
+    """从索引中读取附件信息，没有索引、文件夹未被索引或索引已过期时返回 None"""
+    folder_path = os.path.abspath(folder_path)
+    if _current_metadata(folder_path) is NOT_INDEXED:
+        return None
+    return _cached_index(os.path.dirname(folder_path)).get_attachments(os.path.basename(folder_path))
+
+def consolidate_metadata(save_dir: str, full: bool = False) -> Dict[str, int]:
+    """
+    把已有下载目录中分散的 email_metadata.json 合并到索引数据库
+
+    再次运行时只处理新出现或有变化的文件夹。
+    """
+    index = open_index(save_dir, create=True)
+    try:
+        return index.refresh(full=full)
+    finally:
+        index.close()
@@ -0,0 +1,353 @@
+import os
+import math
+import threading
+import tkinter as tk
+from tkinter import ttk
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+# ================= 结果表格预览 =================
+# 之前的预览用 pd.read_excel 读入整个文件的第一个工作表，再把 head(10) 打印到文本框。
+# 这里把每个工作表读成按列存放的缓存（每列一份显示文本和一份排序用的值），
+# Treeview 只创建可见的几十行，滚动时按偏移量从缓存中取行改写，
+# 5 万行的「学生详细报告」也能流畅滚动、排序和筛选。
+
+ALL_COLUMNS = "（全部列）"
+
+def _sort_key(value):
+    """数字按大小排序，空值排在最后，其余按文本排序"""
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return (2, 0, "")
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return (0, value, "")
+    return (1, 0, str(value))
+
+def _display(value) -> str:
+    """单元格显示文本：空值显示为空，整数值的浮点数（含空值的整数列）去掉 .0"""
+    rank = _sort_key(value)[0]
+    if rank == 2:
+        return ""
+    if rank == 0 and isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+class ColumnarTable:
+    """按列缓存的表格数据"""
+
+    def __init__(self, columns: List[str], values: Dict[str, list]):
+        self.columns = columns
+        self.values = values
+        self.text = {column: [_display(value) for value in values[column]] for column in columns}
+        self._lower: Dict[str, List[str]] = {}
+        self.row_count = len(values[columns[0]]) if columns else 0
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "ColumnarTable":
+        columns = [str(column) for column in df.columns]
+        return cls(columns, {name: df[column].tolist() for name, column in zip(columns, df.columns)})
+
+    @classmethod
+    def empty(cls, columns: List[str]) -> "ColumnarTable":
+        return cls(columns, {column: [] for column in columns})
+
+    def append_rows(self, records: List[Dict]):
+        """按列追加行（后台解析时逐批加入）"""
+        for column in self.columns:
+            values = [record.get(column) for record in records]
+            texts = [_display(value) for value in values]
+            self.values[column].extend(values)
+            self.text[column].extend(texts)
+            if column in self._lower:
+                self._lower[column].extend(text.lower() for text in texts)
+        self.row_count += len(records)
+
+    def row(self, index: int) -> List[str]:
+        return [self.text[column][index] for column in self.columns]
+
+    def _lowered(self, column: str) -> List[str]:
+        if column not in self._lower:
+            self._lower[column] = [text.lower() for text in self.text[column]]
+        return self._lower[column]
+
+    def filter(self, column: Optional[str], keyword: str) -> List[int]:
+        """返回包含关键字的行号，column 为 None 时在所有列中查找"""
+        keyword = keyword.strip().lower()
+        if not keyword:
+            return list(range(self.row_count))
+        columns = [column] if column else self.columns
+        matched = set()
+        for name in columns:
+            matched.update(index for index, text in enumerate(self._lowered(name)) if keyword in text)
+        return sorted(matched)
+
+    def sort(self, rows: List[int], column: str, descending: bool = False) -> List[int]:
+        values = self.values[column]
+        ordered = sorted(rows, key=lambda index: _sort_key(values[index]), reverse=descending)
+        if descending:
+            # 空值始终排在最后
+            blanks = [index for index in ordered if _sort_key(values[index])[0] == 2]
+            ordered = [index for index in ordered if _sort_key(values[index])[0] != 2] + blanks
+        return ordered
+
+class WorkbookCache:
+    """按 (路径, 修改时间) 缓存工作簿，每个工作表在第一次查看时才读取"""
+
+    def __init__(self):
+        self._sheets: Dict[str, Tuple[float, List[str]]] = {}
+        self._tables: Dict[Tuple[str, float, str], ColumnarTable] = {}
+        self._lock = threading.Lock()
+
+    def sheet_names(self, path: str) -> List[str]:
+        with self._lock:
+            return self._sheet_names(path)
+
+    def _sheet_names(self, path: str) -> List[str]:
+        mtime = os.path.getmtime(path)
+        cached = self._sheets.get(path)
+        if cached is None or cached[0] != mtime:
+            with pd.ExcelFile(path) as workbook:
+                cached = (mtime, list(workbook.sheet_names))
+            self._sheets[path] = cached
+            # 文件已变化，丢弃旧的工作表缓存
+            for key in [key for key in self._tables if key[0] == path and key[1] != mtime]:
+                del self._tables[key]
+        return cached[1]
+
+    def table(self, path: str, sheet: str) -> ColumnarTable:
+        """读取较慢（大文件需数秒），GUI 中应在后台线程调用"""
+        with self._lock:
+            key = (path, os.path.getmtime(path), sheet)
+            if key not in self._tables:
+                self._tables[key] = ColumnarTable.from_frame(pd.read_excel(path, sheet_name=sheet))
+            return self._tables[key]
+
+class VirtualTable(ttk.Frame):
+    """
+    只渲染可见行的 Treeview 表格
+
+    Args:
+        on_sort: 点击列标题时的回调，参数为列名
+    """
+    ROW_HEIGHT = 20
+
+    def __init__(self, master, on_sort=None, **kwargs):
+        super().__init__(master, **kwargs)
+        self.on_sort = on_sort
+        self.table: Optional[ColumnarTable] = None
+        self.order: List[int] = []
+        self.offset = 0
+        self.visible = 20
+        self.sort_state: Tuple[Optional[str], bool] = (None, False)
+
+        self.tree = ttk.Treeview(self, show="headings", height=self.visible, selectmode="browse")
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self._on_scrollbar)
+        xscroll = ttk.Scrollbar(self, orient="horizontal", command=self.tree.xview)
+        self.tree.configure(xscrollcommand=xscroll.set)
+        self.tree.grid(row=0, column=0, sticky="nsew")
+        self.scrollbar.grid(row=0, column=1, sticky="ns")
+        xscroll.grid(row=1, column=0, sticky="ew")
+        self.rowconfigure(0, weight=1)
+        self.columnconfigure(0, weight=1)
+
+        self.tree.bind("<Configure>", self._on_resize)
+        self.tree.bind("<MouseWheel>", lambda event: self.scroll(-1 if event.delta > 0 else 1, "units"))
+        self.tree.bind("<Button-4>", lambda event: self.scroll(-1, "units"))  # Linux 滚轮
+        self.tree.bind("<Button-5>", lambda event: self.scroll(1, "units"))
+        self.tree.bind("<Prior>", lambda event: self.scroll(-1, "pages"))
+        self.tree.bind("<Next>", lambda event: self.scroll(1, "pages"))
+
+    def set_table(self, table: ColumnarTable, order: Optional[List[int]] = None):
+        """切换显示的表格，order 为要显示的行号（已筛选、排序）"""
+        if table is not self.table:
+            self.table = table
+            self.tree.delete(*self.tree.get_children())
+            self.tree.configure(columns=table.columns)
+            for column in table.columns:
+                width = max([len(column)] + [len(text) for text in table.text[column][:200]])
+                self.tree.heading(column, text=column, command=lambda c=column: self.on_sort and self.on_sort(c))
+                self.tree.column(column, width=min(max(width * 9, 60), 320), anchor="w", stretch=False)
+            self.sort_state = (None, False)
+        self.set_order(order if order is not None else list(range(table.row_count)))
+
+    def set_order(self, order: List[int], keep_offset: bool = False):
+        self.order = order
+        if not keep_offset:
+            self.offset = 0
+        self.refresh()
+
+    def show_sort(self, column: Optional[str], descending: bool):
+        """在列标题上显示排序方向"""
+        self.sort_state = (column, descending)
+        for name in self.table.columns:
+            mark = (" ▼" if descending else " ▲") if name == column else ""
+            self.tree.heading(name, text=name + mark)
+
+    def _on_resize(self, event):
+        visible = max(1, (event.height - 25) // self.ROW_HEIGHT)
+        if visible != self.visible:
+            self.visible = visible
+            self.refresh()
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            self.offset = int(float(amount) * len(self.order))
+            self.refresh()
+        else:
+            self.scroll(int(amount), unit)
+
+    def scroll(self, amount: int, unit: str):
+        step = self.visible - 1 if unit == "pages" else 3
+        self.offset += amount * max(step, 1)
+        self.refresh()
+        return "break"
+
+    def refresh(self):
+        """把 offset 起的可见行写入复用的 Treeview 条目"""
+        if self.table is None:
+            return
+        total = len(self.order)
+        self.offset = max(0, min(self.offset, total - self.visible))
+        rows = self.order[self.offset:self.offset + self.visible]
+        items = self.tree.get_children()
+        if len(items) > len(rows):
+            self.tree.delete(*items[len(rows):])
+            items = items[:len(rows)]
+        for position, index in enumerate(rows):
+            values = self.table.row(index)
+            if position < len(items):
+                self.tree.item(items[position], values=values)
+            else:
+                self.tree.insert("", tk.END, values=values)
+        if total:
+            self.scrollbar.set(self.offset / total, min((self.offset + len(rows)) / total, 1.0))
+        else:
+            self.scrollbar.set(0, 1)
+
+class PreviewWindow:
+    """分析结果预览窗口：选择文件和工作表，按列排序、筛选"""
+
+    def __init__(self, master, files: List[str], cache: Optional[WorkbookCache] = None):
+        self.cache = cache or WorkbookCache()
+        self.window = tk.Toplevel(master)
+        self.window.title("分析结果预览")
+        self.window.geometry("900x560")
+
+        top = ttk.Frame(self.window)
+        top.pack(fill="x", padx=10, pady=5)
+        ttk.Label(top, text="文件:").pack(side="left", padx=2)
+        self.file_var = tk.StringVar(value=files[0] if files else "")
+        file_combo = ttk.Combobox(top, textvariable=self.file_var, values=files, state="readonly", width=28)
+        file_combo.pack(side="left", padx=2)
+        ttk.Label(top, text="工作表:").pack(side="left", padx=(10, 2))
+        self.sheet_var = tk.StringVar()
+        self.sheet_combo = ttk.Combobox(top, textvariable=self.sheet_var, state="readonly", width=16)
+        self.sheet_combo.pack(side="left", padx=2)
+        ttk.Button(top, text="刷新", command=self.reload).pack(side="left", padx=5)
+
+        filter_frame = ttk.Frame(self.window)
+        filter_frame.pack(fill="x", padx=10, pady=2)
+        ttk.Label(filter_frame, text="筛选列:").pack(side="left", padx=2)
+        self.filter_column = tk.StringVar(value=ALL_COLUMNS)
+        self.column_combo = ttk.Combobox(filter_frame, textvariable=self.filter_column, state="readonly", width=16)
+        self.column_combo.pack(side="left", padx=2)
+        ttk.Label(filter_frame, text="包含:").pack(side="left", padx=2)
+        self.filter_text = tk.StringVar()
+        entry = ttk.Entry(filter_frame, textvariable=self.filter_text, width=24)
+        entry.pack(side="left", padx=2)
+        entry.bind("<Return>", lambda event: self.apply_view())
+        ttk.Button(filter_frame, text="筛选", command=self.apply_view).pack(side="left", padx=5)
+        ttk.Button(filter_frame, text="清除", command=self.clear_filter).pack(side="left", padx=2)
+
+        self.table_view = VirtualTable(self.window, on_sort=self.sort_by)
+        self.table_view.pack(fill="both", expand=True, padx=10, pady=5)
+        self.status = tk.StringVar()
+        ttk.Label(self.window, textvariable=self.status).pack(anchor="w", padx=10, pady=2)
+
+        file_combo.bind("<<ComboboxSelected>>", lambda event: self.load_file())
+        self.sheet_combo.bind("<<ComboboxSelected>>", lambda event: self.load_sheet())
+        self.column_combo.bind("<<ComboboxSelected>>", lambda event: self.apply_view())
+        self.table = None
+        self.live_table: Optional[ColumnarTable] = None
+        self.sort_column: Optional[str] = None
+        self.descending = False
+        if files:
+            self.load_file()
+
+    def reload(self):
+        """「刷新」按钮：实时结果不对应磁盘上的文件，只按当前筛选、排序重新显示"""
+        if self.table is not None and self.table is self.live_table:
+            self.refresh_live()
+        else:
+            self.load_file()
+
+    def load_file(self):
+        path = self.file_var.get()
+        sheets = self.cache.sheet_names(path)
+        self.sheet_combo.configure(values=sheets)
+        if self.sheet_var.get() not in sheets:
+            self.sheet_var.set(sheets[0] if sheets else "")
+        self.load_sheet()
+
+    def load_sheet(self):
+        """在后台线程读取工作表，读取期间窗口保持响应"""
+        path, sheet = self.file_var.get(), self.sheet_var.get()
+        self.status.set(f"正在读取 {path} / {sheet} ...")
+
+        def worker():
+            try:
+                table = self.cache.table(path, sheet)
+            except Exception as e:
+                self.window.after(0, self.status.set, f"❌ 读取失败: {e}")
+                return
+            self.window.after(0, self._show_table, path, sheet, table)
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def _show_table(self, path: str, sheet: str, table: ColumnarTable):
+        if (path, sheet) != (self.file_var.get(), self.sheet_var.get()):
+            return  # 读取期间用户已切换到其他工作表
+        self.table = table
+        self.column_combo.configure(values=[ALL_COLUMNS] + self.table.columns)
+        if self.filter_column.get() not in self.table.columns:
+            self.filter_column.set(ALL_COLUMNS)
+        if self.sort_column not in self.table.columns:
+            self.sort_column, self.descending = None, False
+        self.table_view.set_table(self.table)
+        self.apply_view()
+
+    def sort_by(self, column: str):
+        """点击同一列标题时在升序、降序之间切换"""
+        self.descending = not self.descending if column == self.sort_column else False
+        self.sort_column = column
+        self.apply_view()
+
+    def clear_filter(self):
+        self.filter_text.set("")
+        self.filter_column.set(ALL_COLUMNS)
+        self.apply_view()
+
+    def show_live(self, title: str, table: ColumnarTable):
+        """显示一个仍在增长的表格（如后台解析结果），之后调用 refresh_live 刷新"""
+        self.live_table = table
+        self.file_var.set(title)
+        self.sheet_combo.configure(values=[])
+        self.sheet_var.set("实时结果")
+        self._show_table(title, "实时结果", table)
+
+    def refresh_live(self):
+        """追加行后刷新，保持当前筛选、排序和滚动位置"""
+        if self.table is not None and self.table is self.live_table:
+            self.apply_view(keep_offset=True)
+
+    def apply_view(self, keep_offset: bool = False):
+        if self.table is None:
+            return
+        column = self.filter_column.get()
+        rows = self.table.filter(None if column == ALL_COLUMNS else column, self.filter_text.get())
+        if self.sort_column:
+            rows = self.table.sort(rows, self.sort_column, self.descending)
+        self.table_view.set_order(rows, keep_offset)
+        self.table_view.show_sort(self.sort_column, self.descending)
+        self.status.set(f"{self.file_var.get()} / {self.sheet_var.get()}：共 {self.table.row_count} 行，"
+                        f"显示 {len(rows)} 行，{len(self.table.columns)} 列")
@@ -0,0 +1,21 @@
+import os
+import sys
+import importlib
+
+# 脚本都在 src/ 下直接互相导入，测试时同样把 src/ 加入搜索路径
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+def import_script(name):
+    """
+    导入 src/ 下的命令行脚本
+
+    脚本在导入时会把 sys.stdout 包装成 UTF-8 的 TextIOWrapper，这里恢复原来的 sys.stdout，
+    并解除包装（否则包装对象被回收时会关闭 pytest 捕获输出用的文件）。
+    """
+    stdout = sys.stdout
+    try:
+        return importlib.import_module(name)
+    finally:
+        if sys.stdout is not stdout:
+            sys.stdout.detach()
+            sys.stdout = stdout
@@ -0,0 +1,87 @@
+import io
+import os
+import zipfile
+
+import pytest
+
+from archive_inspect import archive_member_names, list_archive, summarize_archives
+from smart_student_info_parser import extract_info_from_attachments
+
+def write_zip(path, members):
+    with zipfile.ZipFile(path, 'w') as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+
+def write_gbk_zip(path, members):
+    """中文 Windows 压缩软件的做法：文件名按 GBK 编码，不设置 UTF-8 标志"""
+    placeholders = {}
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        for i, (name, data) in enumerate(members.items()):
+            encoded = name.encode('gbk')
+            placeholder = chr(ord('a') + i) * len(encoded)  # 等长的 ASCII 文件名，写完后替换成 GBK 字节
+            placeholders[placeholder.encode('ascii')] = encoded
+            archive.writestr(placeholder, data)
+    raw = buffer.getvalue()
+    for placeholder, encoded in placeholders.items():
+        raw = raw.replace(placeholder, encoded)
+    with open(path, 'wb') as f:
+        f.write(raw)
+
+def test_zip_is_listed_without_extracting(tmp_path, monkeypatch):
+    def no_extract(*args, **kwargs):
+        raise AssertionError("不应解压")
+
+    monkeypatch.setattr(zipfile.ZipFile, "extract", no_extract)
+    monkeypatch.setattr(zipfile.ZipFile, "extractall", no_extract)
+    monkeypatch.setattr(zipfile.ZipFile, "read", no_extract)
+    write_zip(tmp_path / "作业.zip", {
+        "src/main.py": "print(1)\n" * 300,
+        "实验报告.docx": b"docx",
+        "__MACOSX/._实验报告.docx": b"",
+        "src/.DS_Store": b"",
+    })
+
+    members = list_archive(str(tmp_path / "作业.zip"))
+    assert members == [
+        {"文件名": "src/main.py", "大小": 2700, "类型": ".py"},
+        {"文件名": "实验报告.docx", "大小": 4, "类型": ".docx"},
+    ]
+    assert summarize_archives(str(tmp_path), ["作业.zip", "说明.txt"]) == \
+        "作业.zip: src/main.py (3KB), 实验报告.docx (4B)"
+    assert os.listdir(tmp_path) == ["作业.zip"]
+
+def test_gbk_member_names_are_decoded(tmp_path):
+    write_gbk_zip(tmp_path / "作业.zip", {"实验一/张三的实验报告.docx": b"docx", "源代码.py": b"print(1)"})
+    names = [member["文件名"] for member in list_archive(str(tmp_path / "作业.zip"))]
+    assert names == ["实验一/张三的实验报告.docx", "源代码.py"]
+    assert archive_member_names(str(tmp_path), ["作业.zip"]) == ["张三的实验报告.docx", "源代码.py"]
+
+def test_utf8_member_names_are_kept(tmp_path):
+    write_zip(tmp_path / "作业.zip", {"实验报告.docx": b"docx"})
+    assert archive_member_names(str(tmp_path), ["作业.zip"]) == ["实验报告.docx"]
+
+@pytest.mark.parametrize("writer", [write_zip, write_gbk_zip])
+def test_student_info_falls_back_to_names_inside_archive(tmp_path, writer):
+    writer(tmp_path / "实验一.zip", {"readme.txt": b"", "2025001000001_张三_实验一.docx": b"docx"})
+    result = extract_info_from_attachments(str(tmp_path))
+    assert result["student_id"] == "2025001000001"
+    assert result["name"] == "张三"
+    assert result["source"] == "压缩包内文件名"
+
+def test_outer_file_name_wins_when_it_has_a_student_id(tmp_path):
+    write_zip(tmp_path / "2025001000002_李四_实验一.zip", {"2025001000001_张三_实验一.docx": b"docx"})
+    result = extract_info_from_attachments(str(tmp_path))
+    assert result["student_id"] == "2025001000002"
+    assert "source" not in result
+
+def test_corrupt_archive_is_reported_not_raised(tmp_path, capsys):
+    (tmp_path / "坏的.zip").write_bytes(b"PK\x03\x04 not really a zip")
+    (tmp_path / "截断.tar.gz").write_bytes(b"\x1f\x8b\x08\x00")
+
+    assert list_archive(str(tmp_path / "坏的.zip")) is None
+    assert summarize_archives(str(tmp_path), ["坏的.zip", "截断.tar.gz"]) == \
+        "坏的.zip: (无法读取); 截断.tar.gz: (无法读取)"
+    assert archive_member_names(str(tmp_path), ["坏的.zip"]) == []
+    assert "无法读取压缩包 坏的.zip" in capsys.readouterr().out
+    assert extract_info_from_attachments(str(tmp_path))["student_id"] == ""
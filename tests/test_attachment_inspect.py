@@ -0,0 +1,114 @@
+import hashlib
+import io
+import zipfile
+
+import pytest
+
+from attachment_inspect import (DOCX_MIME, PPTX_MIME, attachment_warnings, count_pages, detect_mime,
+                                inspect_attachment, type_mismatch)
+from metadata_store import save_metadata
+from smart_student_info_parser import analyze_submission_quality
+
+def make_pdf(pages):
+    objects = [b"1 0 obj << /Type /Catalog /Pages 2 0 R >> endobj",
+               b"2 0 obj << /Type /Pages /Count %d >> endobj" % pages]
+    objects += [b"%d 0 obj << /Type /Page /Parent 2 0 R >> endobj" % (3 + i) for i in range(pages)]
+    return b"%PDF-1.4\n" + b"\n".join(objects) + b"\n%%EOF\n"
+
+def make_zip(members):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+def make_docx(pages=None):
+    members = {"[Content_Types].xml": "<Types/>", "word/document.xml": "<w:document/>"}
+    if pages is not None:
+        members["docProps/app.xml"] = f"<Properties><Pages>{pages}</Pages></Properties>"
+    return make_zip(members)
+
+@pytest.mark.parametrize("payload, mime", [
+    (make_pdf(1), 'application/pdf'),
+    (make_zip({"readme.txt": "hi"}), 'application/zip'),
+    (make_docx(), DOCX_MIME),
+    (make_zip({"ppt/presentation.xml": "<p/>"}), PPTX_MIME),
+    ("老师好，这是实验报告。".encode('utf-8'), 'text/plain'),
+    ("老师好，这是实验报告。".encode('gbk'), 'text/plain'),
+    (b"\x00\x01\x02\xff" * 8, 'application/octet-stream'),
+    (b"", 'application/x-empty'),
+])
+def test_detect_mime(payload, mime):
+    assert inspect_attachment(payload)["实际类型"] == mime
+
+def test_detect_mime_without_archive_reports_plain_zip():
+    assert detect_mime(make_docx()) == 'application/zip'
+
+@pytest.mark.parametrize("filename, mime", [
+    ("实验报告.docx", 'application/zip'),
+    ("实验报告.pdf", 'text/plain'),
+    ("截图.png", 'image/jpeg'),
+])
+def test_type_mismatch_flags_renamed_files(filename, mime):
+    assert type_mismatch(filename, mime) == f"扩展名与内容不符，实际为 {mime}"
+
+@pytest.mark.parametrize("filename, mime", [
+    ("实验报告.docx", DOCX_MIME),
+    ("实验报告.pdf", 'application/pdf'),
+    ("代码.zip", DOCX_MIME),
+    ("空文件.pdf", 'application/x-empty'),
+    ("代码.py", 'text/plain'),  # 不检查的扩展名
+    ("实验报告.pdf", None),  # 旧下载没有记录实际类型
+])
+def test_type_mismatch_accepts_matching_types(filename, mime):
+    assert type_mismatch(filename, mime) is None
+
+def test_page_counts():
+    assert inspect_attachment(make_pdf(3))["页数"] == 3
+    assert inspect_attachment(make_docx(pages=5))["页数"] == 5
+    assert inspect_attachment(make_docx())["页数"] is None
+    assert inspect_attachment(b"plain text")["页数"] is None
+
+def test_pdf_page_count_falls_back_to_page_tree_count():
+    # 页对象在压缩的对象流中，只能看到页树根节点
+    payload = b"%PDF-1.5\n2 0 obj << /Type /Pages /Count 7 >> endobj\n%%EOF\n"
+    assert count_pages(payload, 'application/pdf') == 7
+
+def test_inspect_attachment_hash():
+    payload = make_pdf(2)
+    assert inspect_attachment(payload)["SHA256"] == hashlib.sha256(payload).hexdigest()
+
+def attachment(filename, payload):
+    detail = {"文件名": filename, "大小": len(payload), "类型": "application/octet-stream"}
+    detail.update(inspect_attachment(payload))
+    return detail
+
+def test_attachment_warnings():
+    report = make_pdf(2)
+    details = [
+        attachment("实验报告.pdf", report),
+        attachment("实验报告(1).pdf", report),
+        attachment("源码.docx", make_zip({"main.py": "print(1)"})),
+        attachment("说明.pdf", "说明文字".encode('utf-8')),
+        attachment("空.txt", b""),
+        attachment("空(1).txt", b""),
+    ]
+    assert attachment_warnings(details) == [
+        "实验报告(1).pdf (与 实验报告.pdf 内容相同)",
+        "源码.docx (扩展名与内容不符，实际为 application/zip)",
+        "说明.pdf (扩展名与内容不符，实际为 text/plain)",
+    ]
+
+def test_warnings_from_metadata_reach_quality_report(tmp_path):
+    folder = tmp_path / "2023001_张三_实验一"
+    folder.mkdir()
+    payloads = {"实验报告.docx": make_zip({"main.py": "print(1)" * 200}), "报告.pdf": make_pdf(4)}
+    for name, payload in payloads.items():
+        (folder / name).write_bytes(payload)
+    save_metadata(str(folder), {"附件列表": [attachment(name, payload) for name, payload in payloads.items()],
+                                "附件数量": len(payloads)})
+
+    quality = analyze_submission_quality(str(folder))
+    assert "实验报告.docx (扩展名与内容不符，实际为 application/zip)" in quality["可疑文件"]
+    assert not any(warning.startswith("报告.pdf (扩展名") for warning in quality["可疑文件"])
+    assert quality["总页数"] == 4
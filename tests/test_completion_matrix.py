@@ -0,0 +1,29 @@
+from completion_matrix import CompletionMatrix
+
+STUDENTS = [("2023001", "2023001", "张三"), ("2023002", "2023002", "李四"), ("2099999", "2099999", "旁听生")]
+ASSIGNMENTS = ["第一次作业", "第二次作业"]
+SUBMISSIONS = {("2023001", "第一次作业"): 2, ("2023001", "第二次作业"): 1, ("2099999", "第一次作业"): 1}
+
+def test_counts_without_roster():
+    matrix = CompletionMatrix(STUDENTS, ASSIGNMENTS, SUBMISSIONS)
+    assert matrix.completed_per_student().tolist() == [2, 0, 1]
+    assert matrix.files_per_student().tolist() == [3, 0, 1]
+    assert matrix.submitted_per_assignment().tolist() == [2, 1]
+    assert matrix.expected_count() == 3
+    missing = matrix.missing_frame()
+    assert missing['学号'].tolist() == ["2023002", "2099999"]
+    assert missing['缺交作业列表'].tolist() == ["第一次作业; 第二次作业", "第二次作业"]
+
+def test_roster_limits_expected_students_and_missing_list():
+    matrix = CompletionMatrix(STUDENTS, ASSIGNMENTS, SUBMISSIONS, roster={"2023001", "2023002"})
+    assert matrix.expected_count() == 2
+    assert matrix.submitted_per_assignment().tolist() == [1, 1]
+    # 名册外的旁听生仍出现在完成矩阵中，但不在缺交名单里
+    assert "2099999" in matrix.matrix_frame()['学号'].tolist()
+    assert matrix.missing_frame()['学号'].tolist() == ["2023002"]
+
+def test_matrix_frame_cells():
+    frame = CompletionMatrix(STUDENTS, ASSIGNMENTS, SUBMISSIONS).matrix_frame()
+    first = frame.iloc[0]
+    assert (first['第一次作业'], first['第二次作业'], first['完成率']) == ("✓ (2文件)", "✓ (1文件)", "100.0%")
+    assert frame.iloc[1]['第一次作业'] == "✗ 未交"
@@ -0,0 +1,163 @@
+import io
+import os
+import imaplib
+import zipfile
+from email.message import EmailMessage
+
+import pytest
+
+from conftest import import_script
+
+from attachment_inspect import attachment_warnings
+from imap_connection import IMAPConnection
+from local_imap_server import LocalIMAPServer, DEFAULT_FOLDER_PREFIX
+from metadata_store import load_metadata
+from submission_index import open_index
+
+USER = "test@qq.com"
+PASSWORD = "password"
+FOLDER = DEFAULT_FOLDER_PREFIX + "25TA"
+
+def make_message(student_id, name):
+    msg = EmailMessage()
+    msg['Subject'] = f"{student_id}-{name}-第一次作业"
+    msg['From'] = f"{name} <{student_id}@qq.com>"
+    msg['To'] = USER
+    msg.set_content("老师好，作业见附件。")
+    msg.add_attachment(b'%PDF-1.4\n' + student_id.encode(), maintype='application', subtype='pdf',
+                       filename=f"{student_id}-{name}-第一次作业.pdf")
+    return msg.as_bytes()
+
+@pytest.fixture
+def downloader(monkeypatch):
+    # 下载器在导入时读取配置，缺少账号时直接退出
+    monkeypatch.setenv("QQ_EMAIL", USER)
+    monkeypatch.setenv("QQ_PASSWORD", PASSWORD)
+    monkeypatch.setenv("TARGET_FOLDER", "25TA")
+    module = import_script("EnhancedDownloadQQAttachments")
+    monkeypatch.setattr(module, "MAX_RETRIES", 2)
+    return module
+
+@pytest.fixture
+def server():
+    server = LocalIMAPServer(user=USER, password=PASSWORD)
+    for student_id, name in (("2023001", "张三"), ("2023002", "李四"), ("2023003", "王五")):
+        server.store.append(FOLDER, make_message(student_id, name))
+    server.start()
+    yield server
+    server.stop()
+
+@pytest.fixture
+def session(server, downloader):
+    conn = IMAPConnection(lambda: _login(imaplib.IMAP4("127.0.0.1", server.port)), backoff_base=0.01).open()
+    assert conn.select(FOLDER)
+    yield conn
+    conn.close()
+
+def _login(mail):
+    mail.login(USER, PASSWORD)
+    return mail
+
+@pytest.fixture
+def index(tmp_path):
+    index = open_index(str(tmp_path), create=True)
+    yield index
+    index.close()
+
+def test_failed_message_is_retried_before_moving_past_it(downloader, session, index, tmp_path, monkeypatch):
+    process_message = downloader.process_message
+    calls = []
+
+    def flaky(raw_email, mail_id, save_dir, index):
+        calls.append(mail_id)
+        if mail_id == "2" and calls.count("2") == 1:
+            raise OSError(28, "No space left on device")
+        return process_message(raw_email, mail_id, save_dir, index)
+
+    monkeypatch.setattr(downloader, "process_message", flaky)
+    failures = {}
+    last_uid, processed = downloader.fetch_new_messages(session, 0, str(tmp_path), index, failures=failures)
+    assert (last_uid, processed) == (1, 1)
+    assert failures == {2: 1}
+
+    last_uid, processed = downloader.fetch_new_messages(session, last_uid, str(tmp_path), index, failures=failures)
+    assert (last_uid, processed) == (3, 2)
+    assert failures == {}
+    assert calls == ["1", "2", "2", "3"]
+
+def test_message_failing_every_time_is_skipped_after_max_retries(downloader, session, index, tmp_path, monkeypatch):
+    process_message = downloader.process_message
+
+    def broken(raw_email, mail_id, save_dir, index):
+        if mail_id == "2":
+            raise ValueError("无法解码")
+        return process_message(raw_email, mail_id, save_dir, index)
+
+    monkeypatch.setattr(downloader, "process_message", broken)
+    failures = {}
+    last_uid = 0
+    for _ in range(downloader.MAX_RETRIES):
+        last_uid, _ = downloader.fetch_new_messages(session, last_uid, str(tmp_path), index, failures=failures)
+        assert last_uid == 1
+    last_uid, processed = downloader.fetch_new_messages(session, last_uid, str(tmp_path), index, failures=failures)
+    assert (last_uid, processed) == (3, 1)
+    assert failures == {}
+
+def test_rebuilt_folder_resets_last_uid_after_reconnect(downloader, server, session, index, tmp_path):
+    uidvalidity = downloader.read_uidvalidity(session, FOLDER)
+    last_uid, processed = downloader.fetch_new_messages(session, 0, str(tmp_path), index)
+    assert (last_uid, processed) == (3, 3)
+    index.set_last_uid(FOLDER, uidvalidity, last_uid)
+
+    # 文件夹被重建后只有一封新邮件，UID 从 1 重新开始
+    server.store.recreate_folder(FOLDER)
+    server.store.append(FOLDER, make_message("2023004", "赵六"))
+    session.reconnect()
+
+    new_uidvalidity, last_uid = downloader.resync_uidvalidity(session, index, FOLDER, uidvalidity, last_uid)
+    assert new_uidvalidity != uidvalidity
+    assert last_uid == 0
+    last_uid, processed = downloader.fetch_new_messages(session, last_uid, str(tmp_path), index)
+    assert (last_uid, processed) == (1, 1)
+    assert any("2023004-赵六-第一次作业.pdf" in files for _, _, files in os.walk(tmp_path))
+
+def test_unchanged_folder_keeps_last_uid_after_reconnect(downloader, session, index):
+    uidvalidity = downloader.read_uidvalidity(session, FOLDER)
+    session.reconnect()
+    assert downloader.resync_uidvalidity(session, index, FOLDER, uidvalidity, 3) == (uidvalidity, 3)
+
+def test_download_stops_once_connection_is_lost(downloader, session, tmp_path, monkeypatch):
+    fetch_and_process = downloader.fetch_and_process
+    calls = []
+
+    def dropping(conn, uid, save_dir, index):
+        calls.append(uid)
+        if uid == "2":
+            raise imaplib.IMAP4.abort("重连失败（已尝试 6 次）")
+        return fetch_and_process(conn, uid, save_dir, index)
+
+    monkeypatch.setattr(downloader, "fetch_and_process", dropping)
+    stats = downloader.download_folder(session, FOLDER, str(tmp_path))
+    assert calls == ["1", "2"]
+    assert (stats["成功"], stats["失败"], stats["重试"]) == (1, 2, 0)
+
+def test_downloaded_attachments_record_inspection(downloader, index, tmp_path):
+    msg = EmailMessage()
+    msg['Subject'] = "2023001-张三-第一次作业"
+    msg['From'] = "张三 <2023001@qq.com>"
+    msg.set_content("老师好，作业见附件。")
+    # 改名为 .docx 的普通压缩包
+    renamed = io.BytesIO()
+    with zipfile.ZipFile(renamed, 'w') as archive:
+        archive.writestr("main.py", "print(1)")
+    msg.add_attachment(renamed.getvalue(), maintype='application', subtype='octet-stream', filename="实验报告.docx")
+    msg.add_attachment(b'%PDF-1.4\n1 0 obj << /Type /Page >> endobj\n', maintype='application', subtype='pdf',
+                       filename="报告.pdf")
+
+    metadata = downloader.process_message(msg.as_bytes(), "1", str(tmp_path), index)
+    stored = load_metadata(os.path.join(str(tmp_path), metadata["文件夹名称"]))
+    details = {attachment["文件名"]: attachment for attachment in stored["附件列表"]}
+    assert details["实验报告.docx"]["实际类型"] == 'application/zip'
+    assert details["报告.pdf"]["实际类型"] == 'application/pdf'
+    assert details["报告.pdf"]["页数"] == 1
+    assert attachment_warnings(stored["附件列表"]) == ["实验报告.docx (扩展名与内容不符，实际为 application/zip)"]
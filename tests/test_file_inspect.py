@@ -0,0 +1,79 @@
+import hashlib
+import io
+import os
+import zipfile
+
+import pytest
+
+from attachment_inspect import INSPECT_FIELDS, inspect_attachment
+from file_inspect import CHUNK_SIZE, backfill_attachment_info, hash_file, inspect_file, inspect_files
+from metadata_store import load_metadata, save_metadata
+
+def make_docx():
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        archive.writestr("word/document.xml", "<w:document/>")
+        archive.writestr("docProps/app.xml", "<Properties><Pages>2</Pages></Properties>")
+    return buffer.getvalue()
+
+PAYLOADS = {
+    "空文件.txt": b"",
+    "一个字节.txt": b"x",
+    "说明.txt": "老师好，这是实验说明。".encode('utf-8'),
+    "报告.pdf": b"%PDF-1.4\n" + b"1 0 obj << /Type /Page >> endobj\n" * 3,
+    "报告.docx": make_docx(),
+    # 大于分块大小且不是整数倍，覆盖多次读取和最后不满的一块
+    "数据.bin": os.urandom(CHUNK_SIZE * 2 + 12345),
+    "整块.bin": os.urandom(CHUNK_SIZE),
+    "七字节.bin": bytes(range(7)) * 5,
+}
+
+@pytest.fixture(params=sorted(PAYLOADS))
+def sample(request, tmp_path):
+    path = tmp_path / request.param
+    path.write_bytes(PAYLOADS[request.param])
+    return str(path), PAYLOADS[request.param]
+
+@pytest.mark.parametrize("use_mmap", [False, True])
+@pytest.mark.parametrize("chunk_size", [CHUNK_SIZE, 65537, 7])
+def test_hash_file_matches_hashlib(sample, use_mmap, chunk_size):
+    path, payload = sample
+    assert hash_file(path, chunk_size=chunk_size, use_mmap=use_mmap) == hashlib.sha256(payload).hexdigest()
+
+def test_hash_file_other_algorithm(sample):
+    path, payload = sample
+    assert hash_file(path, 'md5', use_mmap=True) == hashlib.md5(payload).hexdigest()
+
+def test_inspect_file_matches_inspect_attachment(sample):
+    path, payload = sample
+    assert inspect_file(path) == inspect_attachment(payload)
+
+def test_inspect_files_skips_unreadable(tmp_path, capsys):
+    path = tmp_path / "报告.pdf"
+    path.write_bytes(PAYLOADS["报告.pdf"])
+    missing = str(tmp_path / "不存在.pdf")
+    results = inspect_files([str(path), missing], workers=2)
+    assert results == {str(path): inspect_attachment(PAYLOADS["报告.pdf"])}
+    assert "无法读取附件" in capsys.readouterr().out
+
+def test_backfill_adds_missing_fields(tmp_path):
+    folder = tmp_path / "2023001_张三_实验一"
+    folder.mkdir()
+    attachments = []
+    for name in ("报告.pdf", "报告.docx", "空文件.txt"):
+        (folder / name).write_bytes(PAYLOADS[name])
+        attachments.append({"文件名": name, "大小": len(PAYLOADS[name]), "类型": "application/octet-stream"})
+    attachments.append({"文件名": "已删除.pdf", "大小": 3, "类型": "application/pdf"})
+    save_metadata(str(folder), {"附件列表": attachments, "附件数量": len(attachments)})
+
+    summary = backfill_attachment_info(str(tmp_path), workers=2)
+    assert summary["updated_folders"] == [folder.name]
+    assert summary["files"] == 3
+
+    stored = {attachment["文件名"]: attachment for attachment in load_metadata(str(folder))["附件列表"]}
+    for name in ("报告.pdf", "报告.docx", "空文件.txt"):
+        assert {key: stored[name][key] for key in INSPECT_FIELDS} == inspect_attachment(PAYLOADS[name])
+    assert not any(key in stored["已删除.pdf"] for key in INSPECT_FIELDS)
+
+    # 已补齐的附件不再检查
+    assert backfill_attachment_info(str(tmp_path))["updated_folders"] == []
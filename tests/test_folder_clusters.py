@@ -0,0 +1,74 @@
+import pandas as pd
+import pytest
+
+from conftest import import_script
+from folder_clusters import cluster_records, normalize_folder_key
+
+BASE = "2023001_张三_第一次作业"
+
+@pytest.mark.parametrize("folder_name", [
+    "2023001_张三_第一次作业",
+    "2023001_张三_第一次作业(1)",
+    "2023001_张三_第一次作业（2）",
+    "2023001_张三_第一次作业 (3)",
+    "Re 2023001_张三_第一次作业",
+    "RE2023001_张三_第一次作业",
+    "Fwd 2023001_张三_第一次作业",
+    "回复2023001_张三_第一次作业",
+    "回复 答复 2023001_张三_第一次作业(1)",
+    "转发：2023001_张三_第一次作业",
+    "２０２３００１_张三_第一次作业",
+    " 2023001 _张三_第一次作业 ",
+])
+def test_variants_share_a_key(folder_name):
+    assert normalize_folder_key(folder_name) == normalize_folder_key(BASE)
+
+@pytest.mark.parametrize("folder_name", [
+    "2023001_张三_第二次作业",
+    "2023002_张三_第一次作业",
+    "Report_2023001_张三_第一次作业",
+    "2023001_张三_第一次作业(1)附件",
+])
+def test_different_submissions_keep_distinct_keys(folder_name):
+    assert normalize_folder_key(folder_name) != normalize_folder_key(BASE)
+
+def test_prefix_words_are_not_stripped_from_ordinary_names():
+    assert normalize_folder_key("Report1") == "report1"
+    assert normalize_folder_key("Fwdx") == "fwdx"
+
+def record(folder, sender, submit_time):
+    return {"folder": folder, "metadata": {"发件人": sender} if sender else None, "submit_time": submit_time}
+
+def test_cluster_records_groups_by_sender_and_orders_by_time():
+    records = [
+        record("2023001_张三_第一次作业(1)", "张三 <zs@qq.com>", 3),
+        record("2023001_张三_第一次作业", "<ZS@qq.com>", 1),
+        record("Re 2023001_张三_第一次作业", "zs@qq.com", 2),
+        # 同样的文件夹名，不同发件人：不能合并
+        record("2023001_张三_第一次作业", "other@qq.com", 5),
+        record("2023001_张三_第二次作业", "zs@qq.com", 4),
+    ]
+    clusters = sorted(cluster_records(records), key=len, reverse=True)
+    assert [[r["submit_time"] for r in members] for members in clusters] == [[1, 2, 3], [5], [4]]
+
+def test_records_without_sender_are_not_merged():
+    records = [
+        record("Re 实验一", None, 1),
+        record("实验一", None, 2),
+        record("实验一(1)", None, 3),
+    ]
+    assert sorted(len(members) for members in cluster_records(records)) == [1, 1, 1]
+
+def test_analyzer_keeps_every_student_without_metadata(tmp_path, monkeypatch):
+    analyzer = import_script("MultiSubmissionAnalyzer")
+    save_dir = tmp_path / "dl"
+    for folder, name in [("Re 实验一", "2023001张三实验一.docx"), ("实验一", "2023002李四实验一.docx")]:
+        (save_dir / folder).mkdir(parents=True)
+        (save_dir / folder / name).write_bytes(b"docx")
+    monkeypatch.setattr(analyzer, "SAVE_DIR", str(save_dir))
+    monkeypatch.setattr(analyzer, "OUTPUT_FILE", str(tmp_path / "report.xlsx"))
+    analyzer.analyze_by_assignment(check_similarity=False)
+
+    summary = pd.read_excel(tmp_path / "report.xlsx", sheet_name="汇总表", dtype=str)
+    assert len(summary) == 2
+    assert sorted(summary["文件夹"]) == ["Re 实验一", "实验一"]
@@ -0,0 +1,63 @@
+import imaplib
+from datetime import date
+from email.message import EmailMessage
+from email.utils import format_datetime
+from datetime import datetime, timezone
+
+import pytest
+
+from imap_search import build_search_criteria, describe_criteria, format_imap_date, parse_date, search_messages
+from local_imap_server import LocalIMAPServer
+
+def test_build_search_criteria():
+    criteria = build_search_criteria(date(2025, 9, 1), date(2025, 10, 15), " zs@qq.com ", " 第一次作业 ")
+    assert criteria == [("SINCE", "1-Sep-2025"), ("BEFORE", "15-Oct-2025"),
+                        ("FROM", "zs@qq.com"), ("SUBJECT", "第一次作业")]
+
+def test_empty_filters_build_no_criteria():
+    assert build_search_criteria() == []
+    assert describe_criteria([]) == "ALL"
+
+def test_dates_use_english_month_names():
+    assert format_imap_date(parse_date("2025-03-07")) == "7-Mar-2025"
+    assert format_imap_date(date(2024, 12, 31)) == "31-Dec-2024"
+
+def test_describe_quotes_text_values():
+    criteria = build_search_criteria(since=date(2025, 9, 1), subject="实验 一")
+    assert describe_criteria(criteria) == 'SINCE 1-Sep-2025 SUBJECT "实验 一"'
+
+def message(subject, sender, day):
+    msg = EmailMessage()
+    msg['Subject'] = subject
+    msg['From'] = sender
+    msg['Date'] = format_datetime(datetime(2025, 9, day, 8, 0, tzinfo=timezone.utc))
+    msg.set_content("作业见附件")
+    return msg.as_bytes()
+
+@pytest.fixture
+def mail():
+    server = LocalIMAPServer(user="t@qq.com", password="p")
+    for subject, sender, day in [("2023001-张三-第一次作业", "zs@qq.com", 2),
+                                 ("2023002-李四-第一次作业", "ls@qq.com", 10),
+                                 ("2023001-张三-第二次作业", "zs@qq.com", 20),
+                                 ("Lab1 report", "ww@qq.com", 21)]:
+        server.store.append("INBOX", message(subject, sender, day))
+    server.start()
+    mail = imaplib.IMAP4("127.0.0.1", server.port)
+    mail.login("t@qq.com", "p")
+    mail.select("INBOX")
+    yield mail
+    mail.logout()
+    server.stop()
+
+@pytest.mark.parametrize("filters, expected", [
+    ({}, [b"1", b"2", b"3", b"4"]),
+    ({"since": date(2025, 9, 10)}, [b"2", b"3", b"4"]),
+    ({"since": date(2025, 9, 5), "before": date(2025, 9, 20)}, [b"2"]),
+    ({"sender": "zs@qq.com"}, [b"1", b"3"]),
+    ({"subject": "lab1"}, [b"4"]),
+    ({"subject": "第一次作业"}, [b"1", b"2"]),
+    ({"sender": "zs@qq.com", "subject": "第二次"}, [b"3"]),
+])
+def test_search_on_server(mail, filters, expected):
+    assert search_messages(mail, build_search_criteria(**filters), uid=True) == expected
@@ -0,0 +1,80 @@
+import os
+import time
+
+import pandas as pd
+import pytest
+
+from conftest import import_script
+
+FOLDERS = {
+    "2025001000001_张三_第一次作业": ["2025001000001_张三_第一次作业.docx"],
+    "2025001000001_张三_第二次作业": ["2025001000001_张三_第二次作业.docx", "main.py"],
+    "2025001000002_李四_第一次作业": ["2025001000002_李四_第一次作业.pdf"],
+    "2025001000003_王五_第二次作业": ["2025001000003_王五_第二次作业.docx"],
+    "2025001000003_王五_实验一": ["实验一报告.docx"],
+}
+
+@pytest.fixture
+def analyzer(tmp_path, monkeypatch):
+    module = import_script("MultiAssignmentAnalyzer")
+    save_dir = tmp_path / "dl"
+    save_dir.mkdir()
+    monkeypatch.setattr(module, "SAVE_DIR", str(save_dir))
+    monkeypatch.chdir(tmp_path)
+    for folder, files in FOLDERS.items():
+        add_folder(save_dir, folder, files, age=3600)
+    return module
+
+def add_folder(save_dir, folder, files, age=0):
+    path = save_dir / folder
+    path.mkdir()
+    for name in files:
+        (path / name).write_bytes(name.encode('utf-8'))
+    touch(path, age)
+    return path
+
+def touch(path, age=0):
+    stamp = time.time() - age
+    os.utime(path, (stamp, stamp))
+
+def run(analyzer, monkeypatch, output, incremental, roster=""):
+    monkeypatch.setattr(analyzer, "OUTPUT_FILE", output)
+    analyzer.analyze_by_student(incremental=incremental, roster_file=roster)
+    return pd.read_excel(output, sheet_name=None)
+
+def assert_same_report(incremental, full):
+    assert list(incremental) == list(full)
+    for name in full:
+        pd.testing.assert_frame_equal(incremental[name].reset_index(drop=True), full[name].reset_index(drop=True),
+                                      obj=name)
+
+@pytest.mark.parametrize("with_roster", [False, True])
+def test_incremental_report_matches_full_rebuild(analyzer, monkeypatch, tmp_path, with_roster):
+    roster = ""
+    if with_roster:
+        roster = str(tmp_path / "名册.csv")
+        with open(roster, 'w', encoding='utf-8') as f:
+            f.write("学号,姓名\n2025001000001,张三\n2025001000002,李四\n2025001000003,王五\n2025001000004,赵六\n2025001000005,钱七\n")
+
+    save_dir = tmp_path / "dl"
+    run(analyzer, monkeypatch, "inc.xlsx", incremental=True, roster=roster)
+
+    # 新增、删除、修改（多交一个附件）、同一学生补交
+    add_folder(save_dir, "2025001000004_赵六_第一次作业", ["2025001000004_赵六_第一次作业.docx"])
+    add_folder(save_dir, "2025001000001_张三_第一次作业(1)", ["2025001000001_张三_第一次作业_修改版.docx"])
+    for name in os.listdir(save_dir / "2025001000002_李四_第一次作业"):
+        os.remove(save_dir / "2025001000002_李四_第一次作业" / name)
+    os.rmdir(save_dir / "2025001000002_李四_第一次作业")
+    (save_dir / "2025001000003_王五_实验一" / "补充.txt").write_text("补充材料", encoding='utf-8')
+    touch(save_dir / "2025001000003_王五_实验一")
+
+    incremental = run(analyzer, monkeypatch, "inc.xlsx", incremental=True, roster=roster)
+    full = run(analyzer, monkeypatch, "full.xlsx", incremental=False, roster=roster)
+    assert_same_report(incremental, full)
+    names = set(full['作业完成矩阵']['姓名'])
+    assert "赵六" in names
+    assert ("李四" in names) == with_roster  # 有名册时没有提交的学生也列出
+
+    # 没有变化时再跑一次，结果不变
+    again = run(analyzer, monkeypatch, "inc.xlsx", incremental=True, roster=roster)
+    assert_same_report(again, full)
@@ -0,0 +1,65 @@
+import os
+
+import pandas as pd
+
+from conftest import import_script
+from metadata_store import load_email_body, load_metadata, save_metadata
+from submission_index import open_index
+
+def make_metadata(student_id="2023001", **extra):
+    metadata = {
+        "解析信息": {"学号": student_id, "姓名": "张三", "作业": "第一次作业"},
+        "附件列表": [{"文件名": "作业.pdf", "大小": 3}],
+        "附件数量": 1,
+        "邮件正文": "老师好，作业见附件。",
+    }
+    metadata.update(extra)
+    return metadata
+
+def make_folder(save_dir, name, metadata):
+    folder = os.path.join(save_dir, name)
+    os.makedirs(folder)
+    with open(os.path.join(folder, "作业.pdf"), 'wb') as f:
+        f.write(b'pdf')
+    save_metadata(folder, metadata)
+    return folder
+
+def test_body_is_stored_separately(tmp_path):
+    folder = make_folder(str(tmp_path), "2023001_张三", make_metadata())
+    header = load_metadata(folder)
+    assert "邮件正文" not in header
+    assert header["解析信息"]["学号"] == "2023001"
+    assert load_email_body(folder, header) == "老师好，作业见附件。"
+    assert not any(name.endswith(".tmp") for name in os.listdir(folder))
+
+def test_rewritten_metadata_reaches_index_on_refresh(tmp_path):
+    save_dir = str(tmp_path)
+    folder = make_folder(save_dir, "2023001_张三", make_metadata())
+    index = open_index(save_dir, create=True)
+    try:
+        assert index.refresh()["新增"] == 1
+
+        # 只改写元数据（如 ConsolidateMetadata --inspect 补齐字段），不增删附件
+        past = os.path.getmtime(folder) - 10
+        os.utime(folder, (past, past))
+        index.refresh(full=True)
+        metadata = load_metadata(folder)
+        metadata["附件列表"][0]["SHA256"] = "abc"
+        save_metadata(folder, metadata)
+
+        assert index.refresh()["更新"] == 1
+        assert index.get_metadata("2023001_张三")["附件列表"][0]["SHA256"] == "abc"
+    finally:
+        index.close()
+
+def test_statistics_report_does_not_count_metadata_files(tmp_path, monkeypatch):
+    statistics = import_script("StatisticsAttachmentDetails")
+    save_dir = tmp_path / "dl"
+    make_folder(str(save_dir), "2023001_张三_第一次作业", make_metadata())
+    monkeypatch.setattr(statistics, "SAVE_DIR", str(save_dir))
+    monkeypatch.setattr(statistics, "OUTPUT_FILE", str(tmp_path / "report.xlsx"))
+    statistics.generate_report()
+
+    report = pd.read_excel(tmp_path / "report.xlsx", dtype=str)
+    assert report["附件数量"].tolist() == ["1"]
+    assert report["附件列表"].tolist() == ["作业.pdf"]
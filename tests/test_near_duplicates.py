@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from near_duplicates import (LARGE_BUCKET_SIZE, SignatureIndex, candidate_pairs, estimate_similarity,
+                             find_similar_attachments, minhash_signature, shingle_hashes, template_hashes)
+
+def random_hashes(count, seed=0):
+    rng = np.random.default_rng(seed)
+    return np.unique(rng.choice(2 ** 32, size=count, replace=False).astype(np.uint64))
+
+@pytest.mark.parametrize("overlap", [0.0, 0.2, 0.5, 0.8, 1.0])
+def test_minhash_estimates_jaccard(overlap):
+    pool = random_hashes(6000)
+    size = 3000
+    shift = round(size * (1 - overlap) / (1 + overlap))  # |A∩B| / |A∪B| = overlap
+    a, b = pool[:size], pool[shift:shift + size]
+    exact = len(np.intersect1d(a, b)) / len(np.union1d(a, b))
+    estimate = estimate_similarity(minhash_signature(a), minhash_signature(b))
+    assert exact == pytest.approx(overlap, abs=0.01)
+    assert estimate == pytest.approx(exact, abs=0.15)
+
+def test_shingles_ignore_case_whitespace_and_punctuation():
+    assert np.array_equal(shingle_hashes("Hello, World! 你好世界"), shingle_hashes("helloworld你好世界"))
+    assert len(shingle_hashes("abcd")) == 0
+
+def test_large_bucket_is_reported_and_still_compared():
+    signature = minhash_signature(random_hashes(500))
+    signatures = np.vstack([signature] * LARGE_BUCKET_SIZE)
+    pairs, large = candidate_pairs(signatures)
+    assert len(pairs) == LARGE_BUCKET_SIZE * (LARGE_BUCKET_SIZE - 1) // 2
+    assert [len(members) for members in large] == [LARGE_BUCKET_SIZE]
+
+REPORT = "实验报告：二叉树的遍历。{}。实验总结：本次实验收获很大。"
+TEMPLATE = ("一、实验目的：掌握二叉树的链式存储结构，理解先序、中序、后序和层次遍历的递归与非递归实现。"
+            "二、实验环境：操作系统、编译器版本、集成开发环境以及调试工具请如实填写。"
+            "三、实验内容：输入一棵二叉树的扩展先序序列，建立二叉链表并输出四种遍历结果，"
+            "统计叶子结点个数与树的深度，最后交换每个结点的左右子树并再次输出遍历序列。"
+            "四、评分标准：代码规范占两成，运行结果占四成，实验分析与总结占四成。")
+
+def write(path, text):
+    path.write_text(text, encoding='utf-8')
+    return str(path)
+
+def test_template_content_is_excluded(tmp_path):
+    own = ["先序遍历采用递归实现，时间复杂度为线性，空间复杂度取决于树高" * 3,
+           "我用显式栈模拟中序遍历，每次访问左子树到底再回溯处理右边节点" * 3]
+    items = [{"path": write(tmp_path / f"{i}.txt", TEMPLATE + REPORT.format(text)), "file": f"{i}.txt", "student": str(i)}
+             for i, text in enumerate(own)]
+    template = write(tmp_path / "模板.txt", TEMPLATE)
+
+    index = SignatureIndex(str(tmp_path))
+    assert find_similar_attachments(items, index, threshold=0.3)
+    index.close()
+
+    # 换用模板后缓存的签名失效，去掉模板内容后两份报告不再相似
+    index = SignatureIndex(str(tmp_path), template_hashes([template]))
+    assert find_similar_attachments(items, index, threshold=0.3) == []
+    assert index.computed == 2
+    index.close()
@@ -0,0 +1,60 @@
+import pytest
+
+from student_roster import Roster, edit_distance, load_roster
+
+ROSTER = Roster([
+    ("2023001001", "张三"),
+    ("2023001002", "李四"),
+    ("2023001017", "王小明"),
+    ("2023002001", "欧阳娜娜"),
+    ("2023002002", "张三"),
+])
+
+@pytest.mark.parametrize("student_id, name, expected, method", [
+    ("2023001001", "张三", "2023001001", "学号一致"),
+    ("2023001001", "", "2023001001", "学号一致"),
+    ("2023001012", "李四", "2023001002", "学号相近（差 1 位）且姓名相符"),
+    ("2023011012", "李四", "2023001002", "学号相近（差 2 位）且姓名相符"),
+    ("2023002201", "", "2023002001", "学号相近（差 1 位）"),
+    ("", "李四", "2023001002", "姓名一致"),
+    ("", "王晓明", "2023001017", "姓名相近（差 1 字）"),
+    ("", "欧阳娜", "2023002001", "姓名相近（差 1 字）"),
+    ("", "李", None, "不在名册中"),
+    ("", "张三", None, "不在名册中"),  # 名册中有两个张三
+    ("9999999999", "赵六", None, "不在名册中"),
+    ("2023011012", "", None, "不在名册中"),  # 只有学号且差 2 位时不对齐
+])
+def test_match(student_id, name, expected, method):
+    entry, how = ROSTER.match(student_id, name)
+    assert (entry.student_id if entry else None, how) == (expected, method)
+
+def test_id_typo_with_two_candidates_is_resolved_by_name():
+    # 2023001011 与 2023001001、2023001017 都差一位，姓名决定对齐到谁
+    entry, _ = ROSTER.match("2023001011", "王小明")
+    assert entry.student_id == "2023001017"
+
+def test_ambiguous_id_typo_without_name_is_not_matched():
+    roster = Roster([("2023001001", "张三"), ("2023001003", "李四")])
+    assert roster.match("2023001002", "") == (None, "不在名册中")
+
+def test_edit_distance():
+    assert edit_distance("2023001001", "2023001001") == 0
+    assert edit_distance("2023001001", "202300101") == 1
+    assert edit_distance("王小明", "王晓明") == 1
+    assert edit_distance("", "abc") == 3
+
+def test_duplicate_ids_keep_first_entry():
+    roster = Roster([("2023001001", "张三"), ("2023001001", "张叁"), ("", "无学号")])
+    assert len(roster) == 1
+    assert roster.keys == ["2023001001_张三"]
+
+def test_load_roster_csv_with_header_and_gbk(tmp_path):
+    path = tmp_path / "名册.csv"
+    path.write_bytes("序号,姓名,学号\n1,张三,2023001001\n2,李四,2023001002.0\n\n".encode('gbk'))
+    roster = load_roster(str(path))
+    assert roster.keys == ["2023001001_张三", "2023001002_李四"]
+
+def test_load_roster_csv_without_header(tmp_path):
+    path = tmp_path / "名册.csv"
+    path.write_text("2023001001,张三\n2023001002,李四\n", encoding='utf-8')
+    assert load_roster(str(path)).keys == ["2023001001_张三", "2023001002_李四"]
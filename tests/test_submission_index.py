@@ -0,0 +1,77 @@
+import os
+import time
+
+from metadata_store import save_metadata
+from submission_index import NOT_INDEXED, consolidate_metadata, iter_submission_records, lookup_indexed_metadata, open_index
+
+def make_folder(save_dir, name, student_id):
+    folder = os.path.join(save_dir, name)
+    os.makedirs(folder, exist_ok=True)
+    save_metadata(folder, {"解析信息": {"student_id": student_id}, "附件列表": [], "附件数量": 0})
+    return folder
+
+def age(path, seconds=10):
+    past = time.time() - seconds
+    os.utime(path, (past, past))
+
+def test_index_created_after_first_lookup_is_used(tmp_path):
+    folder = make_folder(str(tmp_path), "2023001_张三", "2023001")
+    assert lookup_indexed_metadata(folder) is NOT_INDEXED
+
+    age(folder)
+    consolidate_metadata(str(tmp_path))
+    assert lookup_indexed_metadata(folder)["解析信息"]["student_id"] == "2023001"
+
+def test_folder_changed_after_indexing_is_not_served_from_index(tmp_path):
+    folder = make_folder(str(tmp_path), "2023001_张三", "2023001")
+    age(folder)
+    consolidate_metadata(str(tmp_path))
+    assert lookup_indexed_metadata(folder)["解析信息"]["student_id"] == "2023001"
+
+    save_metadata(folder, {"解析信息": {"student_id": "2023999"}, "附件列表": [], "附件数量": 0})
+    assert lookup_indexed_metadata(folder) is NOT_INDEXED
+
+    consolidate_metadata(str(tmp_path))
+    assert lookup_indexed_metadata(folder)["解析信息"]["student_id"] == "2023999"
+
+def test_rebuilt_index_is_reopened(tmp_path):
+    folder = make_folder(str(tmp_path), "2023001_张三", "2023001")
+    age(folder)
+    consolidate_metadata(str(tmp_path))
+    assert lookup_indexed_metadata(folder) is not NOT_INDEXED
+
+    os.remove(os.path.join(str(tmp_path), "submission_index.db"))
+    assert lookup_indexed_metadata(folder) is NOT_INDEXED
+
+def scan(save_dir):
+    return {record["folder"]: sorted(record["files"]) for record in iter_submission_records(save_dir)}
+
+def test_records_from_index_match_directory_scan(tmp_path):
+    save_dir = str(tmp_path)
+    for name in ("2023001_张三", "2023002_李四"):
+        folder = make_folder(save_dir, name, name[:7])
+        with open(os.path.join(folder, "作业.docx"), 'wb') as f:
+            f.write(b'docx')
+    os.makedirs(os.path.join(save_dir, "手动复制的文件夹"))
+
+    scanned = scan(save_dir)
+    assert scanned == {"2023001_张三": ["作业.docx"], "2023002_李四": ["作业.docx"], "手动复制的文件夹": []}
+
+    consolidate_metadata(save_dir)
+    assert scan(save_dir) == scanned
+
+    # 索引存在时，新增和删除的文件夹在下一次遍历时同步
+    make_folder(save_dir, "2023003_王五", "2023003")
+    os.rmdir(os.path.join(save_dir, "手动复制的文件夹"))
+    assert sorted(scan(save_dir)) == ["2023001_张三", "2023002_李四", "2023003_王五"]
+
+def test_last_uid_resets_when_uidvalidity_changes(tmp_path):
+    index = open_index(str(tmp_path), create=True)
+    try:
+        assert index.get_last_uid("INBOX", 7) == 0
+        index.set_last_uid("INBOX", 7, 42)
+        assert index.get_last_uid("INBOX", 7) == 42
+        assert index.get_last_uid("INBOX", 8) == 0
+        assert index.get_last_uid("其他文件夹", 7) == 0
+    finally:
+        index.close()
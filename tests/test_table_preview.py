@@ -0,0 +1,32 @@
+from table_preview import ColumnarTable, PreviewWindow
+
+# 测试环境没有显示器，不创建 Tk 窗口，只检查「刷新」按钮的分派逻辑
+
+class RecordingPreview(PreviewWindow):
+    def __init__(self, table, live_table):
+        self.table = table
+        self.live_table = live_table
+        self.calls = []
+
+    def load_file(self):
+        self.calls.append("load_file")
+
+    def apply_view(self, keep_offset=False):
+        self.calls.append(("apply_view", keep_offset))
+
+def test_refresh_keeps_live_results_instead_of_reading_a_file():
+    live = ColumnarTable.empty(["学号", "姓名"])
+    preview = RecordingPreview(live, live)
+    preview.reload()
+    assert preview.calls == [("apply_view", True)]
+
+def test_refresh_rereads_workbook_after_switching_away_from_live_results():
+    live = ColumnarTable.empty(["学号", "姓名"])
+    sheet = ColumnarTable.empty(["学号"])
+    preview = RecordingPreview(sheet, live)
+    preview.reload()
+    assert preview.calls == ["load_file"]
+
+    preview = RecordingPreview(None, None)
+    preview.reload()
+    assert preview.calls == ["load_file"]